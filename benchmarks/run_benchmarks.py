@@ -0,0 +1,478 @@
+"""Offline benchmarks for ``pipeline``.
+
+Two suites are available:
+
+``overhead``
+    The pipeline's own Python work (search post-processing, transcript
+    joining, script chunking, MP3 joining and base64, metrics rendering) and
+    the rendering of the process and job page templates at growing data
+    sizes, with deterministic local stand-ins for the YouTube API.
+``whisper``
+    Real Whisper backend / model / compute type combinations on synthetic
+    audio generated from a fixed seed. Combinations whose backend is not
+    installed, or whose model files cannot be loaded, are reported as
+    skipped.
+
+Like ``tests/test_pipeline.py``, modules that are not installed are replaced
+with small stand-ins before ``pipeline`` is imported; installed ones are used
+as they are. Nothing here needs network access, except loading Whisper models
+that are not cached locally yet.
+
+Examples::
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --suite whisper --backends faster \\
+        --models tiny,base --compute-types int8,float32
+    python benchmarks/run_benchmarks.py --compare baseline.json --fail-above 1.5
+"""
+
+import argparse
+import base64
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _available(name: str) -> bool:
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        return False
+    return True
+
+
+def _install_stand_ins() -> dict:
+    """Register stand-ins for missing pipeline dependencies.
+
+    Returns which of the real modules were available.
+    """
+    available = {
+        name: _available(name)
+        for name in [
+            "googleapiclient.discovery",
+            "google.cloud.texttospeech_v1",
+            "yt_dlp",
+            "whisper",
+            "faster_whisper",
+            "google.generativeai",
+        ]
+    }
+    if not available["googleapiclient.discovery"]:
+        ga = types.ModuleType("googleapiclient")
+        ga.discovery = types.ModuleType("googleapiclient.discovery")
+        ga.discovery.build = lambda *args, **kwargs: None
+        ga.http = types.ModuleType("googleapiclient.http")
+        ga.http.build_http = lambda: None
+        sys.modules.update(
+            {
+                "googleapiclient": ga,
+                "googleapiclient.discovery": ga.discovery,
+                "googleapiclient.http": ga.http,
+            }
+        )
+    if not available["google.cloud.texttospeech_v1"]:
+        tts = types.ModuleType("google.cloud.texttospeech_v1")
+        tts.TextToSpeechClient = object
+        tts.SynthesisInput = tts.VoiceSelectionParams = tts.AudioConfig = types.SimpleNamespace
+        tts.AudioEncoding = types.SimpleNamespace(MP3=1)
+        cloud = sys.modules.get("google.cloud") or types.ModuleType("google.cloud")
+        cloud.texttospeech_v1 = tts
+        sys.modules.setdefault("google", types.ModuleType("google")).cloud = cloud
+        sys.modules["google.cloud"] = cloud
+        sys.modules["google.cloud.texttospeech_v1"] = tts
+    if not available["google.generativeai"]:
+        genai = types.ModuleType("google.generativeai")
+        genai.configure = lambda **kwargs: None
+        sys.modules.setdefault("google", types.ModuleType("google")).generativeai = genai
+        sys.modules["google.generativeai"] = genai
+    for name in ["yt_dlp", "whisper"]:
+        if not available[name]:
+            sys.modules[name] = types.ModuleType(name)
+    return available
+
+
+class _Request:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class LocalYouTube:
+    """Deterministic stand-in for the YouTube Data API client."""
+
+    def __init__(self, count: int, page_size: int = 50, channels: int = 200):
+        self.page_size = page_size
+        self.videos_by_id = {}
+        for idx in range(count):
+            vid = f"v{idx:010d}"
+            self.videos_by_id[vid] = {
+                "id": vid,
+                "snippet": {"title": f"Video {idx}", "channelId": f"c{idx % channels}"},
+                "statistics": {"viewCount": str(idx * 37 % 100000)},
+                "contentDetails": {"duration": f"PT{idx % 50}M{idx % 60}S"},
+            }
+        self.ids = list(self.videos_by_id)
+
+    def search(self):
+        return types.SimpleNamespace(list=self._search_list)
+
+    def videos(self):
+        return types.SimpleNamespace(list=self._videos_list)
+
+    def channels(self):
+        return types.SimpleNamespace(list=self._channels_list)
+
+    def _search_list(self, **params):
+        start = int(params.get("pageToken") or 0)
+        page = self.ids[start : start + self.page_size]  # noqa: E203
+        response = {"items": [{"id": {"videoId": vid}} for vid in page]}
+        if start + self.page_size < len(self.ids):
+            response["nextPageToken"] = str(start + self.page_size)
+        return _Request(response)
+
+    def _videos_list(self, part, id):
+        return _Request({"items": [self.videos_by_id[vid] for vid in id.split(",")]})
+
+    def _channels_list(self, part, id):
+        items = [
+            {"id": cid, "statistics": {"subscriberCount": str(len(cid) * 1000)}}
+            for cid in id.split(",")
+        ]
+        return _Request({"items": items})
+
+
+def synthetic_audio(seconds: float, *, seed: int = 0):
+    """Return deterministic speech-like 16 kHz float32 audio.
+
+    Syllable-length bursts of a harmonic series with varying pitch are
+    separated by short pauses, so VAD and decoding see a realistic mix of
+    voiced audio and silence.
+    """
+    import numpy as np
+
+    rate = 16000
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * rate), dtype=np.float32)
+    pos = 0
+    while pos < len(audio):
+        length = int(rng.uniform(0.12, 0.35) * rate)
+        t = np.arange(min(length, len(audio) - pos)) / rate
+        pitch = rng.uniform(100, 220)
+        burst = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        envelope = np.sin(np.pi * t / max(t[-1], 1e-3)) if len(t) else t
+        audio[pos : pos + len(t)] = 0.2 * burst * envelope  # noqa: E203
+        pos += len(t) + int(rng.choice([0.05, 0.1, 0.6]) * rate)
+    audio += rng.normal(0, 0.003, len(audio)).astype(np.float32)
+    return audio
+
+
+def _measure(func, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "repeat": repeat,
+    }
+
+
+def _setup_django() -> None:
+    """Configure Django once so the site's templates can be rendered."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "slower_site.settings")
+    import django
+
+    django.setup()
+
+
+def template_cases(size: int):
+    """Yield ``(name, func)`` pairs rendering the page templates at ``size``.
+
+    The contexts mirror ``show_process`` and ``job_detail`` with ``size``
+    script lines and progress steps; no database access is needed.
+    """
+    _setup_django()
+    from django.template.loader import render_to_string
+    from django.test import RequestFactory
+
+    from summary.models import PipelineJob
+
+    script = "\n".join(
+        f"{'AB'[i % 2]}: これはベンチマーク用の台詞 {i} です。<b>タグ</b> & 記号も含めます。"
+        for i in range(size)
+    )
+    steps = [f"transcribed video{i}" for i in range(size)]
+    audio_id = "0" * 64
+    request = RequestFactory().get("/")
+
+    def process_page():
+        context = {
+            "video_id": "video0",
+            "script": script,
+            "audio_id": audio_id,
+            "error": None,
+            "steps": "\n".join(steps),
+        }
+        render_to_string("summary/process.html", context, request=request)
+
+    job = PipelineJob(
+        video_ids=[f"video{i}" for i in range(min(size, 50))],
+        status=PipelineJob.FAILED,
+        stage="synthesizing",
+        steps=steps,
+        error="tts down",
+        script=script,
+        audio_id=audio_id,
+    )
+
+    def job_page():
+        context = {
+            "job": job,
+            "script": job.script if job.finished else None,
+            "audio_id": job.audio_id or None,
+            "error": job.error or None,
+            "steps": "\n".join(job.steps) if job.steps else None,
+        }
+        render_to_string("summary/job.html", context, request=request)
+
+    # Compile the templates first, as the cached loader does after the first
+    # request, so only rendering is measured.
+    process_page()
+    job_page()
+    yield "render_process_page", process_page
+    yield "render_job_page", job_page
+
+
+def overhead_cases(pipeline, size: int):
+    """Yield ``(name, func)`` pairs exercising the pipeline at ``size``."""
+    youtube = LocalYouTube(size)
+
+    def search():
+        pipeline._CHANNEL_STATS.clear()
+        pipeline._get_youtube_client = lambda api_key: youtube
+        results = pipeline.iter_search_videos(
+            "key", "bench", "any", max_pages=size // 50 + 1, quota_budget=10**9
+        )
+        for _ in results:
+            pass
+
+    segments = [
+        types.SimpleNamespace(start=i * 2.0, end=i * 2.0 + 2.0, text=f" segment {i}")
+        for i in range(size)
+    ]
+
+    def join_transcript():
+        normalized = pipeline._segments_from_result((iter(segments), None), "faster")
+        pipeline.join_segments(seg["text"] for seg in normalized)
+
+    script = "\n".join(
+        f"{'AB'[i % 2]}: これはベンチマーク用の台詞 {i} です。少し長めの文章を続けます。"
+        for i in range(size)
+    )
+
+    def chunk_tts():
+        pipeline._split_tts_text(script, 4500, avg_lines=8)
+
+    def chunk_gemini():
+        pipeline._split_text(script, 20000)
+
+    def parse_dialogue():
+        pipeline._parse_dialogue(script)
+
+    parts = [b"ID3\x04\x00\x00\x00\x00\x00\x10" + b"\x00" * 16 + bytes(4096) for _ in range(size)]
+
+    def mp3_base64():
+        base64.b64encode(pipeline._concat_mp3(parts))
+
+    def render_metrics():
+        pipeline.reset_metrics()
+        for idx in range(size):
+            pipeline._observe(
+                "slower_stage_duration_seconds", idx % 7 / 3, stage="youtube", endpoint=f"e{idx % 50}"
+            )
+            pipeline._inc("slower_tts_bytes_total", idx)
+        pipeline.render_metrics()
+
+    yield "search_postprocess", search
+    yield "transcript_join", join_transcript
+    yield "tts_chunking", chunk_tts
+    yield "gemini_chunking", chunk_gemini
+    yield "parse_dialogue", parse_dialogue
+    yield "mp3_concat_base64", mp3_base64
+    yield "render_metrics", render_metrics
+    yield from template_cases(size)
+
+
+def run_overhead(pipeline, sizes, repeat: int):
+    results = []
+    for size in sizes:
+        for name, func in overhead_cases(pipeline, size):
+            result = {"suite": "overhead", "name": name, "size": size}
+            result.update(_measure(func, repeat))
+            results.append(result)
+            print(f"overhead {name:<20} size={size:<7} median={result['median'] * 1000:.2f} ms")
+    return results
+
+
+def run_whisper(pipeline, available, *, backends, models, compute_types, seconds, repeat):
+    audio = synthetic_audio(seconds)
+    results = []
+    for backend in backends:
+        module = "faster_whisper" if backend == "faster" else "whisper"
+        for model_name in models:
+            for compute_type in compute_types if backend == "faster" else ["float32"]:
+                result = {
+                    "suite": "whisper",
+                    "name": f"{backend}/{model_name}/{compute_type}",
+                    "backend": backend,
+                    "model": model_name,
+                    "compute_type": compute_type,
+                    "audio_seconds": seconds,
+                }
+                results.append(result)
+                if not available[module]:
+                    result["skipped"] = f"{module} is not installed"
+                    print(f"whisper  {result['name']:<28} skipped ({result['skipped']})")
+                    continue
+                os.environ.update(
+                    WHISPER_BACKEND=backend,
+                    WHISPER_MODEL=model_name,
+                    WHISPER_COMPUTE_TYPE=compute_type,
+                    WHISPER_VAD="0",
+                )
+                with pipeline._MODEL_CACHE_LOCK:
+                    pipeline._MODEL_CACHE.clear()
+                    pipeline._MODEL_SIZES.clear()
+                try:
+                    start = time.perf_counter()
+                    model = pipeline._get_whisper_model(model_name)
+                    result["load_seconds"] = time.perf_counter() - start
+                    result.update(
+                        _measure(lambda: pipeline._transcribe_audio(model, audio, backend), repeat)
+                    )
+                except Exception as e:
+                    result["skipped"] = f"{type(e).__name__}: {e}"
+                    print(f"whisper  {result['name']:<28} skipped ({result['skipped']})")
+                    continue
+                result["real_time_factor"] = result["median"] / seconds
+                print(
+                    f"whisper  {result['name']:<28} load={result['load_seconds']:.2f}s "
+                    f"median={result['median']:.2f}s rtf={result['real_time_factor']:.3f}"
+                )
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: list, baseline_path: str, threshold: float) -> bool:
+    """Print median ratios against a baseline file; return False on regressions."""
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {
+            (r["suite"], r["name"], r.get("size")): r
+            for r in json.load(fh)["results"]
+            if "median" in r
+        }
+    ok = True
+    for result in current:
+        old = baseline.get((result["suite"], result["name"], result.get("size")))
+        if old is None or "median" not in result or not old["median"]:
+            continue
+        ratio = result["median"] / old["median"]
+        flag = ""
+        if threshold and ratio > threshold:
+            ok = False
+            flag = "  REGRESSION"
+        label = f"{result['suite']}/{result['name']}" + (
+            f"@{result['size']}" if result.get("size") is not None else ""
+        )
+        print(f"{label:<45} {ratio:6.2f}x{flag}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--suite", choices=["overhead", "whisper", "all"], default="overhead")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backends", default="openai,faster")
+    parser.add_argument("--models", default="tiny")
+    parser.add_argument("--compute-types", default="int8")
+    parser.add_argument("--audio-seconds", type=float, default=30.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare medians against")
+    parser.add_argument(
+        "--fail-above",
+        type=float,
+        default=0.0,
+        help="exit non-zero if a median is this many times slower than the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    available = _install_stand_ins()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Keep the on-disk caches of the benchmarked process out of the tree.
+        for name in ["TRANSCRIPT_CACHE_DIR", "GEMINI_CACHE_DIR", "TTS_CACHE_DIR"]:
+            os.environ[name] = os.path.join(cache_dir, name.lower())
+        os.environ.pop("YT_CHANNEL_STATS_FILE", None)
+        pipeline = importlib.import_module("pipeline")
+
+        results = []
+        if args.suite in {"overhead", "all"}:
+            sizes = [int(size) for size in args.sizes.split(",") if size]
+            results += run_overhead(pipeline, sizes, args.repeat)
+        if args.suite in {"whisper", "all"}:
+            results += run_whisper(
+                pipeline,
+                available,
+                backends=args.backends.split(","),
+                models=args.models.split(","),
+                compute_types=args.compute_types.split(","),
+                seconds=args.audio_seconds,
+                repeat=max(1, min(args.repeat, 3)),
+            )
+
+    report = {
+        "schema": 1,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stand_ins": sorted(name for name, ok in available.items() if not ok),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+    if args.compare:
+        return 0 if compare(results, args.compare, args.fail_above) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
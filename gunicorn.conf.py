@@ -0,0 +1,37 @@
+"""Gunicorn settings, picked up automatically from the project directory.
+
+Command-line options such as ``--timeout`` in the Procfile still take
+precedence over the values here.
+"""
+
+import os
+
+# Load the Django app in the master process before forking workers.
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+
+# GUNICORN_ASGI=1 serves the ASGI application with uvicorn workers, so the
+# async search and step views run on an event loop instead of one thread per
+# request. The default is the WSGI application with sync workers.
+if os.getenv("GUNICORN_ASGI", "0") == "1":
+    wsgi_app = "slower_site.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "slower_site.wsgi:application"
+
+
+def when_ready(server):
+    # With preload_app, SummaryConfig.ready() started the Whisper preload in
+    # the master. Wait for it so every forked worker shares the loaded
+    # weights copy-on-write. Without preload_app each worker starts its own
+    # preload on a background thread and keeps sending heartbeats meanwhile,
+    # so a load longer than --timeout does not get the worker killed.
+    if preload_app and os.getenv("WHISPER_PRELOAD", "0") == "1":
+        import pipeline
+
+        pipeline.start_whisper_preload().join()
+        error = pipeline.whisper_preload_error()
+        if error is not None:
+            # Workers forked from this master would never become ready.
+            server.log.error("Whisper preload failed: %r", error)
+            raise RuntimeError(f"Whisper preload failed: {error!r}") from error
+        server.log.info("Whisper models preloaded")
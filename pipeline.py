@@ -1,11 +1,25 @@
 """Utility helpers for YouTube search, transcription, summarization,
 and audio synthesis."""
 
+import asyncio
+import bisect
+import functools
 import os
+import sys
 import threading
 import gc
-from typing import List, Optional, Dict
+import hashlib
+import json
+import multiprocessing
+import queue
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 import re
+import subprocess
 from urllib.parse import urlparse, parse_qs
 
 from googleapiclient.discovery import build
@@ -15,8 +29,248 @@ import whisper
 
 import google.generativeai as genai
 
-_MODEL_CACHE: Dict[str, object] = {}
+# In-process metrics, rendered in Prometheus text format by render_metrics().
+_METRICS_LOCK = threading.Lock()
+_COUNTERS: Dict[tuple, float] = {}
+_HISTOGRAMS: Dict[tuple, list] = {}
+_HISTOGRAM_BUCKETS = {
+    "slower_stage_duration_seconds": (
+        0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800,
+    ),
+    "slower_whisper_real_time_factor": (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5),
+}
+_METRIC_HELP = {
+    "slower_stage_duration_seconds": ("histogram", "Wall time of pipeline stages."),
+    "slower_stage_errors_total": ("counter", "Pipeline stage calls that raised."),
+    "slower_download_bytes_total": ("counter", "Audio bytes downloaded from YouTube."),
+    "slower_audio_seconds_total": ("counter", "Seconds of audio transcribed by Whisper."),
+    "slower_whisper_real_time_factor": (
+        "histogram", "Whisper inference time divided by audio duration."
+    ),
+    "slower_gemini_characters_total": ("counter", "Characters sent to and received from Gemini."),
+    "slower_tts_characters_total": ("counter", "Characters sent to Text-to-Speech."),
+    "slower_tts_bytes_total": ("counter", "MP3 bytes returned by Text-to-Speech."),
+    "slower_cache_hits_total": ("counter", "Cache lookups that found an entry."),
+    "slower_cache_misses_total": ("counter", "Cache lookups that found nothing."),
+    "slower_cache_evictions_total": ("counter", "Entries evicted from a cache."),
+    "slower_cache_bytes": ("gauge", "Current size of a cache in bytes."),
+    "slower_youtube_quota_units_total": ("counter", "YouTube Data API quota units spent."),
+}
+
+
+def _label_key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def _inc(name: str, value: float = 1.0, **labels) -> None:
+    key = _label_key(name, labels)
+    with _METRICS_LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0.0) + value
+
+
+def _observe(name: str, value: float, **labels) -> None:
+    buckets = _HISTOGRAM_BUCKETS[name]
+    key = _label_key(name, labels)
+    with _METRICS_LOCK:
+        entry = _HISTOGRAMS.get(key)
+        if entry is None:
+            entry = _HISTOGRAMS[key] = [[0] * len(buckets), 0.0, 0]
+        for idx, bound in enumerate(buckets):
+            if value <= bound:
+                entry[0][idx] += 1
+        entry[1] += value
+        entry[2] += 1
+
+
+@contextmanager
+def _timed(stage: str, **labels):
+    """Record the duration of the block, and an error if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        _inc("slower_stage_errors_total", stage=stage, **labels)
+        raise
+    finally:
+        _observe(
+            "slower_stage_duration_seconds", time.perf_counter() - start, stage=stage, **labels
+        )
+
+
+def _record_transcription(elapsed: float, audio_seconds: float, backend: str) -> None:
+    """Record Whisper inference time, audio duration and real-time factor."""
+    model = os.getenv("WHISPER_MODEL", "tiny")
+    _observe("slower_stage_duration_seconds", elapsed, stage="whisper_transcribe", model=model)
+    _inc("slower_audio_seconds_total", audio_seconds, backend=backend, model=model)
+    if audio_seconds > 0:
+        _observe(
+            "slower_whisper_real_time_factor", elapsed / audio_seconds, backend=backend, model=model
+        )
+
+
+def reset_metrics() -> None:
+    """Clear all recorded counters and histograms."""
+    with _METRICS_LOCK:
+        _COUNTERS.clear()
+        _HISTOGRAMS.clear()
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _cache_samples() -> List[tuple]:
+    """Collect (metric, labels, value) samples from the existing cache stats."""
+    samples = []
+    caches = {name: cache.stats() for name, cache in list(_DISK_CACHES.items())}
+    with _MODEL_CACHE_LOCK:
+        caches["whisper_model"] = {
+            "hits": _MODEL_CACHE_STATS["hits"],
+            "misses": _MODEL_CACHE_STATS["loads"],
+            "evictions": _MODEL_CACHE_STATS["evictions"],
+            "bytes": sum(_MODEL_SIZES.get(key, 0) for key in _MODEL_CACHE),
+        }
+    for name, stats in sorted(caches.items()):
+        labels = (("cache", name),)
+        for field, metric in [
+            ("hits", "slower_cache_hits_total"),
+            ("misses", "slower_cache_misses_total"),
+            ("evictions", "slower_cache_evictions_total"),
+            ("bytes", "slower_cache_bytes"),
+        ]:
+            if field in stats:
+                samples.append((metric, labels, stats[field]))
+    with _QUOTA_LOCK:
+        for endpoint, usage in sorted(_QUOTA_USAGE.items()):
+            samples.append(
+                ("slower_youtube_quota_units_total", (("endpoint", endpoint),), usage["units"])
+            )
+    return samples
+
+
+def render_metrics() -> str:
+    """Return all pipeline metrics of this process in Prometheus text format."""
+    lines: Dict[str, List[str]] = {name: [] for name in _METRIC_HELP}
+    with _METRICS_LOCK:
+        counters = sorted(_COUNTERS.items())
+        histograms = sorted(
+            (key, [list(entry[0]), entry[1], entry[2]]) for key, entry in _HISTOGRAMS.items()
+        )
+    for (name, labels), value in counters:
+        lines[name].append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+    for name, labels, value in _cache_samples():
+        lines[name].append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+    for (name, labels), (counts, total, count) in histograms:
+        for bound, bucket in zip(_HISTOGRAM_BUCKETS[name], counts):
+            le = _format_labels(labels + (("le", _format_number(bound)),))
+            lines[name].append(f"{name}_bucket{le} {bucket}")
+        le = _format_labels(labels + (("le", "+Inf"),))
+        lines[name].append(f"{name}_bucket{le} {count}")
+        lines[name].append(f"{name}_sum{_format_labels(labels)} {_format_number(total)}")
+        lines[name].append(f"{name}_count{_format_labels(labels)} {count}")
+    output = []
+    for name, samples in lines.items():
+        if not samples:
+            continue
+        kind, help_text = _METRIC_HELP[name]
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(samples)
+    return "\n".join(output) + "\n"
+
+
+_MODEL_CACHE: "OrderedDict[str, object]" = OrderedDict()
+# ``_MODEL_CACHE_LOCK`` guards the cache dictionaries and is only held briefly,
+# so metrics can be read while ``_MODEL_LOAD_LOCK`` serialises model loads.
 _MODEL_CACHE_LOCK = threading.Lock()
+_MODEL_LOAD_LOCK = threading.Lock()
+_MODEL_SIZES: Dict[str, int] = {}
+_MODEL_CACHE_STATS = {"hits": 0, "loads": 0, "evictions": 0}
+
+# Approximate parameter counts used to size models before they are loaded.
+_WHISPER_PARAMS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "turbo": 809_000_000,
+    "large": 1_550_000_000,
+}
+_COMPUTE_TYPE_BYTES = {"int8": 1, "int16": 2, "float16": 2, "bfloat16": 2, "float32": 4}
+
+
+def _estimate_model_bytes(name: str, backend: str, compute_type: str, model=None) -> int:
+    """Estimate the resident size of a Whisper model in bytes.
+
+    Loaded ``openai-whisper`` models are measured from their tensors; other
+    cases fall back to the parameter count of the model family.
+    """
+    if model is not None and hasattr(model, "parameters"):
+        tensors = list(model.parameters()) + list(getattr(model, "buffers", list)())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    family = os.path.basename(name.rstrip("/")).lower()
+    params = next(
+        (count for key, count in _WHISPER_PARAMS.items() if key in family), 0
+    )
+    if backend == "faster":
+        width = _COMPUTE_TYPE_BYTES.get(compute_type.split("_")[0], 2)
+    else:
+        width = 4
+    return params * width
+
+
+def _release_memory() -> None:
+    """Return freed model memory to the allocator and the operating system."""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    try:
+        import ctypes
+
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def _evict_models(budget: int, incoming: int = 0, keep: Optional[str] = None) -> bool:
+    """Drop least recently used models until ``incoming`` more bytes fit.
+
+    The caller must hold ``_MODEL_CACHE_LOCK``. Returns True if anything was
+    evicted.
+    """
+    evicted = False
+    total = sum(_MODEL_SIZES.get(key, 0) for key in _MODEL_CACHE)
+    for key in list(_MODEL_CACHE):
+        if total + incoming <= budget:
+            break
+        if key == keep:
+            continue
+        _MODEL_CACHE.pop(key)
+        total -= _MODEL_SIZES.pop(key, 0)
+        _MODEL_CACHE_STATS["evictions"] += 1
+        evicted = True
+    return evicted
+
+
+def _cached_model(cache_key: str):
+    """Return the cached model for ``cache_key`` and count the hit, or ``None``."""
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(cache_key)
+        if model is not None:
+            _MODEL_CACHE.move_to_end(cache_key)
+            _MODEL_CACHE_STATS["hits"] += 1
+        return model
 
 
 def _get_whisper_model(name: str):
@@ -24,26 +278,505 @@ def _get_whisper_model(name: str):
 
     The backend is selected via the ``WHISPER_BACKEND`` environment variable
     (``"openai"`` by default). When set to ``"faster"``, ``faster_whisper`` is
-    used instead of ``openai-whisper``.
+    used instead of ``openai-whisper``. Cached models are kept within
+    ``WHISPER_CACHE_MAX_MB`` (default ``1024``; ``0`` means unbounded) by
+    evicting the least recently used ones before a new model is loaded. The
+    most recent model is always kept, even if it alone exceeds the budget.
     """
     backend = os.getenv("WHISPER_BACKEND", "openai").lower()
     compute_type = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
     use_cache = os.getenv("WHISPER_CACHE", "1") != "0"
+    budget = int(float(os.getenv("WHISPER_CACHE_MAX_MB", "1024")) * 1024 * 1024)
     cache_key = f"{backend}:{compute_type}:{name}" if backend == "faster" else f"{backend}:{name}"
-    with _MODEL_CACHE_LOCK:
-        model = _MODEL_CACHE.get(cache_key) if use_cache else None
-        if model is None:
+    model = _cached_model(cache_key) if use_cache else None
+    if model is not None:
+        return model
+    with _MODEL_LOAD_LOCK:
+        # Another thread may have loaded the model while this one waited.
+        model = _cached_model(cache_key) if use_cache else None
+        if model is not None:
+            return model
+        if use_cache and budget > 0:
+            estimate = _estimate_model_bytes(name, backend, compute_type)
+            with _MODEL_CACHE_LOCK:
+                evicted = _evict_models(budget, estimate)
+            if evicted:
+                _release_memory()
+        with _timed("whisper_load", model=name):
             if backend == "faster":
                 from faster_whisper import WhisperModel
 
-                model = WhisperModel(name, compute_type=compute_type)
+                cpu_threads = int(os.getenv("WHISPER_CPU_THREADS", "0"))
+                kwargs = {"cpu_threads": cpu_threads} if cpu_threads else {}
+                model = WhisperModel(name, compute_type=compute_type, **kwargs)
             else:
                 model = whisper.load_model(name)
+        size = _estimate_model_bytes(name, backend, compute_type, model) if use_cache else 0
+        with _MODEL_CACHE_LOCK:
+            _MODEL_CACHE_STATS["loads"] += 1
+            evicted = False
             if use_cache:
                 _MODEL_CACHE[cache_key] = model
+                _MODEL_SIZES[cache_key] = size
+                evicted = budget > 0 and _evict_models(budget, keep=cache_key)
+        if evicted:
+            _release_memory()
         return model
 
 
+def whisper_cache_stats() -> dict:
+    """Return resident models, their estimated size and cache counters."""
+    with _MODEL_CACHE_LOCK:
+        models = list(_MODEL_CACHE)
+        size = sum(_MODEL_SIZES.get(key, 0) for key in models)
+        stats = dict(_MODEL_CACHE_STATS)
+    budget_mb = float(os.getenv("WHISPER_CACHE_MAX_MB", "1024"))
+    return {
+        "models": models,
+        "bytes": size,
+        "max_bytes": int(budget_mb * 1024 * 1024),
+        **stats,
+    }
+
+
+_WHISPER_READY = threading.Event()
+
+
+def _warm_up_whisper(model) -> None:
+    """Run a short inference on silence so lazy initialisation happens now."""
+    import numpy as np
+
+    audio = np.zeros(16000, dtype=np.float32)
+    if os.getenv("WHISPER_BACKEND", "openai").lower() == "faster":
+        segments, _info = model.transcribe(audio)
+        list(segments)
+    else:
+        model.transcribe(audio)
+
+
+def preload_whisper_models(names: Optional[List[str]] = None) -> List[str]:
+    """Load and warm up Whisper models, then mark the process as ready.
+
+    ``names`` defaults to ``WHISPER_PRELOAD_MODELS`` (comma separated) or
+    ``WHISPER_MODEL``. Models are kept in the model cache, so loading them
+    in a pre-fork master process lets forked workers share the weights
+    copy-on-write.
+    """
+    if names is None:
+        configured = os.getenv("WHISPER_PRELOAD_MODELS") or os.getenv("WHISPER_MODEL", "tiny")
+        names = [name.strip() for name in configured.split(",") if name.strip()]
+    for name in names:
+        _warm_up_whisper(_get_whisper_model(name))
+    _WHISPER_READY.set()
+    return names
+
+
+_PRELOAD_THREAD: Optional[threading.Thread] = None
+_PRELOAD_LOCK = threading.Lock()
+_PRELOAD_ERROR: Optional[BaseException] = None
+
+
+def _run_preload() -> None:
+    global _PRELOAD_ERROR
+    try:
+        preload_whisper_models()
+    except BaseException as e:
+        _PRELOAD_ERROR = e
+        raise  # also reported on stderr by threading.excepthook
+
+
+def start_whisper_preload() -> threading.Thread:
+    """Run :func:`preload_whisper_models` on a background thread, once per process.
+
+    The server keeps starting up (and a gunicorn worker keeps sending its
+    heartbeat) while the models load; :func:`whisper_ready` turns True once
+    they are warm. Join the returned thread to wait for the preload, then
+    check :func:`whisper_preload_error`. Calling this again after a failed
+    preload starts a new attempt.
+    """
+    global _PRELOAD_THREAD, _PRELOAD_ERROR
+    with _PRELOAD_LOCK:
+        failed = _PRELOAD_THREAD is not None and not _PRELOAD_THREAD.is_alive() and (
+            _PRELOAD_ERROR is not None
+        )
+        if _PRELOAD_THREAD is None or failed:
+            _PRELOAD_ERROR = None
+            _PRELOAD_THREAD = threading.Thread(
+                target=_run_preload, name="whisper-preload", daemon=True
+            )
+            _PRELOAD_THREAD.start()
+        return _PRELOAD_THREAD
+
+
+def whisper_preload_error() -> Optional[BaseException]:
+    """Return the exception that stopped the last preload, if it failed."""
+    return _PRELOAD_ERROR
+
+
+def whisper_ready() -> bool:
+    """Return False while an opt-in preload (``WHISPER_PRELOAD=1``) is pending or failed."""
+    return os.getenv("WHISPER_PRELOAD", "0") != "1" or _WHISPER_READY.is_set()
+
+
+class _DiskCache:
+    """File-per-entry cache with a total size budget and LRU eviction.
+
+    The file modification time records when an entry was written and the
+    access time when it was last read (set explicitly, so ``noatime`` mounts
+    work). The least recently used files are removed first once
+    ``max_bytes`` is exceeded, and entries written more than ``ttl`` seconds
+    ago are treated as misses however often they are read.
+
+    The directory is scanned once, on first use; afterwards entry sizes and
+    their LRU order are kept in memory, so writes do not walk the tree.
+    Entries written by other processes sharing the directory are picked up
+    on their next scan and are evicted by the process that wrote them.
+    """
+
+    def __init__(self, directory: str, *, max_bytes: int, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._bytes = 0
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        """Return the in-memory index, scanning the directory the first time.
+
+        The caller must hold ``_lock``.
+        """
+        if self._index is None:
+            entries = sorted(self._entries())
+            self._index = OrderedDict((path, size) for _atime, size, path in entries)
+            self._bytes = sum(self._index.values())
+        return self._index
+
+    def _forget(self, path: str) -> None:
+        """Drop ``path`` from the index. The caller must hold ``_lock``."""
+        size = self._load_index().pop(path, None)
+        if size is not None:
+            self._bytes -= size
+
+    def get(self, key: str, *, count: bool = True) -> Optional[bytes]:
+        """Return the entry for ``key``; ``count=False`` leaves hit/miss counters alone."""
+        path = self._path(key)
+        try:
+            written = os.path.getmtime(path)
+            now = time.time()
+            if self.ttl is not None and now - written > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "rb") as fh:
+                data = fh.read()
+            os.utime(path, (now, written))
+        except OSError:
+            with self._lock:
+                self._forget(path)
+                self.misses += count
+            return None
+        with self._lock:
+            index = self._load_index()
+            if path in index:
+                index.move_to_end(path)
+            else:
+                index[path] = len(data)
+                self._bytes += len(data)
+            self.hits += count
+        return data
+
+    def set(self, key: str, value: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(value)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._forget(path)
+            self._load_index()[path] = len(value)
+            self._bytes += len(value)
+            self._evict()
+
+    def _entries(self):
+        entries = []
+        for root, _dirs, files in os.walk(self.directory):
+            for fname in files:
+                if fname.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, fname)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_atime, st.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the budget fits.
+
+        The caller must hold ``_lock``.
+        """
+        index = self._load_index()
+        while self._bytes > self.max_bytes and index:
+            path, size = index.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.evictions += 1
+
+    def reset(self, directory: str) -> None:
+        """Point the cache at ``directory``; it is scanned on next use."""
+        with self._lock:
+            if directory != self.directory:
+                self.directory = directory
+                self._index = None
+                self._bytes = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            for _atime, _size, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._index = OrderedDict()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Return counters and size from the in-memory index, without a rescan."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._load_index()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_DISK_CACHES: Dict[str, _DiskCache] = {}
+_DISK_CACHES_LOCK = threading.Lock()
+
+
+def _get_disk_cache(
+    name: str, directory: str, *, max_bytes: int, ttl: Optional[float] = None
+) -> _DiskCache:
+    """Return the named disk cache, updating its settings from the caller.
+
+    Instances are kept per name so hit/miss counters survive changes to the
+    environment between calls.
+    """
+    with _DISK_CACHES_LOCK:
+        cache = _DISK_CACHES.get(name)
+        if cache is None:
+            cache = _DiskCache(directory, max_bytes=max_bytes, ttl=ttl)
+            _DISK_CACHES[name] = cache
+        else:
+            cache.reset(directory)
+            cache.max_bytes = max_bytes
+            cache.ttl = ttl
+        return cache
+
+
+class _DjangoCache:
+    """Adapter exposing a Django cache alias with the ``_DiskCache`` interface.
+
+    Size limits and eviction are left to the configured Django backend
+    (``MAX_ENTRIES`` / ``CULL_FREQUENCY``).
+    """
+
+    def __init__(self, name: str, alias: str, *, ttl: Optional[float] = None):
+        self.name = name
+        self.alias = alias
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _backend(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{hashlib.sha256(key.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        value = self._backend().get(self._key(key))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        self._backend().set(self._key(key), value, timeout=self.ttl)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "backend": f"django:{self.alias}"}
+
+
+_DJANGO_CACHES: Dict[str, _DjangoCache] = {}
+
+
+def _get_django_cache(name: str, alias: str, *, ttl: Optional[float] = None) -> _DjangoCache:
+    """Return the named Django cache adapter, keeping its counters."""
+    with _DISK_CACHES_LOCK:
+        cache = _DJANGO_CACHES.get(name)
+        if cache is None:
+            cache = _DjangoCache(name, alias, ttl=ttl)
+            _DJANGO_CACHES[name] = cache
+        else:
+            cache.alias = alias
+            cache.ttl = ttl
+        return cache
+
+
+def _transcript_cache() -> Optional[_DiskCache]:
+    """Return the transcript store or ``None`` when ``TRANSCRIPT_CACHE=0``."""
+    if os.getenv("TRANSCRIPT_CACHE", "1") == "0":
+        return None
+    directory = os.getenv("TRANSCRIPT_CACHE_DIR", os.path.join("cache", "transcripts"))
+    max_mb = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "200"))
+    return _get_disk_cache(
+        "transcripts", directory, max_bytes=int(max_mb * 1024 * 1024)
+    )
+
+
+def _transcript_cache_key(video_id: str) -> str:
+    """Key a transcript by video ID and the active Whisper configuration.
+
+    With ``WHISPER_VAD=1`` the VAD settings are part of the key, so turning
+    VAD on or retuning it does not return transcripts made without it.
+    """
+    parts = [
+        video_id,
+        os.getenv("WHISPER_BACKEND", "openai").lower(),
+        os.getenv("WHISPER_MODEL", "tiny"),
+        os.getenv("WHISPER_COMPUTE_TYPE", "int8"),
+    ]
+    if _vad_enabled():
+        parts.append(
+            [
+                "vad",
+                float(os.getenv("WHISPER_VAD_THRESHOLD", "0.5")),
+                int(os.getenv("WHISPER_VAD_MIN_SILENCE_MS", "1000")),
+                int(os.getenv("WHISPER_VAD_PAD_MS", "200")),
+            ]
+        )
+    return json.dumps(parts)
+
+
+def cached_transcript(video_id: str) -> Optional[str]:
+    """Return the stored transcript for the current Whisper settings, if any.
+
+    Lookups here are not counted in :func:`transcript_cache_stats`, since a
+    miss is followed by :func:`download_and_transcribe` checking again.
+    """
+    cache = _transcript_cache()
+    data = cache.get(_transcript_cache_key(video_id), count=False) if cache is not None else None
+    return data.decode("utf-8") if data is not None else None
+
+
+def transcript_cache_stats() -> dict:
+    """Return hit/miss/eviction counters and size of the transcript store."""
+    cache = _transcript_cache()
+    return cache.stats() if cache is not None else {}
+
+
+_CLIENTS: Dict[tuple, object] = {}
+_CLIENTS_LOCK = threading.Lock()
+_THREAD_CLIENTS = threading.local()
+_GEMINI_CONFIGURED_KEY: Optional[str] = None
+
+
+def reset_clients() -> None:
+    """Drop all pooled API clients.
+
+    Called automatically in forked children, because gRPC channels and open
+    HTTP connections inherited from the parent process are not usable there.
+    """
+    global _THREAD_CLIENTS, _GEMINI_CONFIGURED_KEY
+    with _CLIENTS_LOCK:
+        _CLIENTS.clear()
+        _THREAD_CLIENTS = threading.local()
+        _GEMINI_CONFIGURED_KEY = None
+
+
+def _reset_clients_after_fork() -> None:
+    # The lock may have been held by another thread at fork time.
+    global _CLIENTS_LOCK
+    _CLIENTS_LOCK = threading.Lock()
+    reset_clients()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def _get_youtube_client(api_key: str):
+    """Return a YouTube Data API client reused by the current thread.
+
+    The client is built from the discovery document bundled with
+    ``google-api-python-client`` and keeps its HTTP connections open between
+    requests. The underlying ``httplib2`` transport is not thread-safe, so
+    each thread gets its own client per API key.
+    """
+    clients = getattr(_THREAD_CLIENTS, "youtube", None)
+    if clients is None:
+        clients = _THREAD_CLIENTS.youtube = {}
+    client = clients.get(api_key)
+    if client is None:
+        from googleapiclient.http import build_http
+
+        client = build(
+            "youtube",
+            "v3",
+            developerKey=api_key,
+            http=build_http(),
+            static_discovery=True,
+            cache_discovery=False,
+        )
+        clients[api_key] = client
+    return client
+
+
+def _get_tts_client():
+    """Return the process-wide ``TextToSpeechClient`` (its gRPC channel is thread-safe)."""
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(("tts",))
+        if client is None:
+            client = texttospeech.TextToSpeechClient()
+            _CLIENTS[("tts",)] = client
+        return client
+
+
+def _get_gemini_model(api_key: str, model_name: str):
+    """Return a shared ``GenerativeModel``, configuring the API key once."""
+    global _GEMINI_CONFIGURED_KEY
+    with _CLIENTS_LOCK:
+        if _GEMINI_CONFIGURED_KEY != api_key:
+            genai.configure(api_key=api_key)
+            _GEMINI_CONFIGURED_KEY = api_key
+            for key in [k for k in _CLIENTS if k[0] == "gemini"]:
+                del _CLIENTS[key]
+        model = _CLIENTS.get(("gemini", model_name))
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            _CLIENTS[("gemini", model_name)] = model
+        return model
 
 
 def _iso_duration_to_seconds(duration: str) -> int:
@@ -90,8 +823,8 @@ def extract_video_id(url: str) -> Optional[str]:
 
 def get_video_info(api_key: str, video_id: str) -> Optional[dict]:
     """Retrieve basic video information by ID."""
-    youtube = build("youtube", "v3", developerKey=api_key)
-    resp = youtube.videos().list(part="snippet", id=video_id).execute()
+    youtube = _get_youtube_client(api_key)
+    resp = _execute(youtube.videos().list(part="snippet", id=video_id), "videos.list")
     items = resp.get("items", [])
     if not items:
         return None
@@ -103,6 +836,67 @@ def get_video_info(api_key: str, video_id: str) -> Optional[dict]:
     }
 
 
+_YOUTUBE_QUOTA_COSTS = {"search.list": 100, "videos.list": 1, "channels.list": 1}
+_QUOTA_USAGE: Dict[str, Dict[str, int]] = {}
+_QUOTA_LOCK = threading.Lock()
+
+
+def _execute(request, endpoint: str) -> dict:
+    """Execute a YouTube API request and charge its quota units to ``endpoint``.
+
+    Units are recorded even when the call fails, since YouTube bills those too.
+    """
+    try:
+        with _timed("youtube", endpoint=endpoint):
+            return request.execute()
+    finally:
+        with _QUOTA_LOCK:
+            usage = _QUOTA_USAGE.setdefault(endpoint, {"calls": 0, "units": 0})
+            usage["calls"] += 1
+            usage["units"] += _YOUTUBE_QUOTA_COSTS.get(endpoint, 1)
+
+
+def youtube_quota_usage() -> dict:
+    """Return calls and quota units used per YouTube endpoint by this process."""
+    with _QUOTA_LOCK:
+        usage = {name: dict(counts) for name, counts in _QUOTA_USAGE.items()}
+    usage["total_units"] = sum(counts["units"] for counts in usage.values())
+    return usage
+
+
+_SEARCH_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_SEARCH_CACHE_LOCK = threading.Lock()
+_SEARCH_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _search_cache_get(key: str) -> Optional[List[dict]]:
+    with _SEARCH_CACHE_LOCK:
+        entry = _SEARCH_CACHE.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _SEARCH_CACHE.move_to_end(key)
+            _SEARCH_CACHE_STATS["hits"] += 1
+            return entry[1]
+        if entry is not None:
+            del _SEARCH_CACHE[key]
+        _SEARCH_CACHE_STATS["misses"] += 1
+        return None
+
+
+def _search_cache_set(key: str, results: List[dict], ttl: float) -> None:
+    max_entries = int(os.getenv("YT_SEARCH_CACHE_SIZE", "256"))
+    with _SEARCH_CACHE_LOCK:
+        _SEARCH_CACHE[key] = (time.monotonic() + ttl, results)
+        _SEARCH_CACHE.move_to_end(key)
+        while len(_SEARCH_CACHE) > max_entries:
+            _SEARCH_CACHE.popitem(last=False)
+
+
+def search_cache_stats() -> dict:
+    """Return hit/miss counters and size of the search result cache."""
+    with _SEARCH_CACHE_LOCK:
+        return {**_SEARCH_CACHE_STATS, "entries": len(_SEARCH_CACHE)}
+
+
 def search_videos(
     api_key: str,
     keyword: str,
@@ -122,9 +916,159 @@ def search_videos(
     """Search YouTube videos and return list of results filtered by criteria.
 
     Each result dictionary contains ``videoId``, ``title``, ``url``,
-    ``viewCount`` and ``subscriberCount``.
+    ``viewCount`` and ``subscriberCount``. Further result pages are fetched
+    until ``max_results`` videos pass the filters (see
+    :func:`iter_search_videos`). Results are cached in memory for
+    ``YT_SEARCH_CACHE_TTL`` seconds (default ``600``; ``0`` disables) keyed by
+    the normalized search parameters, so repeated queries cost no quota.
+    """
+    filters = {
+        "video_duration": video_duration,
+        "published_after": published_after,
+        "published_before": published_before,
+        "min_view_count": min_view_count,
+        "max_view_count": max_view_count,
+        "min_subscribers": min_subscribers,
+        "max_subscribers": max_subscribers,
+        "min_duration": min_duration,
+        "max_duration": max_duration,
+    }
+    ttl = float(os.getenv("YT_SEARCH_CACHE_TTL", "600"))
+    cache_key = json.dumps(
+        [" ".join(keyword.lower().split()), lang, max_results, filters], sort_keys=True
+    )
+    if ttl > 0:
+        cached = _search_cache_get(cache_key)
+        if cached is not None:
+            return [dict(item) for item in cached]
+
+    results = list(
+        islice(iter_search_videos(api_key, keyword, lang, **filters), max_results)
+    )
+    if ttl > 0:
+        _search_cache_set(cache_key, [dict(item) for item in results], ttl)
+    return results
+
+
+_CHANNEL_STATS: Dict[str, tuple] = {}
+_CHANNEL_STATS_LOCK = threading.Lock()
+_CHANNEL_STATS_COUNTERS = {"hits": 0, "misses": 0}
+_CHANNEL_STATS_LOADED_FROM: Optional[str] = None
+
+
+def _load_channel_stats(path: Optional[str]) -> None:
+    """Merge persisted channel statistics once per file (lock must be held)."""
+    global _CHANNEL_STATS_LOADED_FROM
+    if not path or _CHANNEL_STATS_LOADED_FROM == path:
+        return
+    _CHANNEL_STATS_LOADED_FROM = path
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            stored = json.load(fh)
+    except (OSError, ValueError):
+        return
+    for channel_id, (count, fetched_at) in stored.items():
+        if channel_id not in _CHANNEL_STATS or _CHANNEL_STATS[channel_id][1] < fetched_at:
+            _CHANNEL_STATS[channel_id] = (int(count), float(fetched_at))
+
+
+def _save_channel_stats(path: Optional[str]) -> None:
+    if not path:
+        return
+    with _CHANNEL_STATS_LOCK:
+        data = {cid: list(entry) for cid, entry in _CHANNEL_STATS.items()}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp_path, path)
+
+
+def _get_channel_subscribers(youtube, channel_ids: List[str]) -> tuple:
+    """Return ``(subscriber counts, channels.list requests made)``.
+
+    Counts are served from a process-wide cache and only channels that are
+    unknown or older than ``YT_CHANNEL_STATS_TTL`` seconds (default one day)
+    are fetched, 50 per request. Set ``YT_CHANNEL_STATS_FILE`` to persist the
+    cache across restarts.
+    """
+    ttl = float(os.getenv("YT_CHANNEL_STATS_TTL", str(24 * 3600)))
+    path = os.getenv("YT_CHANNEL_STATS_FILE") or None
+    now = time.time()
+    counts: Dict[str, int] = {}
+    stale: List[str] = []
+    with _CHANNEL_STATS_LOCK:
+        _load_channel_stats(path)
+        for channel_id in channel_ids:
+            entry = _CHANNEL_STATS.get(channel_id)
+            if entry is not None and now - entry[1] <= ttl:
+                counts[channel_id] = entry[0]
+            else:
+                stale.append(channel_id)
+        _CHANNEL_STATS_COUNTERS["hits"] += len(counts)
+        _CHANNEL_STATS_COUNTERS["misses"] += len(stale)
+
+    requests = 0
+    for i in range(0, len(stale), 50):
+        batch = stale[i : i + 50]  # noqa: E203
+        ch_resp = _execute(
+            youtube.channels().list(part="statistics", id=",".join(batch)),
+            "channels.list",
+        )
+        requests += 1
+        # Channels missing from the response (hidden or deleted) count as 0.
+        fetched = {channel_id: 0 for channel_id in batch}
+        for ch in ch_resp.get("items", []):
+            fetched[ch["id"]] = int(ch["statistics"].get("subscriberCount", 0))
+        counts.update(fetched)
+        with _CHANNEL_STATS_LOCK:
+            for channel_id, count in fetched.items():
+                _CHANNEL_STATS[channel_id] = (count, now)
+    if requests:
+        _save_channel_stats(path)
+    return counts, requests
+
+
+def channel_stats_cache_stats() -> dict:
+    """Return hit/miss counters and size of the channel statistics cache."""
+    with _CHANNEL_STATS_LOCK:
+        return {**_CHANNEL_STATS_COUNTERS, "entries": len(_CHANNEL_STATS)}
+
+
+def iter_search_videos(
+    api_key: str,
+    keyword: str,
+    lang: str,
+    *,
+    video_duration: str = "any",
+    published_after: Optional[str] = None,
+    published_before: Optional[str] = None,
+    min_view_count: int = 0,
+    max_view_count: Optional[int] = None,
+    min_subscribers: int = 0,
+    max_subscribers: Optional[int] = None,
+    min_duration: int = 0,
+    max_duration: Optional[int] = None,
+    max_pages: Optional[int] = None,
+    quota_budget: Optional[int] = None,
+) -> Iterator[dict]:
+    """Yield search results that pass the filters, fetching pages lazily.
+
+    Each page of 50 search hits is enriched with one batched ``videos.list``
+    call and cached channel statistics (see :func:`_get_channel_subscribers`),
+    filtered, and yielded before the
+    next page is requested via ``nextPageToken``. Paging stops when the
+    caller stops iterating, when results run out, after ``max_pages`` pages
+    (``YT_SEARCH_MAX_PAGES``, default ``5``) or before a page that would
+    exceed ``quota_budget`` units (``YT_SEARCH_QUOTA_BUDGET``, default ``520``).
     """
-    youtube = build("youtube", "v3", developerKey=api_key)
+    if max_pages is None:
+        max_pages = int(os.getenv("YT_SEARCH_MAX_PAGES", "5"))
+    if quota_budget is None:
+        quota_budget = int(os.getenv("YT_SEARCH_QUOTA_BUDGET", "520"))
+    youtube = _get_youtube_client(api_key)
 
     search_params: Dict[str, str] = {
         "part": "snippet",
@@ -142,85 +1086,75 @@ def search_videos(
     if published_before:
         search_params["publishedBefore"] = published_before
 
-    response = youtube.search().list(**search_params).execute()
+    spent = 0
+    page_cost = _YOUTUBE_QUOTA_COSTS["search.list"] + _YOUTUBE_QUOTA_COSTS["videos.list"]
+    page_token = None
+    for page in range(max_pages):
+        if page and spent + page_cost > quota_budget:
+            return
+        if page_token:
+            search_params["pageToken"] = page_token
+        response = _execute(youtube.search().list(**search_params), "search.list")
+        spent += _YOUTUBE_QUOTA_COSTS["search.list"]
+        page_token = response.get("nextPageToken")
 
-    video_ids = [item["id"]["videoId"] for item in response.get("items", [])]
-    if not video_ids:
-        return []
+        video_ids = [item["id"]["videoId"] for item in response.get("items", [])]
+        if not video_ids:
+            return
 
-    details = (
-        youtube.videos()
-        .list(
-            part="contentDetails,statistics,snippet",
-            id=",".join(video_ids),
+        details = _execute(
+            youtube.videos().list(
+                part="contentDetails,statistics,snippet",
+                id=",".join(video_ids),
+            ),
+            "videos.list",
         )
-        .execute()
-    )
+        spent += _YOUTUBE_QUOTA_COSTS["videos.list"]
 
-    channel_ids = list(
-        {item["snippet"]["channelId"] for item in details.get("items", [])}
-    )
-    channel_stats: Dict[str, int] = {}
-    for i in range(0, len(channel_ids), 50):
-        ch_resp = (
-            youtube.channels()
-            .list(
-                part="statistics",
-                id=",".join(channel_ids[i : i + 50]),  # noqa: E203
-            )
-            .execute()
+        channel_ids = list(
+            {item["snippet"]["channelId"] for item in details.get("items", [])}
         )
-        for ch in ch_resp.get("items", []):
-            count = int(ch["statistics"].get("subscriberCount", 0))
-            channel_stats[ch["id"]] = count
-
-    results = []
-    for item in details.get("items", []):
-        vid = item["id"]
-        title = item["snippet"]["title"]
-        url = f"https://youtu.be/{vid}"
-        stats = item.get("statistics", {})
-        views = int(stats.get("viewCount", 0))
-        channel_id = item["snippet"].get("channelId", "")
-        subs = channel_stats.get(channel_id, 0)
-        duration = _iso_duration_to_seconds(item["contentDetails"]["duration"])
-
-        if views < min_view_count:
-            continue
-        if max_view_count is not None and views > max_view_count:
-            continue
-        if subs < min_subscribers:
-            continue
-        if max_subscribers is not None and subs > max_subscribers:
-            continue
-        if duration < min_duration:
-            continue
-        if max_duration is not None and duration > max_duration:
-            continue
+        channel_stats, requests = _get_channel_subscribers(youtube, channel_ids)
+        spent += requests * _YOUTUBE_QUOTA_COSTS["channels.list"]
+
+        for item in details.get("items", []):
+            vid = item["id"]
+            title = item["snippet"]["title"]
+            url = f"https://youtu.be/{vid}"
+            stats = item.get("statistics", {})
+            views = int(stats.get("viewCount", 0))
+            channel_id = item["snippet"].get("channelId", "")
+            subs = channel_stats.get(channel_id, 0)
+            duration = _iso_duration_to_seconds(item["contentDetails"]["duration"])
+
+            if views < min_view_count:
+                continue
+            if max_view_count is not None and views > max_view_count:
+                continue
+            if subs < min_subscribers:
+                continue
+            if max_subscribers is not None and subs > max_subscribers:
+                continue
+            if duration < min_duration:
+                continue
+            if max_duration is not None and duration > max_duration:
+                continue
 
-        results.append(
-            {
+            yield {
                 "videoId": vid,
                 "title": title,
                 "url": url,
                 "viewCount": views,
                 "subscriberCount": subs,
             }
-        )
-        if len(results) >= max_results:
-            break
-
-    return results
 
+        if not page_token:
+            return
 
-def download_and_transcribe(video_id: str, *, out_dir: str = "downloads") -> str:
-    """Download audio from YouTube and transcribe with Whisper.
 
-    The model name is read from the ``WHISPER_MODEL`` environment variable
-    (default ``"tiny"``).
-    """
+def download_audio(video_id: str, *, out_dir: str = "downloads") -> str:
+    """Download the best audio stream of a video and return the file path."""
     os.makedirs(out_dir, exist_ok=True)
-    model_name = os.getenv("WHISPER_MODEL", "tiny")
     cookies = os.getenv("YTDLP_COOKIES")
     ydl_opts = {
         "outtmpl": os.path.join(out_dir, f"{video_id}.%(ext)s"),
@@ -230,26 +1164,96 @@ def download_and_transcribe(video_id: str, *, out_dir: str = "downloads") -> str
     # Use cookies for age-restricted or authenticated videos
     if cookies and os.path.exists(cookies):
         ydl_opts["cookiefile"] = cookies
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with _timed("download"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(f"https://youtu.be/{video_id}", download=True)
         file_path = ydl.prepare_filename(info)
+    if os.path.exists(file_path):
+        _inc("slower_download_bytes_total", os.path.getsize(file_path))
+    return file_path
 
-    backend = os.getenv("WHISPER_BACKEND", "openai").lower()
-    compute_type = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
-    use_cache = os.getenv("WHISPER_CACHE", "1") != "0"
-    model = _get_whisper_model(model_name)
-    try:
-        if backend == "faster":
-            segments, _info = model.transcribe(file_path)
-            result_text = "".join(seg.text for seg in segments)
-        else:
-            result = model.transcribe(file_path)
-            result_text = result["text"]
-    finally:
-        try:
-            os.remove(file_path)
-        except OSError:
+
+def join_segments(texts) -> str:
+    """Join transcript segment texts, one segment per line.
+
+    Keeping segment boundaries as line breaks lets :func:`_split_text` cut
+    long transcripts between segments rather than inside sentences.
+    """
+    return "\n".join(text.strip() for text in texts if text.strip())
+
+
+def transcribe_file(file_path: str) -> str:
+    """Transcribe a downloaded audio file with Whisper and delete it.
+
+    With ``WHISPER_VAD=1`` silent and non-speech stretches are removed first.
+    With ``WHISPER_PARALLEL`` set above ``1``, audio longer than
+    ``WHISPER_PARALLEL_MIN_SECONDS`` (default ``600``) is split at quiet
+    points and the pieces are transcribed on that many worker processes.
+    The length is read with ffprobe, so shorter files are decoded only once,
+    by Whisper; if ffprobe fails, the decoded audio is reused instead.
+    """
+    try:
+        workers = int(os.getenv("WHISPER_PARALLEL", "0"))
+        audio = None
+        if workers > 1 and os.getenv("_WHISPER_WORKER") != "1":
+            min_seconds = float(os.getenv("WHISPER_PARALLEL_MIN_SECONDS", "600"))
+            duration = _audio_duration(file_path)
+            if duration is None or duration >= min_seconds:
+                audio = _load_audio(file_path)
+            if audio is not None and len(audio) >= min_seconds * _SAMPLE_RATE:
+                start = time.perf_counter()
+                segments = _transcribe_parallel(audio, workers)
+                _record_transcription(
+                    time.perf_counter() - start,
+                    len(audio) / _SAMPLE_RATE,
+                    os.getenv("WHISPER_BACKEND", "openai").lower(),
+                )
+                return join_segments(seg["text"] for seg in segments)
+        return _transcribe_path(file_path, audio=audio)
+    finally:
+        try:
+            os.remove(file_path)
+        except OSError:
             pass
+
+
+def _transcribe_path(file_path: str, *, audio=None) -> str:
+    """Transcribe an audio file with the model of the current process.
+
+    ``audio`` is the file already decoded by :func:`_load_audio`, if any.
+    """
+    model_name = os.getenv("WHISPER_MODEL", "tiny")
+    backend = os.getenv("WHISPER_BACKEND", "openai").lower()
+    compute_type = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+    use_cache = os.getenv("WHISPER_CACHE", "1") != "0"
+    model = _get_whisper_model(model_name)
+    try:
+        if _vad_enabled():
+            if audio is None:
+                audio = _load_audio(file_path)
+            segments = _transcribe_audio(model, audio, backend)
+            result_text = join_segments(seg["text"] for seg in segments)
+        else:
+            start = time.perf_counter()
+            try:
+                source = file_path if audio is None else audio
+                if backend == "faster":
+                    segments, info = model.transcribe(source)
+                    result_text = join_segments(seg.text for seg in segments)
+                    audio_seconds = getattr(info, "duration", 0.0) or 0.0
+                else:
+                    result = model.transcribe(source)
+                    result_segments = result.get("segments") or []
+                    result_text = (
+                        join_segments(seg["text"] for seg in result_segments)
+                        if result_segments
+                        else result["text"].strip()
+                    )
+                    audio_seconds = result_segments[-1]["end"] if result_segments else 0.0
+            except Exception:
+                _inc("slower_stage_errors_total", stage="whisper_transcribe")
+                raise
+            _record_transcription(time.perf_counter() - start, audio_seconds, backend)
+    finally:
         if not use_cache:
             cache_key = (
                 f"{backend}:{compute_type}:{model_name}"
@@ -258,32 +1262,1118 @@ def download_and_transcribe(video_id: str, *, out_dir: str = "downloads") -> str
             )
             with _MODEL_CACHE_LOCK:
                 _MODEL_CACHE.pop(cache_key, None)
+                _MODEL_SIZES.pop(cache_key, None)
             del model
             gc.collect()
     return result_text
 
 
+_SAMPLE_RATE = 16000
+
+
+def _segments_from_result(result, backend: str, *, offset: float = 0.0) -> List[dict]:
+    """Normalize Whisper output to ``{"start", "end", "text"}`` dictionaries."""
+    if backend == "faster":
+        segments, _info = result
+        items = ((seg.start, seg.end, seg.text) for seg in segments)
+    else:
+        items = ((seg["start"], seg["end"], seg["text"]) for seg in result.get("segments", []))
+    return [
+        {"start": start + offset, "end": end + offset, "text": text}
+        for start, end, text in items
+    ]
+
+
+def _audio_duration(file_path: str) -> Optional[float]:
+    """Return the duration of a media file in seconds from ffprobe, or ``None``."""
+    cmd = [
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", file_path,
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, check=True)
+        return float(proc.stdout.decode("utf-8").strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def _load_audio(file_path: str):
+    """Decode an audio file to a 16 kHz mono float32 array with ffmpeg."""
+    import numpy as np
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-i", file_path,
+        "-f", "s16le", "-ac", "1", "-ar", str(_SAMPLE_RATE), "-",
+    ]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {proc.stderr.decode('utf-8', 'replace').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+_VAD_STATS = {"runs": 0, "audio_seconds": 0.0, "speech_seconds": 0.0}
+_VAD_STATS_LOCK = threading.Lock()
+
+
+def _vad_enabled() -> bool:
+    return os.getenv("WHISPER_VAD", "0") == "1"
+
+
+def _speech_timestamps(audio) -> List[tuple]:
+    """Return ``(start, end)`` sample ranges that contain speech.
+
+    Uses the Silero VAD bundled with ``faster-whisper`` for either backend.
+    Tunable with ``WHISPER_VAD_THRESHOLD`` (speech probability, default
+    ``0.5``), ``WHISPER_VAD_MIN_SILENCE_MS`` (default ``1000``) and
+    ``WHISPER_VAD_PAD_MS`` (default ``200``).
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    options = VadOptions(
+        threshold=float(os.getenv("WHISPER_VAD_THRESHOLD", "0.5")),
+        min_silence_duration_ms=int(os.getenv("WHISPER_VAD_MIN_SILENCE_MS", "1000")),
+        speech_pad_ms=int(os.getenv("WHISPER_VAD_PAD_MS", "200")),
+    )
+    return [(ts["start"], ts["end"]) for ts in get_speech_timestamps(audio, options)]
+
+
+def _remove_silence(audio):
+    """Return ``(speech_audio, spans)`` keeping only the detected speech.
+
+    ``spans`` lists the kept ``(start, end)`` sample ranges so timestamps can
+    be mapped back to the original audio with :func:`_restore_vad_time`.
+    """
+    import numpy as np
+
+    spans = _speech_timestamps(audio)
+    speech = (
+        np.concatenate([audio[start:end] for start, end in spans])
+        if spans
+        else audio[:0]
+    )
+    with _VAD_STATS_LOCK:
+        _VAD_STATS["runs"] += 1
+        _VAD_STATS["audio_seconds"] += len(audio) / _SAMPLE_RATE
+        _VAD_STATS["speech_seconds"] += len(speech) / _SAMPLE_RATE
+    return speech, spans
+
+
+def _restore_vad_time(seconds: float, spans: List[tuple]) -> float:
+    """Map a time in speech-only audio back to the original timeline."""
+    position = seconds * _SAMPLE_RATE
+    for start, end in spans:
+        if position <= end - start:
+            return (start + position) / _SAMPLE_RATE
+        position -= end - start
+    return spans[-1][1] / _SAMPLE_RATE if spans else seconds
+
+
+def vad_stats() -> dict:
+    """Return how much audio the VAD stage has seen and skipped."""
+    with _VAD_STATS_LOCK:
+        stats = dict(_VAD_STATS)
+    stats["skipped_seconds"] = stats["audio_seconds"] - stats["speech_seconds"]
+    return stats
+
+
+def _transcribe_audio(model, audio, backend: str, *, offset: float = 0.0) -> List[dict]:
+    """Transcribe a 16 kHz float32 array into segment dictionaries.
+
+    With ``WHISPER_VAD=1`` only speech regions are passed to the model and
+    segment timestamps are mapped back to the original audio.
+    """
+    spans = None
+    audio_seconds = len(audio) / _SAMPLE_RATE
+    if _vad_enabled():
+        audio, spans = _remove_silence(audio)
+        if not len(audio):
+            return []
+    start = time.perf_counter()
+    try:
+        segments = _segments_from_result(model.transcribe(audio), backend)
+    except Exception:
+        _inc("slower_stage_errors_total", stage="whisper_transcribe")
+        raise
+    _record_transcription(time.perf_counter() - start, audio_seconds, backend)
+    for seg in segments:
+        if spans is not None:
+            seg["start"] = _restore_vad_time(seg["start"], spans)
+            seg["end"] = _restore_vad_time(seg["end"], spans)
+        seg["start"] += offset
+        seg["end"] += offset
+    return segments
+
+
+def _open_audio_stream(video_id: str) -> subprocess.Popen:
+    """Start ffmpeg decoding a video's audio stream to 16 kHz mono PCM.
+
+    yt-dlp only resolves the stream URL; ffmpeg fetches and decodes it and
+    writes signed 16-bit samples to its stdout.
+    """
+    cookies = os.getenv("YTDLP_COOKIES")
+    ydl_opts = {"format": "bestaudio/best", "quiet": True}
+    if cookies and os.path.exists(cookies):
+        ydl_opts["cookiefile"] = cookies
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(f"https://youtu.be/{video_id}", download=False)
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    headers = info.get("http_headers") or {}
+    if headers:
+        cmd += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    cmd += ["-i", info["url"], "-f", "s16le", "-ac", "1", "-ar", str(_SAMPLE_RATE), "-"]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _iter_pcm_windows(stream, window_seconds: float, *, max_buffered: int = 16):
+    """Yield float32 audio windows read from a PCM pipe by a background thread.
+
+    The reader keeps draining the pipe while the caller transcribes, so the
+    download is not throttled by Whisper until ``max_buffered`` windows are
+    waiting.
+    """
+    import numpy as np
+
+    window_bytes = int(window_seconds * _SAMPLE_RATE) * 2
+    windows: "queue.Queue" = queue.Queue(maxsize=max_buffered)
+
+    def reader():
+        try:
+            buffer = b""
+            while True:
+                data = stream.read(window_bytes - len(buffer))
+                if not data:
+                    break
+                buffer += data
+                if len(buffer) >= window_bytes:
+                    windows.put(buffer)
+                    buffer = b""
+            if buffer:
+                windows.put(buffer)
+        finally:
+            windows.put(None)
+
+    thread = threading.Thread(target=reader, name="pcm-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            buffer = windows.get()
+            if buffer is None:
+                break
+            usable = len(buffer) - len(buffer) % 2
+            yield np.frombuffer(buffer[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+    finally:
+        # Unblock the reader if the consumer stopped early.
+        while thread.is_alive():
+            try:
+                windows.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def iter_stream_segments(video_id: str) -> Iterator[dict]:
+    """Yield transcript segments of a video while it downloads.
+
+    Audio is decoded by ffmpeg and transcribed in windows of
+    ``WHISPER_STREAM_WINDOW`` seconds (default ``30``) as soon as each
+    window has arrived. Segments carry ``start``/``end`` times in seconds
+    from the beginning of the video.
+    """
+    model_name = os.getenv("WHISPER_MODEL", "tiny")
+    backend = os.getenv("WHISPER_BACKEND", "openai").lower()
+    use_cache = os.getenv("WHISPER_CACHE", "1") != "0"
+    window_seconds = float(os.getenv("WHISPER_STREAM_WINDOW", "30"))
+    model = _get_whisper_model(model_name)
+    proc = _open_audio_stream(video_id)
+    windows = _iter_pcm_windows(proc.stdout, window_seconds)
+    offset = 0.0
+    try:
+        for audio in windows:
+            yield from _transcribe_audio(model, audio, backend, offset=offset)
+            offset += len(audio) / _SAMPLE_RATE
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        windows.close()
+        proc.wait()
+        stderr = proc.stderr.read().decode("utf-8", "replace") if proc.stderr else ""
+        if not use_cache:
+            del model
+            gc.collect()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.strip()}")
+
+
+def stream_transcribe(video_id: str) -> str:
+    """Transcribe a video while it downloads, without an intermediate file."""
+    return join_segments(seg["text"] for seg in iter_stream_segments(video_id))
+
+
+def iter_file_segments(file_path: str) -> Iterator[dict]:
+    """Yield transcript segments of an audio file as they are decoded, then delete it.
+
+    The ``faster`` backend decodes lazily, so each segment is yielded as soon
+    as Whisper produces it. Otherwise (or with ``WHISPER_VAD=1``) the file is
+    transcribed in pieces of at most ``WHISPER_STREAM_WINDOW`` seconds, cut
+    at quiet points so words are not split between them.
+    """
+    backend = os.getenv("WHISPER_BACKEND", "openai").lower()
+    model = _get_whisper_model(os.getenv("WHISPER_MODEL", "tiny"))
+    try:
+        if backend == "faster" and not _vad_enabled():
+            start = time.perf_counter()
+            segments, info = model.transcribe(file_path)
+            for seg in segments:
+                yield {"start": seg.start, "end": seg.end, "text": seg.text}
+            # Includes time the consumer spent between segments.
+            _record_transcription(
+                time.perf_counter() - start, getattr(info, "duration", 0.0) or 0.0, backend
+            )
+            return
+        audio = _load_audio(file_path)
+        window = int(float(os.getenv("WHISPER_STREAM_WINDOW", "30")) * _SAMPLE_RATE)
+        bounds = _quiet_bounds(audio, window)
+        for start, end in zip(bounds, bounds[1:]):
+            if end > start:
+                yield from _transcribe_audio(
+                    model, audio[start:end], backend, offset=start / _SAMPLE_RATE
+                )
+    finally:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+
+def iter_transcript_segments(video_id: str, *, out_dir: str = "downloads") -> Iterator[dict]:
+    """Yield ``{"start", "end", "text"}`` segments of a video incrementally.
+
+    Uses the same transcript store as :func:`download_and_transcribe`: a cached
+    transcript is yielded as a single segment, and a freshly decoded one is
+    stored once the last segment has been produced.
+    """
+    cache = _transcript_cache()
+    transcript_key = _transcript_cache_key(video_id)
+    if cache is not None:
+        cached = cache.get(transcript_key)
+        if cached is not None:
+            yield {"start": 0.0, "end": 0.0, "text": cached.decode("utf-8")}
+            return
+
+    if os.getenv("WHISPER_STREAM", "0") == "1":
+        segments = iter_stream_segments(video_id)
+    else:
+        segments = iter_file_segments(download_audio(video_id, out_dir=out_dir))
+    texts = []
+    try:
+        for seg in segments:
+            texts.append(seg["text"])
+            yield seg
+    finally:
+        # Stop ffmpeg and remove the download if the client goes away.
+        segments.close()
+    if cache is not None:
+        cache.set(transcript_key, join_segments(texts).encode("utf-8"))
+
+
+def download_and_transcribe(video_id: str, *, out_dir: str = "downloads") -> str:
+    """Download audio from YouTube and transcribe with Whisper.
+
+    The model name is read from the ``WHISPER_MODEL`` environment variable
+    (default ``"tiny"``). Transcripts are kept in a persistent store keyed by
+    video ID and Whisper configuration (see ``TRANSCRIPT_CACHE_*``), so repeat
+    requests skip both the download and the transcription. With
+    ``WHISPER_STREAM=1`` the audio is transcribed while it downloads (see
+    :func:`stream_transcribe`).
+    """
+    cache = _transcript_cache()
+    transcript_key = _transcript_cache_key(video_id)
+    if cache is not None:
+        cached = cache.get(transcript_key)
+        if cached is not None:
+            return cached.decode("utf-8")
+
+    if os.getenv("WHISPER_STREAM", "0") == "1":
+        result_text = stream_transcribe(video_id)
+    else:
+        file_path = download_audio(video_id, out_dir=out_dir)
+        result_text = transcribe_file(file_path)
+    if cache is not None:
+        cache.set(transcript_key, result_text.encode("utf-8"))
+    return result_text
+
+
+_TRANSCRIBE_POOLS: Dict[tuple, ProcessPoolExecutor] = {}
+_TRANSCRIBE_POOL_LOCK = threading.Lock()
+
+
+def _init_transcribe_worker(threads: int) -> None:
+    """Mark the process as a worker and cap its inference threads."""
+    os.environ["_WHISPER_WORKER"] = "1"
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["WHISPER_CPU_THREADS"] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _get_transcribe_pool(workers: int) -> ProcessPoolExecutor:
+    """Return a persistent process pool so worker models stay loaded.
+
+    Workers are started with ``spawn`` because the web process already runs
+    threads, which makes ``fork`` unsafe. Each worker keeps its own model
+    cache and uses ``WHISPER_THREADS_PER_WORKER`` inference threads (default:
+    the CPU count divided by ``workers``). One pool is kept per
+    ``(workers, threads)`` pair, so ``WHISPER_WORKERS`` and
+    ``WHISPER_PARALLEL`` with different values do not replace each other's
+    pool and reload its models.
+    """
+    threads = int(os.getenv("WHISPER_THREADS_PER_WORKER", "0")) or max(
+        1, (os.cpu_count() or 1) // workers
+    )
+    with _TRANSCRIBE_POOL_LOCK:
+        pool = _TRANSCRIBE_POOLS.get((workers, threads))
+        if pool is None:
+            pool = _TRANSCRIBE_POOLS[(workers, threads)] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_transcribe_worker,
+                initargs=(threads,),
+            )
+        return pool
+
+
+def _find_split_points(audio, parts: int, *, search_seconds: float = 10.0) -> List[int]:
+    """Return sample indices that cut ``audio`` into ``parts`` similar pieces.
+
+    Each cut is placed at the quietest 100 ms frame within ``search_seconds``
+    of the evenly spaced target, so words are rarely split.
+    """
+    import numpy as np
+
+    frame = _SAMPLE_RATE // 10
+    radius = int(search_seconds * _SAMPLE_RATE)
+    total = len(audio)
+    points: List[int] = []
+    for k in range(1, parts):
+        target = total * k // parts
+        lo = max(target - radius, points[-1] + frame if points else frame)
+        hi = min(target + radius, total - frame)
+        usable = (hi - lo) // frame * frame
+        if usable <= 0:
+            points.append(target)
+            continue
+        energy = np.square(audio[lo : lo + usable]).reshape(-1, frame).mean(axis=1)  # noqa: E203
+        points.append(lo + int(np.argmin(energy)) * frame + frame // 2)
+    return points
+
+
+def _transcribe_chunk(audio, offset: float) -> List[dict]:
+    """Transcribe one slice of a longer recording inside a pool worker."""
+    backend = os.getenv("WHISPER_BACKEND", "openai").lower()
+    model = _get_whisper_model(os.getenv("WHISPER_MODEL", "tiny"))
+    return _transcribe_audio(model, audio, backend, offset=offset)
+
+
+def _transcribe_parallel(audio, workers: int) -> List[dict]:
+    """Transcribe ``audio`` in ``workers`` slices and stitch the segments in order."""
+    bounds = [0, *_find_split_points(audio, workers), len(audio)]
+    pool = _get_transcribe_pool(workers)
+    futures = [
+        pool.submit(_transcribe_chunk, audio[start:end], start / _SAMPLE_RATE)
+        for start, end in zip(bounds, bounds[1:])
+    ]
+    segments: List[dict] = []
+    for future in futures:
+        segments.extend(future.result())
+    return segments
+
+
+def _quiet_bounds(audio, window: int, *, search_seconds: float = 3.0) -> List[int]:
+    """Return ``[0, ..., len(audio)]`` cutting ``audio`` into pieces of at most ``window``.
+
+    Cuts are placed at quiet points (see :func:`_find_split_points`) within
+    ``search_seconds`` (at most a quarter of the window) of evenly spaced
+    targets, so pieces stay inside the window and rarely split a word.
+    """
+    radius = min(int(search_seconds * _SAMPLE_RATE), window // 4)
+    parts = -(-len(audio) // (window - 2 * radius))
+    cuts = (
+        _find_split_points(audio, parts, search_seconds=radius / _SAMPLE_RATE)
+        if parts > 1
+        else []
+    )
+    return [0, *cuts, len(audio)]
+
+
+def _batch_clips(audio) -> List[dict]:
+    """Return ``clip_timestamps`` (in samples) covering one file of a batch.
+
+    With ``WHISPER_VAD=1`` only speech spans are kept. Spans longer than the
+    30 second Whisper window are cut at quiet points (see
+    :func:`_find_split_points`) rather than at fixed offsets, so clips rarely
+    split a word.
+    """
+    window = 30 * _SAMPLE_RATE
+    if _vad_enabled():
+        spans = _speech_timestamps(audio)
+        with _VAD_STATS_LOCK:
+            _VAD_STATS["runs"] += 1
+            _VAD_STATS["audio_seconds"] += len(audio) / _SAMPLE_RATE
+            _VAD_STATS["speech_seconds"] += sum(e - s for s, e in spans) / _SAMPLE_RATE
+    else:
+        spans = [(0, len(audio))] if len(audio) else []
+    clips = []
+    for span_start, span_end in spans:
+        bounds = [span_start + cut for cut in _quiet_bounds(audio[span_start:span_end], window)]
+        clips.extend({"start": lo, "end": hi} for lo, hi in zip(bounds, bounds[1:]) if hi > lo)
+    return clips
+
+
+def _detect_language(model, audio, clip: dict) -> str:
+    """Return the language faster-whisper detects in one clip of a file."""
+    language, _probability, _all = model.detect_language(audio[clip["start"] : clip["end"]])  # noqa: E203
+    return language
+
+
+def transcribe_files(file_paths: List[str], *, return_exceptions: bool = False) -> List:
+    """Transcribe several audio files in one batched pass and delete them.
+
+    With the ``faster`` backend the files are decoded and cut into clips of
+    at most 30 seconds, and the language of each file is detected from its
+    first clip. Files of the same language are concatenated and their clips
+    decoded together by faster-whisper's ``BatchedInferencePipeline`` in
+    batches of ``WHISPER_BATCH_SIZE`` (default ``8``), so many short videos
+    share each inference batch without one file's language being applied to
+    the others. Other backends transcribe the files one after another.
+
+    Returns the transcripts in input order. With ``return_exceptions`` a file
+    that cannot be decoded yields its exception instead of failing the batch.
+    """
+    backend = os.getenv("WHISPER_BACKEND", "openai").lower()
+    if backend != "faster":
+        results: List = []
+        for path in file_paths:
+            try:
+                results.append(transcribe_file(path))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    import numpy as np
+    from faster_whisper import BatchedInferencePipeline
+
+    results = [""] * len(file_paths)
+    decoded = []
+    try:
+        for idx, path in enumerate(file_paths):
+            try:
+                audio = _load_audio(path)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results[idx] = e
+                continue
+            clips = _batch_clips(audio)
+            if clips:
+                decoded.append((idx, audio, clips))
+    finally:
+        for path in file_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    if not decoded:
+        return results
+
+    model = _get_whisper_model(os.getenv("WHISPER_MODEL", "tiny"))
+    batched = BatchedInferencePipeline(model=model)
+    start = time.perf_counter()
+    total = 0
+    try:
+        groups: Dict[str, list] = {}
+        for idx, audio, clips in decoded:
+            groups.setdefault(_detect_language(model, audio, clips[0]), []).append(
+                (idx, audio, clips)
+            )
+        for language, members in groups.items():
+            audios, clips, starts, owners = [], [], [], []
+            position = 0
+            for idx, audio, file_clips in members:
+                audios.append(audio)
+                clips.extend(
+                    {"start": clip["start"] + position, "end": clip["end"] + position}
+                    for clip in file_clips
+                )
+                starts.append(position / _SAMPLE_RATE)
+                owners.append(idx)
+                position += len(audio)
+            segments, _info = batched.transcribe(
+                np.concatenate(audios),
+                language=language,
+                clip_timestamps=clips,
+                batch_size=int(os.getenv("WHISPER_BATCH_SIZE", "8")),
+            )
+            texts: Dict[int, List[str]] = {idx: [] for idx in owners}
+            for seg in segments:
+                # Clips of neighbouring files may share a window; attribute by start.
+                pos = max(0, bisect.bisect_right(starts, seg.start) - 1)
+                texts[owners[pos]].append(seg.text)
+            for idx, parts in texts.items():
+                results[idx] = join_segments(parts)
+            total += position
+    except Exception:
+        _inc("slower_stage_errors_total", stage="whisper_transcribe")
+        raise
+    _record_transcription(time.perf_counter() - start, total / _SAMPLE_RATE, backend)
+    return results
+
+
+def transcribe_videos(
+    video_ids: List[str],
+    *,
+    out_dir: str = "downloads",
+    download_workers: Optional[int] = None,
+    transcribe_workers: Optional[int] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> List[dict]:
+    """Download and transcribe several videos as a staged pipeline.
+
+    Downloads run on ``download_workers`` threads (``YTDLP_WORKERS``, default
+    ``2``) and each finished file is handed straight to the transcription
+    stage, so later downloads overlap with Whisper on earlier videos.
+    Transcription runs on ``transcribe_workers`` processes (``WHISPER_WORKERS``,
+    default ``1``; a single worker runs in-process and shares the model cache).
+
+    With ``WHISPER_BATCH_FILES`` above ``1``, finished downloads are grouped
+    and each group is transcribed with :func:`transcribe_files`.
+
+    Returns one dictionary per input video, in input order, with ``videoId``,
+    ``transcript`` and ``error``. A failed video does not stop the others.
+    ``on_result`` is called with each dictionary as soon as that video is done.
+    """
+    if download_workers is None:
+        download_workers = int(os.getenv("YTDLP_WORKERS", "2"))
+    if transcribe_workers is None:
+        transcribe_workers = int(os.getenv("WHISPER_WORKERS", "1"))
+    batch_files = int(os.getenv("WHISPER_BATCH_FILES", "1"))
+    results = [{"videoId": vid, "transcript": None, "error": None} for vid in video_ids]
+
+    def finish(idx: int, *, transcript: Optional[str] = None, error: Optional[str] = None):
+        results[idx]["transcript"] = transcript
+        results[idx]["error"] = error
+        if on_result is not None:
+            on_result(results[idx])
+
+    cache = _transcript_cache()
+    pending = []
+    for idx, vid in enumerate(video_ids):
+        cached = cache.get(_transcript_cache_key(vid)) if cache is not None else None
+        if cached is not None:
+            finish(idx, transcript=cached.decode("utf-8"))
+        else:
+            pending.append(idx)
+    if not pending:
+        return results
+
+    if transcribe_workers > 1:
+        transcribe_pool = _get_transcribe_pool(transcribe_workers)
+        local_pool = None
+    else:
+        transcribe_pool = local_pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, download_workers)) as download_pool:
+            downloads = {
+                download_pool.submit(
+                    download_audio, video_ids[idx], out_dir=out_dir
+                ): idx
+                for idx in pending
+            }
+            transcriptions = {}
+            group: List[tuple] = []
+
+            def submit_group():
+                indices = [idx for idx, _path in group]
+                paths = [path for _idx, path in group]
+                if batch_files > 1:
+                    future = transcribe_pool.submit(
+                        transcribe_files, paths, return_exceptions=True
+                    )
+                else:
+                    future = transcribe_pool.submit(transcribe_file, paths[0])
+                transcriptions[future] = indices
+                group.clear()
+
+            for future in as_completed(downloads):
+                idx = downloads[future]
+                try:
+                    file_path = future.result()
+                except Exception as e:
+                    finish(idx, error=str(e))
+                    continue
+                group.append((idx, file_path))
+                if len(group) >= batch_files:
+                    submit_group()
+            if group:
+                submit_group()
+        for future in as_completed(transcriptions):
+            indices = transcriptions[future]
+            try:
+                texts = future.result()
+            except Exception as e:
+                for idx in indices:
+                    finish(idx, error=str(e))
+                continue
+            if batch_files <= 1:
+                texts = [texts]
+            for idx, text in zip(indices, texts):
+                if isinstance(text, Exception):
+                    finish(idx, error=str(text))
+                    continue
+                if cache is not None:
+                    cache.set(_transcript_cache_key(video_ids[idx]), text.encode("utf-8"))
+                finish(idx, transcript=text)
+    finally:
+        if local_pool is not None:
+            local_pool.shutdown()
+    return results
+
+
+def _gemini_cache():
+    """Return the Gemini response cache selected by ``GEMINI_CACHE``.
+
+    ``"disk"`` (default) stores responses under ``GEMINI_CACHE_DIR`` with a
+    ``GEMINI_CACHE_MAX_MB`` budget, ``"django"`` uses the Django cache alias
+    ``GEMINI_CACHE_ALIAS`` and ``"0"`` disables caching. Entries expire after
+    ``GEMINI_CACHE_TTL`` seconds (default one week).
+    """
+    backend = os.getenv("GEMINI_CACHE", "disk").lower()
+    if backend in {"0", "none", "off"}:
+        return None
+    ttl = float(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600)))
+    if backend == "django":
+        return _get_django_cache(
+            "gemini", os.getenv("GEMINI_CACHE_ALIAS", "default"), ttl=ttl
+        )
+    directory = os.getenv("GEMINI_CACHE_DIR", os.path.join("cache", "gemini"))
+    max_mb = float(os.getenv("GEMINI_CACHE_MAX_MB", "50"))
+    return _get_disk_cache(
+        "gemini", directory, max_bytes=int(max_mb * 1024 * 1024), ttl=ttl
+    )
+
+
+def _generate_content(model, model_name: str, prompt: str, *, lang: str) -> str:
+    """Return ``model.generate_content(prompt).text``, cached by content hash."""
+    cache = _gemini_cache()
+    key = json.dumps([model_name, prompt, lang], ensure_ascii=False)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached.decode("utf-8")
+    with _timed("gemini", model=model_name):
+        text = model.generate_content(prompt).text
+    _inc("slower_gemini_characters_total", len(prompt), direction="prompt")
+    _inc("slower_gemini_characters_total", len(text), direction="response")
+    if cache is not None:
+        cache.set(key, text.encode("utf-8"))
+    return text
+
+
+def gemini_cache_stats() -> dict:
+    """Return hit/miss counters of the Gemini response cache."""
+    cache = _gemini_cache()
+    return cache.stats() if cache is not None else {}
+
+
+_SENTENCE_END_RE = re.compile(r"(?<=[。．！？!?.])\s*")
+
+
+def _split_text(
+    text: str,
+    max_size: int,
+    *,
+    size: Callable[[str], int] = len,
+    break_after: Optional[Callable[[str], bool]] = None,
+) -> List[str]:
+    """Split text into chunks whose ``size`` is at most ``max_size``.
+
+    Lines (transcript segments or speaker turns) are packed together first; a
+    line that is too long on its own is split at sentence ends, and a
+    sentence that is still too long is cut at the limit. ``break_after`` may
+    force a chunk to end after a given unit.
+    """
+
+    def cut_point(value: str) -> int:
+        lo, hi = 1, len(value)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if size(value[:mid]) <= max_size:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def units():
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if size(line) <= max_size:
+                yield line
+                continue
+            for sentence in _SENTENCE_END_RE.split(line):
+                while size(sentence) > max_size:
+                    cut = cut_point(sentence)
+                    yield sentence[:cut]
+                    sentence = sentence[cut:]
+                if sentence:
+                    yield sentence
+
+    chunks: List[str] = []
+    current = ""
+    for unit in units():
+        candidate = f"{current}\n{unit}" if current else unit
+        if size(candidate) <= max_size:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = unit
+        if break_after is not None and break_after(unit):
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 def summarize_with_gemini(api_key: str, text: str, *, lang: str = "ja") -> str:
-    """Summarize transcript in the specified language using Gemini."""
-    genai.configure(api_key=api_key)
+    """Summarize transcript in the specified language using Gemini.
+
+    Transcripts longer than ``GEMINI_CHUNK_CHARS`` characters (default
+    ``20000``; ``0`` disables chunking) are summarized map-reduce style: the
+    text is split on segment boundaries, the chunks are summarized
+    concurrently (``GEMINI_CONCURRENCY`` requests at a time, default ``4``),
+    and one final pass merges the partial summaries.
+    """
     model_name = os.getenv("GEMINI_MODEL", "models/gemini-pro")
-    model = genai.GenerativeModel(model_name)
-    prompt = f"次の内容を{lang}でゆっくり解説してください:\n{text}"
-    response = model.generate_content(prompt)
-    return response.text
+    model = _get_gemini_model(api_key, model_name)
+    chunk_chars = int(os.getenv("GEMINI_CHUNK_CHARS", "20000"))
+    if chunk_chars <= 0 or len(text) <= chunk_chars:
+        prompt = f"次の内容を{lang}でゆっくり解説してください:\n{text}"
+        return _generate_content(model, model_name, prompt, lang=lang)
+
+    chunks = _split_text(text, chunk_chars)
+    concurrency = max(1, int(os.getenv("GEMINI_CONCURRENCY", "4")))
+
+    def summarize_chunk(item) -> str:
+        index, chunk = item
+        prompt = (
+            f"次の内容は長い文字起こしの一部 ({index}/{len(chunks)}) です。"
+            f"重要な点を{lang}で簡潔に要約してください:\n{chunk}"
+        )
+        return _generate_content(model, model_name, prompt, lang=lang)
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+        partials = list(pool.map(summarize_chunk, enumerate(chunks, start=1)))
+    prompt = (
+        f"次の部分要約を統合し、全体の内容を{lang}でゆっくり解説してください:\n"
+        + "\n\n".join(partials)
+    )
+    return _generate_content(model, model_name, prompt, lang=lang)
 
 
 def generate_discussion_script(api_key: str, summary: str, *, lang: str = "ja") -> str:
     """Create a two-person discussion script from summary using Gemini."""
-    genai.configure(api_key=api_key)
     model_name = os.getenv("GEMINI_MODEL", "models/gemini-pro")
-    model = genai.GenerativeModel(model_name)
+    model = _get_gemini_model(api_key, model_name)
     prompt = (
         f"以下の要約をもとに、登場人物AとBが交互に解説する台本を{lang}で書いてください。\n"
         f"{summary}"
     )
-    response = model.generate_content(prompt)
-    return response.text
+    return _generate_content(model, model_name, prompt, lang=lang)
+
+
+_TTS_DEFAULT_VOICES = {
+    "ja-JP": "ja-JP-Neural2-B",
+    "en-US": "en-US-Neural2-J",
+    "es-ES": "es-ES-Neural2-B",
+}
+
+
+def _split_tts_text(text: str, max_bytes: int, *, avg_lines: int = 0) -> List[str]:
+    """Split a script into chunks of at most ``max_bytes`` UTF-8 bytes.
+
+    With ``avg_lines`` set, chunks also end after lines whose hash is a
+    multiple of ``avg_lines``. Boundaries then depend only on nearby content,
+    so editing one line changes one chunk and the rest stay cacheable.
+    """
+
+    def break_after(unit: str) -> bool:
+        digest = hashlib.sha1(unit.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") % avg_lines == 0
+
+    return _split_text(
+        text,
+        max_bytes,
+        size=lambda value: len(value.encode("utf-8")),
+        break_after=break_after if avg_lines > 0 else None,
+    )
+
+
+def _tts_cache() -> Optional[_DiskCache]:
+    """Return the per-chunk audio cache or ``None`` when ``TTS_CACHE=0``."""
+    if os.getenv("TTS_CACHE", "1") == "0":
+        return None
+    directory = os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts"))
+    max_mb = float(os.getenv("TTS_CACHE_MAX_MB", "200"))
+    return _get_disk_cache("tts", directory, max_bytes=int(max_mb * 1024 * 1024))
+
+
+def tts_cache_stats() -> dict:
+    """Return hit/miss/eviction counters and size of the TTS audio cache."""
+    cache = _tts_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def _strip_id3(data: bytes) -> bytes:
+    """Remove a leading ID3v2 tag so MP3 frame streams can be concatenated."""
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        return data[10 + size + footer :]  # noqa: E203
+    return data
+
+
+def _concat_mp3(parts: List[bytes]) -> bytes:
+    """Concatenate MP3 chunks in order, keeping only the first ID3 tag."""
+    if not parts:
+        return b""
+    return parts[0] + b"".join(_strip_id3(part) for part in parts[1:])
+
+
+class _RateLimiter:
+    """Space calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_TTS_LIMITER: Optional[_RateLimiter] = None
+_TTS_LIMITER_LOCK = threading.Lock()
+
+
+def _get_tts_limiter() -> _RateLimiter:
+    """Return the process-wide limiter for ``TTS_RATE_LIMIT`` requests/second."""
+    global _TTS_LIMITER
+    rate = float(os.getenv("TTS_RATE_LIMIT", "10"))
+    with _TTS_LIMITER_LOCK:
+        if _TTS_LIMITER is None or _TTS_LIMITER.rate != rate:
+            _TTS_LIMITER = _RateLimiter(rate)
+        return _TTS_LIMITER
+
+
+def _synthesize_chunks(
+    chunks: List[tuple], *, language_code: str, speaking_rate: float
+) -> bytes:
+    """Synthesize ``(text, voice_name)`` chunks and join their MP3 frames in order.
+
+    Cached chunks are reused; the rest are sent concurrently on the shared
+    client (``TTS_CONCURRENCY`` at a time, paced by ``TTS_RATE_LIMIT``).
+    """
+    concurrency = int(os.getenv("TTS_CONCURRENCY", "4"))
+    cache = _tts_cache()
+    keys = [
+        json.dumps([chunk, language_code, voice_name, speaking_rate, "MP3"], ensure_ascii=False)
+        for chunk, voice_name in chunks
+    ]
+    parts: List[Optional[bytes]] = [
+        cache.get(key) if cache is not None else None for key in keys
+    ]
+    missing = [idx for idx, part in enumerate(parts) if part is None]
+    if not missing:
+        return _concat_mp3(parts)
+
+    client = _get_tts_client()
+    limiter = _get_tts_limiter()
+    audio_config = texttospeech.AudioConfig(
+        audio_encoding=texttospeech.AudioEncoding.MP3,
+        speaking_rate=speaking_rate,
+    )
+
+    def synthesize(idx: int) -> bytes:
+        chunk, voice_name = chunks[idx]
+        limiter.wait()
+        with _timed("tts"):
+            response = client.synthesize_speech(
+                request={
+                    "input": texttospeech.SynthesisInput(text=chunk),
+                    "voice": texttospeech.VoiceSelectionParams(
+                        language_code=language_code,
+                        name=voice_name,
+                    ),
+                    "audio_config": audio_config,
+                }
+            )
+        audio = response.audio_content
+        _inc("slower_tts_characters_total", len(chunk))
+        _inc("slower_tts_bytes_total", len(audio))
+        if cache is not None:
+            cache.set(keys[idx], audio)
+        return audio
+
+    if len(missing) == 1 or concurrency <= 1:
+        audio_parts = [synthesize(idx) for idx in missing]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(missing))) as pool:
+            audio_parts = list(pool.map(synthesize, missing))
+    for idx, audio in zip(missing, audio_parts):
+        parts[idx] = audio
+    return _concat_mp3(parts)
+
+
+_SPEAKER_RE = re.compile(r"^\s*\**\s*([^\s:：*]{1,20})\s*\**\s*[:：]\s*\**\s*(.*)$")
+
+
+def _configured_speaker_voices() -> Dict[str, str]:
+    """Parse ``TTS_SPEAKER_VOICES`` (``"A=voice,B=voice"``) into a mapping."""
+    configured = {}
+    for item in os.getenv("TTS_SPEAKER_VOICES", "").split(","):
+        name, sep, voice_name = item.partition("=")
+        if sep and name.strip() and voice_name.strip():
+            configured[name.strip()] = voice_name.strip()
+    return configured
+
+
+def _parse_dialogue(text: str, known: Optional[Iterable[str]] = None) -> List[tuple]:
+    """Split a script into ``(speaker, text)`` turns.
+
+    Lines such as ``A: ...`` or ``**B**：...`` start a turn; other lines
+    continue the current one, and text before the first speaker gets ``""``.
+    Consecutive lines of the same speaker are merged.
+
+    A label only counts as a speaker if it is in ``known`` (by default the
+    names in ``TTS_SPEAKER_VOICES``) or starts at least two lines, and it is
+    not all digits or followed by ``//``. Lines such as ``開始は10:30です``,
+    ``https://...`` or a single ``ポイント: ...`` stay body text.
+    """
+    known = set(_configured_speaker_voices() if known is None else known)
+    lines = [line for line in text.splitlines() if line.strip()]
+    matches = []
+    for line in lines:
+        match = _SPEAKER_RE.match(line)
+        if match and (match.group(1).isdigit() or match.group(2).startswith("//")):
+            match = None
+        matches.append(match)
+    counts = Counter(match.group(1) for match in matches if match)
+    turns: List[list] = []
+    for line, match in zip(lines, matches):
+        if match and match.group(1) not in known and counts[match.group(1)] < 2:
+            match = None
+        if match:
+            speaker, body = match.group(1), match.group(2).strip()
+        else:
+            speaker = turns[-1][0] if turns else ""
+            body = line.strip()
+        if not body:
+            if match and not (turns and turns[-1][0] == speaker):
+                turns.append([speaker, ""])
+            continue
+        if turns and turns[-1][0] == speaker:
+            turns[-1][1] = f"{turns[-1][1]}\n{body}" if turns[-1][1] else body
+        else:
+            turns.append([speaker, body])
+    return [(speaker, body) for speaker, body in turns if body]
+
+
+# Two contrasting default voices per language for dialogue scripts.
+_TTS_SPEAKER_VOICES = {
+    "ja-JP": ["ja-JP-Neural2-B", "ja-JP-Neural2-C"],
+    "en-US": ["en-US-Neural2-F", "en-US-Neural2-J"],
+    "es-ES": ["es-ES-Neural2-A", "es-ES-Neural2-B"],
+}
+
+
+def _speaker_voices(
+    speakers: List[str], language_code: str, configured: Optional[Dict[str, str]]
+) -> Dict[str, str]:
+    """Map each speaker to a voice of ``language_code``.
+
+    Voices from ``configured`` (by default ``TTS_SPEAKER_VOICES``) are used
+    only if they belong to ``language_code``, because the API rejects a voice
+    of another language. The other speakers get the language's default
+    voices in order of appearance, skipping voices that are already taken
+    while any are left.
+    """
+    if configured is None:
+        configured = _configured_speaker_voices()
+    prefix = f"{language_code}-".lower()
+    defaults = _TTS_SPEAKER_VOICES.get(
+        language_code, [_TTS_DEFAULT_VOICES.get(language_code, "ja-JP-Neural2-B")]
+    )
+    speakers = list(dict.fromkeys(speakers))
+    voices = {
+        speaker: configured[speaker]
+        for speaker in speakers
+        if configured.get(speaker, "").lower().startswith(prefix)
+    }
+    assigned = 0
+    for speaker in speakers:
+        if speaker in voices:
+            continue
+        free = [voice for voice in defaults if voice not in voices.values()]
+        voices[speaker] = free[0] if free else defaults[assigned % len(defaults)]
+        assigned += 1
+    return {speaker: voices[speaker] for speaker in speakers}
+
+
+def synthesize_dialogue_to_mp3(
+    text: str,
+    *,
+    language_code: str = "ja-JP",
+    speaker_voices: Optional[Dict[str, str]] = None,
+    speaking_rate: float = 1.0,
+) -> bytes:
+    """Return MP3 audio reading each speaker's lines in their own voice.
+
+    Speakers are parsed from ``A: ...`` style lines and mapped to voices by
+    ``speaker_voices`` (default ``TTS_SPEAKER_VOICES``, e.g.
+    ``"A=ja-JP-Neural2-B,B=ja-JP-Neural2-C"``; unmapped speakers take the
+    language defaults). Turns longer than ``TTS_MAX_BYTES`` are split, and all
+    chunks share the cache, concurrency and rate limit of
+    :func:`synthesize_text_to_mp3`.
+    """
+    max_bytes = int(os.getenv("TTS_MAX_BYTES", "4500"))
+    turns = _parse_dialogue(text, speaker_voices)
+    voices = _speaker_voices([speaker for speaker, _ in turns], language_code, speaker_voices)
+    chunks = [
+        (chunk, voices[speaker])
+        for speaker, body in turns
+        for chunk in _split_tts_text(body, max_bytes) or [body]
+    ]
+    if not chunks:
+        chunks = [(text, voices.get("", _TTS_DEFAULT_VOICES.get(language_code, "ja-JP-Neural2-B")))]
+    return _synthesize_chunks(
+        chunks, language_code=language_code, speaking_rate=speaking_rate
+    )
 
 
 def synthesize_text_to_mp3(
@@ -293,28 +2383,166 @@ def synthesize_text_to_mp3(
     voice: Optional[str] = None,
     speaking_rate: float = 1.0,
 ) -> bytes:
-    """Return MP3 audio bytes from given text."""
-    client = texttospeech.TextToSpeechClient()
-    synthesis_input = texttospeech.SynthesisInput(text=text)
-
-    default_voices = {
-        "ja-JP": "ja-JP-Neural2-B",
-        "en-US": "en-US-Neural2-J",
-        "es-ES": "es-ES-Neural2-B",
-    }
-    voice_params = texttospeech.VoiceSelectionParams(
-        language_code=language_code,
-        name=voice or default_voices.get(language_code, "ja-JP-Neural2-B"),
+    """Return MP3 audio bytes from given text.
+
+    Long scripts are split under the API input limit (``TTS_MAX_BYTES``,
+    default ``4500``) and the chunks are synthesized concurrently on one
+    client (``TTS_CONCURRENCY`` requests at a time, default ``4``, at most
+    ``TTS_RATE_LIMIT`` per second, default ``10``) before their MP3 frames
+    are joined in order. Audio is cached per chunk, keyed by text, language,
+    voice, speaking rate and encoding (``TTS_CACHE_*``), so only chunks that
+    changed since an earlier run are sent to the API.
+
+    With ``TTS_MULTI_VOICE=1`` and no explicit ``voice``, scripts with two or
+    more speakers are read with one voice per speaker (see
+    :func:`synthesize_dialogue_to_mp3`).
+    """
+    if voice is None and os.getenv("TTS_MULTI_VOICE", "0") == "1":
+        if len({speaker for speaker, _ in _parse_dialogue(text)} - {""}) > 1:
+            return synthesize_dialogue_to_mp3(
+                text, language_code=language_code, speaking_rate=speaking_rate
+            )
+    max_bytes = int(os.getenv("TTS_MAX_BYTES", "4500"))
+    avg_lines = (
+        int(os.getenv("TTS_CHUNK_LINES", "8"))
+        if os.getenv("TTS_CACHE", "1") != "0"
+        else 0
     )
-    audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3,
+    chunks = _split_tts_text(text, max_bytes, avg_lines=avg_lines) or [text]
+    voice_name = voice or _TTS_DEFAULT_VOICES.get(language_code, "ja-JP-Neural2-B")
+    return _synthesize_chunks(
+        [(chunk, voice_name) for chunk in chunks],
+        language_code=language_code,
         speaking_rate=speaking_rate,
     )
-    response = client.synthesize_speech(
-        request={
-            "input": synthesis_input,
-            "voice": voice_params,
-            "audio_config": audio_config,
-        }
+
+
+# Async API: the Google clients and Whisper are blocking, so the coroutines
+# below run them on bounded executors and keep the caches, client pools and
+# quota accounting of the synchronous functions.
+_EXECUTORS: Dict[str, ThreadPoolExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _get_executor(kind: str) -> ThreadPoolExecutor:
+    """Return the shared ``"io"`` or ``"whisper"`` executor.
+
+    Network calls use ``PIPELINE_IO_WORKERS`` threads (default ``32``);
+    transcription uses ``WHISPER_ASYNC_WORKERS`` (default ``1``) so
+    concurrent requests cannot load more Whisper work than the host can run.
+    """
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(kind)
+        if executor is None:
+            if kind == "whisper":
+                workers = int(os.getenv("WHISPER_ASYNC_WORKERS", "1"))
+            else:
+                workers = int(os.getenv("PIPELINE_IO_WORKERS", "32"))
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, workers), thread_name_prefix=f"pipeline-{kind}"
+            )
+            _EXECUTORS[kind] = executor
+        return executor
+
+
+def _reset_executors_after_fork() -> None:
+    # Executor threads do not survive fork; start fresh pools on demand.
+    global _EXECUTORS_LOCK
+    _EXECUTORS_LOCK = threading.Lock()
+    _EXECUTORS.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_executors_after_fork)
+
+
+async def _run_in_executor(kind: str, func: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(kind), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def search_videos_async(*args, **kwargs) -> List[dict]:
+    """Async version of :func:`search_videos`."""
+    return await _run_in_executor("io", search_videos, *args, **kwargs)
+
+
+async def get_video_info_async(api_key: str, video_id: str) -> Optional[dict]:
+    """Async version of :func:`get_video_info`."""
+    return await _run_in_executor("io", get_video_info, api_key, video_id)
+
+
+async def get_video_infos_async(api_key: str, video_ids: List[str]) -> List[Optional[dict]]:
+    """Look up several videos concurrently; results follow ``video_ids``."""
+    return list(
+        await asyncio.gather(*(get_video_info_async(api_key, vid) for vid in video_ids))
     )
-    return response.audio_content
+
+
+async def summarize_with_gemini_async(api_key: str, text: str, *, lang: str = "ja") -> str:
+    """Async version of :func:`summarize_with_gemini`."""
+    return await _run_in_executor("io", summarize_with_gemini, api_key, text, lang=lang)
+
+
+async def generate_discussion_script_async(
+    api_key: str, summary: str, *, lang: str = "ja"
+) -> str:
+    """Async version of :func:`generate_discussion_script`."""
+    return await _run_in_executor(
+        "io", generate_discussion_script, api_key, summary, lang=lang
+    )
+
+
+async def synthesize_text_to_mp3_async(text: str, **kwargs) -> bytes:
+    """Async version of :func:`synthesize_text_to_mp3`."""
+    return await _run_in_executor("io", synthesize_text_to_mp3, text, **kwargs)
+
+
+async def download_and_transcribe_async(video_id: str, **kwargs) -> str:
+    """Async version of :func:`download_and_transcribe` on the Whisper executor."""
+    return await _run_in_executor("whisper", download_and_transcribe, video_id, **kwargs)
+
+
+async def iter_transcript_segments_async(video_id: str, **kwargs):
+    """Async version of :func:`iter_transcript_segments` on the Whisper executor.
+
+    Segments are handed to the event loop as soon as Whisper decodes them. If
+    the consumer stops early, the executor thread closes the iterator, which
+    stops ffmpeg and removes the download.
+    """
+    loop = asyncio.get_running_loop()
+    items: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(kind: str, value=None) -> None:
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, (kind, value))
+        except RuntimeError:  # event loop already closed
+            stop.set()
+
+    def produce() -> None:
+        segments = iter_transcript_segments(video_id, **kwargs)
+        try:
+            for seg in segments:
+                if stop.is_set():
+                    break
+                put("segment", seg)
+        except Exception as e:
+            put("error", e)
+        finally:
+            segments.close()
+            put("done")
+
+    loop.run_in_executor(_get_executor("whisper"), produce)
+    try:
+        while True:
+            kind, value = await items.get()
+            if kind == "segment":
+                yield value
+            elif kind == "error":
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
@@ -54,6 +54,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "summary.profiling.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "slower_site.urls"
@@ -128,6 +129,16 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Generated audio and other pipeline artifacts
+ARTIFACT_ROOT = Path(os.getenv("ARTIFACT_ROOT", BASE_DIR / "artifacts"))
+
+# Opt-in cProfile profiling of requests and pipeline jobs (summary/profiling.py).
+# With PROFILING_ENABLED, "?profile=1" profiles a request (and the job it
+# starts); PROFILING_SAMPLE_RATE profiles that fraction of all of them.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "200"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
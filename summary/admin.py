@@ -1,3 +1,22 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import PipelineJob, ProfileRecord, StageArtifact
+
+
+@admin.register(PipelineJob)
+class PipelineJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "status", "stage", "created_at")
+    list_filter = ("status",)
+
+
+@admin.register(StageArtifact)
+class StageArtifactAdmin(admin.ModelAdmin):
+    list_display = ("key", "stage", "created_at")
+    list_filter = ("stage",)
+
+
+@admin.register(ProfileRecord)
+class ProfileRecordAdmin(admin.ModelAdmin):
+    list_display = ("name", "kind", "duration", "created_at")
+    list_filter = ("kind",)
+    exclude = ("stats",)
@@ -1,6 +1,28 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
+def _serving() -> bool:
+    """Return False for management commands other than the dev server."""
+    if os.path.basename(sys.argv[0]) not in {"manage.py", "django-admin"}:
+        return True
+    if sys.argv[1:2] != ["runserver"]:
+        return False
+    # The autoreloader's parent process only watches files.
+    return os.environ.get("RUN_MAIN") == "true" or "--noreload" in sys.argv
+
+
 class SummaryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "summary"
+
+    def ready(self):
+        # Start the opt-in Whisper preload wherever the app is served:
+        # runserver, ASGI servers and gunicorn workers. With GUNICORN_PRELOAD
+        # this runs in the gunicorn master, whose when_ready hook waits for it.
+        if os.getenv("WHISPER_PRELOAD", "0") == "1" and _serving():
+            from . import pipeline_proxy
+
+            pipeline_proxy.start_whisper_preload()
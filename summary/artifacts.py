@@ -0,0 +1,42 @@
+"""Content-addressed storage for generated files such as MP3 audio.
+
+Artifacts are written once under ``settings.ARTIFACT_ROOT`` and named by the
+SHA-256 of their content, so identical audio is stored only once and the ID
+doubles as a strong HTTP ETag.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+_ARTIFACT_ID_RE = re.compile(r"[0-9a-f]{64}")
+
+
+def _root() -> Path:
+    return Path(settings.ARTIFACT_ROOT)
+
+
+def save_audio(data: bytes) -> str:
+    """Store MP3 bytes and return their artifact ID."""
+    artifact_id = hashlib.sha256(data).hexdigest()
+    path = _root() / f"{artifact_id}.mp3"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per thread: job threads often produce the same audio at once.
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    return artifact_id
+
+
+def audio_path(artifact_id: str) -> Optional[Path]:
+    """Return the file for an artifact ID, or ``None`` if it is unknown."""
+    if not _ARTIFACT_ID_RE.fullmatch(artifact_id or ""):
+        return None
+    path = _root() / f"{artifact_id}.mp3"
+    return path if path.is_file() else None
@@ -0,0 +1,234 @@
+"""Background execution of the video pipeline.
+
+Jobs are persisted as :class:`~summary.models.PipelineJob` rows so any web
+worker can report their status, while the stages themselves run on a bounded
+thread pool inside the process that accepted the submission. The pool size is
+read from ``PIPELINE_WORKERS`` (default ``2``). Stage outputs are stored by
+:mod:`summary.stages`, so resubmitting a failed job skips the stages that
+already succeeded.
+
+While a process holds queued or running jobs, a heartbeat thread touches
+their ``updated_at`` every quarter of ``PIPELINE_JOB_STALE_SECONDS``
+(default ``120``). Jobs whose row has not been touched for longer than that
+belonged to a worker that restarted or crashed; :func:`expire_if_stale`
+marks them failed so they can be retried.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Optional, Set
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import profiling, stages
+from .models import PipelineJob, ProfileRecord
+
+logger = logging.getLogger(__name__)
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+_ACTIVE_JOBS: Set = set()
+_HEARTBEAT: Optional[threading.Thread] = None
+# The request that queued a profiled job is usually still being profiled
+# when the job starts, so give it a moment to finish.
+_PROFILE_WAIT = 10.0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=int(os.getenv("PIPELINE_WORKERS", "2")),
+                thread_name_prefix="pipeline-job",
+            )
+        return _EXECUTOR
+
+
+def _stale_seconds() -> float:
+    return float(os.getenv("PIPELINE_JOB_STALE_SECONDS", "120"))
+
+
+def _beat() -> None:
+    """Touch ``updated_at`` of the jobs queued or running in this process."""
+    with _EXECUTOR_LOCK:
+        job_ids = list(_ACTIVE_JOBS)
+    if job_ids:
+        PipelineJob.objects.filter(pk__in=job_ids).update(updated_at=timezone.now())
+
+
+def _heartbeat_loop() -> None:
+    while True:
+        time.sleep(_stale_seconds() / 4)
+        try:
+            close_old_connections()
+            _beat()
+        except Exception:
+            logger.exception("Could not record heartbeat for pipeline jobs")
+
+
+def _track(job_id) -> None:
+    global _HEARTBEAT
+    with _EXECUTOR_LOCK:
+        _ACTIVE_JOBS.add(job_id)
+        if _HEARTBEAT is None or not _HEARTBEAT.is_alive():
+            _HEARTBEAT = threading.Thread(
+                target=_heartbeat_loop, name="pipeline-job-heartbeat", daemon=True
+            )
+            _HEARTBEAT.start()
+
+
+def expire_if_stale(job: PipelineJob) -> bool:
+    """Mark ``job`` failed if no worker has touched it recently.
+
+    Returns True if the job was expired; ``job`` is then refreshed.
+    """
+    if job.finished:
+        return False
+    cutoff = timezone.now() - timedelta(seconds=_stale_seconds())
+    expired = PipelineJob.objects.filter(
+        pk=job.pk,
+        status__in=[PipelineJob.QUEUED, PipelineJob.RUNNING],
+        updated_at__lt=cutoff,
+    ).update(
+        status=PipelineJob.FAILED,
+        stage="",
+        error="The worker running this job stopped before it finished.",
+        updated_at=timezone.now(),
+    )
+    if expired:
+        job.refresh_from_db()
+    return bool(expired)
+
+
+def submit_job(
+    video_ids: List[str],
+    *,
+    script_lang: str = "ja",
+    audio_lang: str = "ja-JP",
+    profile: bool = False,
+) -> PipelineJob:
+    """Create a job for ``video_ids`` and queue it on the worker pool.
+
+    With ``profile`` the run is recorded by :mod:`summary.profiling`.
+    """
+    job = PipelineJob.objects.create(
+        video_ids=list(video_ids),
+        script_lang=script_lang,
+        audio_lang=audio_lang,
+    )
+    _track(job.pk)
+    _get_executor().submit(run_job, job.pk, profile=profile)
+    return job
+
+
+def _update(job: PipelineJob, **fields) -> None:
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=[*fields, "updated_at"])
+
+
+def run_job(job_id, *, profile: bool = False) -> None:
+    """Run all pipeline stages for a job, recording progress after each one."""
+    close_old_connections()
+    try:
+        job = PipelineJob.objects.get(pk=job_id)
+        recorder = (
+            profiling.profile(
+                ProfileRecord.JOB, str(job.pk), wait=_PROFILE_WAIT, video_ids=job.video_ids
+            )
+            if profile
+            else nullcontext({})
+        )
+        with recorder as meta:
+            try:
+                _run_stages(job)
+            except Exception as e:
+                _update(job, status=PipelineJob.FAILED, stage="", error=str(e))
+            meta["status"] = job.status
+        try:
+            stages.prune()
+        except Exception:
+            logger.exception("Failed to prune stage artifacts")
+    finally:
+        with _EXECUTOR_LOCK:
+            _ACTIVE_JOBS.discard(job_id)
+        close_old_connections()
+
+
+def _run_stages(job: PipelineJob) -> None:
+    errors = []
+    steps = []
+
+    def step(name: str) -> None:
+        steps.append(name)
+        _update(job, steps=list(steps))
+
+    def start(stage: stages.Stage) -> None:
+        _update(job, stage=stage.running)
+
+    def finish(stage: stages.Stage, reused: bool) -> None:
+        step(f"{stage.done} (reused)" if reused else stage.done)
+
+    _update(job, status=PipelineJob.RUNNING, stage="transcribing")
+    transcripts = []
+    transcript_errors = []
+    if len(job.video_ids) == 1:
+        try:
+            context = stages.run(["transcribe"], {"video_id": job.video_ids[0]}, on_finish=finish)
+            transcripts.append(context["transcript"])
+        except Exception as e:
+            errors.append(str(e))
+    else:
+
+        def report(result: dict) -> None:
+            if result["error"]:
+                transcript_errors.append(f"{result['videoId']}: {result['error']}")
+                _update(job, error=" ".join(transcript_errors))
+            else:
+                suffix = " (reused)" if result.get("reused") else ""
+                step(f"transcribed {result['videoId']}{suffix}")
+
+        results = stages.transcribe_videos(job.video_ids, on_result=report)
+        transcripts = [r["transcript"] for r in results if not r["error"]]
+        if not transcripts:
+            errors.append("No video could be transcribed.")
+    combined = "\n".join(transcripts)
+
+    gemini_key = os.environ.get("GEMINI_API_KEY")
+    credentials = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+    if not gemini_key:
+        errors.append("Gemini API key (GEMINI_API_KEY) is not configured.")
+    if not credentials:
+        errors.append("Google Cloud credentials are not configured.")
+
+    context = {
+        "transcript": combined,
+        "script_lang": job.script_lang,
+        "audio_lang": job.audio_lang,
+    }
+    if not errors and combined:
+        try:
+            stages.run(
+                ["summarize", "script", "synthesize"],
+                context,
+                on_start=start,
+                on_finish=finish,
+            )
+        except Exception as e:
+            errors.append(str(e))
+
+    _update(
+        job,
+        status=PipelineJob.FAILED if errors else PipelineJob.DONE,
+        stage="",
+        script=context.get("script") or context.get("summary") or combined,
+        audio_id=context.get("audio_id", ""),
+        error=" ".join(transcript_errors + errors),
+    )
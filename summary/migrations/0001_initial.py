@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:27
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('video_ids', models.JSONField(default=list)),
+                ('script_lang', models.CharField(default='ja', max_length=16)),
+                ('audio_lang', models.CharField(default='ja-JP', max_length=16)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('stage', models.CharField(blank=True, max_length=32)),
+                ('steps', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True)),
+                ('script', models.TextField(blank=True)),
+                ('audio', models.BinaryField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
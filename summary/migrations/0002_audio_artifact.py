@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pipelinejob',
+            name='audio',
+        ),
+        migrations.AddField(
+            model_name='pipelinejob',
+            name='audio_id',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0002_audio_artifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StageArtifact',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('stage', models.CharField(max_length=32)),
+                ('value', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
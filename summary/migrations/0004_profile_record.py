@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summary', '0003_stage_artifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('request', 'Request'), ('job', 'Job')], max_length=16)),
+                ('name', models.CharField(max_length=255)),
+                ('duration', models.FloatField()),
+                ('meta', models.JSONField(default=dict)),
+                ('hotspots', models.JSONField(default=list)),
+                ('stats', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
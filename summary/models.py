@@ -1,3 +1,78 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+
+class PipelineJob(models.Model):
+    """A queued or running pipeline run for one or more videos."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    video_ids = models.JSONField(default=list)
+    script_lang = models.CharField(max_length=16, default="ja")
+    audio_lang = models.CharField(max_length=16, default="ja-JP")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    stage = models.CharField(max_length=32, blank=True)
+    steps = models.JSONField(default=list)
+    error = models.TextField(blank=True)
+    script = models.TextField(blank=True)
+    audio_id = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{', '.join(self.video_ids)} ({self.status})"
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {self.DONE, self.FAILED}
+
+
+class StageArtifact(models.Model):
+    """Output of one pipeline stage, keyed by a hash of the stage inputs."""
+
+    key = models.CharField(max_length=64, primary_key=True)
+    stage = models.CharField(max_length=32)
+    value = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.stage} {self.key[:12]}"
+
+
+class ProfileRecord(models.Model):
+    """cProfile output of one profiled request or background job."""
+
+    REQUEST = "request"
+    JOB = "job"
+    KIND_CHOICES = [(REQUEST, "Request"), (JOB, "Job")]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    name = models.CharField(max_length=255)
+    duration = models.FloatField()
+    meta = models.JSONField(default=dict)
+    hotspots = models.JSONField(default=list)
+    stats = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.kind} {self.name} ({self.duration:.2f}s)"
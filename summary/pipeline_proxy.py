@@ -23,6 +23,18 @@ def download_and_transcribe(*args, **kwargs):
     return _get_pipeline().download_and_transcribe(*args, **kwargs)
 
 
+def cached_transcript(*args, **kwargs):
+    return _get_pipeline().cached_transcript(*args, **kwargs)
+
+
+def join_segments(texts):
+    return _get_pipeline().join_segments(texts)
+
+
+def transcribe_videos(*args, **kwargs):
+    return _get_pipeline().transcribe_videos(*args, **kwargs)
+
+
 def summarize_with_gemini(api_key, text, *, lang="ja"):
     return _get_pipeline().summarize_with_gemini(api_key, text, lang=lang)
 
@@ -33,3 +45,51 @@ def generate_discussion_script(api_key, summary, *, lang="ja"):
 
 def synthesize_text_to_mp3(*args, **kwargs):
     return _get_pipeline().synthesize_text_to_mp3(*args, **kwargs)
+
+
+def start_whisper_preload():
+    return _get_pipeline().start_whisper_preload()
+
+
+def whisper_ready():
+    return _get_pipeline().whisper_ready()
+
+
+def whisper_preload_error():
+    return _get_pipeline().whisper_preload_error()
+
+
+def render_metrics():
+    return _get_pipeline().render_metrics()
+
+
+async def search_videos_async(*args, **kwargs):
+    return await _get_pipeline().search_videos_async(*args, **kwargs)
+
+
+async def get_video_infos_async(*args, **kwargs):
+    return await _get_pipeline().get_video_infos_async(*args, **kwargs)
+
+
+async def download_and_transcribe_async(*args, **kwargs):
+    return await _get_pipeline().download_and_transcribe_async(*args, **kwargs)
+
+
+async def summarize_with_gemini_async(api_key, text, *, lang="ja"):
+    return await _get_pipeline().summarize_with_gemini_async(api_key, text, lang=lang)
+
+
+async def generate_discussion_script_async(api_key, summary, *, lang="ja"):
+    return await _get_pipeline().generate_discussion_script_async(api_key, summary, lang=lang)
+
+
+async def synthesize_text_to_mp3_async(*args, **kwargs):
+    return await _get_pipeline().synthesize_text_to_mp3_async(*args, **kwargs)
+
+
+def iter_transcript_segments(*args, **kwargs):
+    return _get_pipeline().iter_transcript_segments(*args, **kwargs)
+
+
+def iter_transcript_segments_async(*args, **kwargs):
+    return _get_pipeline().iter_transcript_segments_async(*args, **kwargs)
@@ -0,0 +1,182 @@
+"""Opt-in cProfile profiling of requests and pipeline jobs.
+
+Profiling is off unless ``settings.PROFILING_ENABLED`` is set. A request is
+then profiled when it carries ``?profile=1`` or is picked by
+``PROFILING_SAMPLE_RATE``; views that queue a job pass the decision on, so
+the background pipeline run is profiled too. Each profile is stored as a
+:class:`~summary.models.ProfileRecord` with its top hotspots and the raw
+stats, which can be downloaded and opened with ``pstats`` or snakeviz.
+
+Only one profiler can be active per process, so a profile that starts while
+another is running is skipped, and nested profiles fold into the outer one.
+Work handed to other threads (sync views under ASGI, TTS and Whisper pools)
+is not included in the calling thread's profile. Under ASGI the profile of
+an async request covers the event loop thread, so other requests it serves
+meanwhile show up in it as well.
+"""
+
+import cProfile
+import logging
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .models import ProfileRecord
+
+logger = logging.getLogger(__name__)
+
+_ACTIVE = threading.Lock()
+_HOTSPOTS = 15
+
+
+def should_profile(request) -> bool:
+    """Return True if this request should be profiled."""
+    if not settings.PROFILING_ENABLED:
+        return False
+    if request.GET.get("profile") == "1":
+        return True
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def _short_path(path: str) -> str:
+    for marker in ("site-packages" + os.sep, str(settings.BASE_DIR) + os.sep):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return path
+
+
+def _hotspots(stats: pstats.Stats, limit: int = _HOTSPOTS) -> List[dict]:
+    """Return the functions with the most own time, largest first."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    return [
+        {
+            "function": func,
+            "file": _short_path(filename),
+            "line": line,
+            "calls": calls,
+            "tottime": round(tottime, 6),
+            "cumtime": round(cumtime, 6),
+        }
+        for (filename, line, func), (_cc, calls, tottime, cumtime, _callers) in rows[:limit]
+    ]
+
+
+def _save(kind: str, name: str, duration: float, profiler: cProfile.Profile, meta: dict) -> None:
+    stats = pstats.Stats(profiler)
+    ProfileRecord.objects.create(
+        kind=kind,
+        name=name[:255],
+        duration=duration,
+        meta=meta,
+        hotspots=_hotspots(stats),
+        stats=marshal.dumps(stats.stats),
+    )
+    stale = ProfileRecord.objects.values_list("pk", flat=True)[settings.PROFILING_KEEP :]  # noqa: E203
+    ProfileRecord.objects.filter(pk__in=list(stale)).delete()
+
+
+def _start(wait: float = 0) -> Optional[cProfile.Profile]:
+    """Return an enabled profiler, or ``None`` if another one is running."""
+    if not (_ACTIVE.acquire(timeout=wait) if wait > 0 else _ACTIVE.acquire(blocking=False)):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiling tool is active
+        _ACTIVE.release()
+        return None
+    return profiler
+
+
+def _stop(profiler: cProfile.Profile) -> None:
+    profiler.disable()
+    _ACTIVE.release()
+
+
+@contextmanager
+def profile(kind: str, name: str, *, wait: float = 0, **meta):
+    """Profile the block and store the result.
+
+    Yields the ``meta`` dictionary so callers can add details, such as the
+    response status, before the record is saved. ``wait`` is how many seconds
+    to wait for a running profile to finish before skipping this one.
+    """
+    profiler = _start(wait)
+    start = time.perf_counter()
+    try:
+        yield meta
+    finally:
+        if profiler is not None:
+            _stop(profiler)
+            try:
+                _save(kind, name, time.perf_counter() - start, profiler, meta)
+            except Exception:
+                logger.exception("Could not store profile for %s %s", kind, name)
+
+
+@asynccontextmanager
+async def aprofile(kind: str, name: str, **meta):
+    """Async version of :func:`profile`; it never waits for a running profile."""
+    profiler = _start()
+    start = time.perf_counter()
+    try:
+        yield meta
+    finally:
+        if profiler is not None:
+            _stop(profiler)
+            try:
+                await sync_to_async(_save)(
+                    kind, name, time.perf_counter() - start, profiler, meta
+                )
+            except Exception:
+                logger.exception("Could not store profile for %s %s", kind, name)
+
+
+class ProfilingMiddleware:
+    """Profile selected requests and record method, path and status.
+
+    Works in both sync (WSGI) and async (ASGI) middleware chains, so async
+    views are not forced through a thread by this middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _meta(request) -> dict:
+        return {"method": request.method, "query": request.META.get("QUERY_STRING", "")}
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        request.profiling = should_profile(request)
+        if not request.profiling:
+            return self.get_response(request)
+        with profile(ProfileRecord.REQUEST, request.path, **self._meta(request)) as meta:
+            response = self.get_response(request)
+            meta["status"] = response.status_code
+        return response
+
+    async def __acall__(self, request):
+        request.profiling = should_profile(request)
+        if not request.profiling:
+            return await self.get_response(request)
+        async with aprofile(ProfileRecord.REQUEST, request.path, **self._meta(request)) as meta:
+            response = await self.get_response(request)
+            meta["status"] = response.status_code
+        return response
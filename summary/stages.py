@@ -0,0 +1,267 @@
+"""Resumable pipeline stages with outputs persisted as artifacts.
+
+Each :class:`Stage` declares the context values it reads and the value it
+produces. Outputs are stored as :class:`~summary.models.StageArtifact` rows
+keyed by a hash of the stage name, its inputs and the environment settings
+that affect the result, so a stage whose output already exists is skipped.
+A failed run can therefore be retried without repeating earlier stages.
+
+Transcripts are not duplicated here: the ``transcribe`` stage looks them up
+in the pipeline's transcript store, which is keyed by the Whisper settings.
+Artifacts older than ``STAGE_ARTIFACT_MAX_AGE_DAYS`` (default ``30``) and
+all but the newest ``STAGE_ARTIFACT_MAX_ROWS`` (default ``2000``) are
+removed by :func:`prune`, which runs after every background job.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from . import artifacts, pipeline_proxy
+from .models import StageArtifact
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    inputs: Tuple[str, ...]
+    output: str
+    func: Callable[..., str]
+    afunc: Callable
+    running: str
+    done: str
+    config: Tuple[str, ...] = ()
+    valid: Optional[Callable[[str], bool]] = None
+    # Looks up an output that is persisted elsewhere; such stages store no
+    # StageArtifact rows.
+    cached: Optional[Callable[..., Optional[str]]] = None
+
+
+def _transcribe(video_id):
+    return pipeline_proxy.download_and_transcribe(video_id)
+
+
+async def _atranscribe(video_id):
+    return await pipeline_proxy.download_and_transcribe_async(video_id)
+
+
+def _summarize(transcript, script_lang):
+    return pipeline_proxy.summarize_with_gemini(
+        os.environ["GEMINI_API_KEY"], transcript, lang=script_lang
+    )
+
+
+async def _asummarize(transcript, script_lang):
+    return await pipeline_proxy.summarize_with_gemini_async(
+        os.environ["GEMINI_API_KEY"], transcript, lang=script_lang
+    )
+
+
+def _script(summary, script_lang):
+    return pipeline_proxy.generate_discussion_script(
+        os.environ["GEMINI_API_KEY"], summary, lang=script_lang
+    )
+
+
+async def _ascript(summary, script_lang):
+    return await pipeline_proxy.generate_discussion_script_async(
+        os.environ["GEMINI_API_KEY"], summary, lang=script_lang
+    )
+
+
+def _synthesize(script, audio_lang):
+    audio = pipeline_proxy.synthesize_text_to_mp3(script, language_code=audio_lang)
+    return artifacts.save_audio(audio)
+
+
+async def _asynthesize(script, audio_lang):
+    audio = await pipeline_proxy.synthesize_text_to_mp3_async(script, language_code=audio_lang)
+    return await sync_to_async(artifacts.save_audio)(audio)
+
+
+STAGES: Dict[str, Stage] = {
+    stage.name: stage
+    for stage in [
+        Stage(
+            "transcribe", ("video_id",), "transcript", _transcribe, _atranscribe,
+            running="transcribing", done="transcribed",
+            cached=pipeline_proxy.cached_transcript,
+        ),
+        Stage(
+            "summarize", ("transcript", "script_lang"), "summary", _summarize, _asummarize,
+            running="summarizing", done="summarized",
+            config=("GEMINI_MODEL",),
+        ),
+        Stage(
+            "script", ("summary", "script_lang"), "script", _script, _ascript,
+            running="scripting", done="script generated",
+            config=("GEMINI_MODEL",),
+        ),
+        Stage(
+            "synthesize", ("script", "audio_lang"), "audio_id", _synthesize, _asynthesize,
+            running="synthesizing", done="audio created",
+            config=("TTS_MULTI_VOICE", "TTS_SPEAKER_VOICES"),
+            valid=lambda audio_id: artifacts.audio_path(audio_id) is not None,
+        ),
+    ]
+}
+
+
+def artifact_key(stage: Stage, context: dict) -> str:
+    """Return the hash identifying ``stage`` run on the values in ``context``."""
+    inputs = {
+        name: hashlib.sha256(
+            json.dumps(context[name], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        for name in stage.inputs
+    }
+    config = {name: os.getenv(name, "") for name in stage.config}
+    payload = json.dumps([stage.name, inputs, config], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _usable(stage: Stage, artifact: Optional[StageArtifact]) -> Optional[str]:
+    if artifact is None or (stage.valid is not None and not stage.valid(artifact.value)):
+        return None
+    return artifact.value
+
+
+def lookup(stage: Stage, context: dict) -> Optional[str]:
+    """Return the stored output of ``stage`` for ``context`` or ``None``."""
+    if stage.cached is not None:
+        return stage.cached(**{name: context[name] for name in stage.inputs})
+    artifact = StageArtifact.objects.filter(pk=artifact_key(stage, context)).first()
+    return _usable(stage, artifact)
+
+
+async def alookup(stage: Stage, context: dict) -> Optional[str]:
+    """Async version of :func:`lookup`."""
+    if stage.cached is not None:
+        return await sync_to_async(stage.cached)(
+            **{name: context[name] for name in stage.inputs}
+        )
+    artifact = await StageArtifact.objects.filter(pk=artifact_key(stage, context)).afirst()
+    return _usable(stage, artifact)
+
+
+def store(stage: Stage, context: dict, value: str) -> None:
+    """Record ``value`` as the output of ``stage`` for ``context``."""
+    if stage.cached is not None:
+        return
+    StageArtifact.objects.update_or_create(
+        key=artifact_key(stage, context), defaults={"stage": stage.name, "value": value}
+    )
+
+
+async def astore(stage: Stage, context: dict, value: str) -> None:
+    """Async version of :func:`store`."""
+    if stage.cached is not None:
+        return
+    await StageArtifact.objects.aupdate_or_create(
+        key=artifact_key(stage, context), defaults={"stage": stage.name, "value": value}
+    )
+
+
+def run_stage(stage: Stage, context: dict) -> Tuple[str, bool]:
+    """Return ``(output, reused)``, computing and storing the output if needed."""
+    value = lookup(stage, context)
+    if value is not None:
+        return value, True
+    value = stage.func(**{name: context[name] for name in stage.inputs})
+    store(stage, context, value)
+    return value, False
+
+
+async def arun_stage(stage: Stage, context: dict) -> Tuple[str, bool]:
+    """Async version of :func:`run_stage` for async views."""
+    value = await alookup(stage, context)
+    if value is not None:
+        return value, True
+    value = await stage.afunc(**{name: context[name] for name in stage.inputs})
+    await astore(stage, context, value)
+    return value, False
+
+
+def prune() -> int:
+    """Delete expired artifacts and the oldest ones beyond the row limit.
+
+    Returns the number of rows deleted.
+    """
+    max_age = float(os.getenv("STAGE_ARTIFACT_MAX_AGE_DAYS", "30"))
+    max_rows = int(os.getenv("STAGE_ARTIFACT_MAX_ROWS", "2000"))
+    deleted, _ = StageArtifact.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=max_age)
+    ).delete()
+    surplus = list(
+        StageArtifact.objects.order_by("-created_at").values_list("pk", flat=True)[max_rows:]
+    )
+    if surplus:
+        deleted += StageArtifact.objects.filter(pk__in=surplus).delete()[0]
+    return deleted
+
+
+def run(
+    names: Iterable[str],
+    context: dict,
+    *,
+    on_start: Optional[Callable[[Stage], None]] = None,
+    on_finish: Optional[Callable[[Stage, bool], None]] = None,
+) -> dict:
+    """Run the named stages in order, adding each output to ``context``.
+
+    ``on_start`` is called before a stage is looked up or computed and
+    ``on_finish`` afterwards with whether the stored output was reused.
+    Exceptions propagate; outputs of the stages that finished are kept.
+    """
+    for name in names:
+        stage = STAGES[name]
+        if on_start is not None:
+            on_start(stage)
+        context[stage.output], reused = run_stage(stage, context)
+        if on_finish is not None:
+            on_finish(stage, reused)
+    return context
+
+
+def transcribe_videos(
+    video_ids: List[str], *, on_result: Optional[Callable[[dict], None]] = None
+) -> List[dict]:
+    """Transcribe several videos, reusing stored transcripts.
+
+    Videos without a stored transcript go through
+    :func:`pipeline.transcribe_videos`, which writes them to the transcript
+    store. Each result carries ``videoId``, ``transcript``,
+    ``error`` and ``reused``.
+    """
+    stage = STAGES["transcribe"]
+    results: List[Optional[dict]] = [None] * len(video_ids)
+    pending = []
+    for idx, vid in enumerate(video_ids):
+        transcript = lookup(stage, {"video_id": vid})
+        if transcript is None:
+            pending.append(idx)
+            continue
+        results[idx] = {"videoId": vid, "transcript": transcript, "error": None, "reused": True}
+        if on_result is not None:
+            on_result(results[idx])
+
+    def record(result: dict) -> None:
+        result["reused"] = False
+        if not result["error"]:
+            store(stage, {"video_id": result["videoId"]}, result["transcript"])
+        if on_result is not None:
+            on_result(result)
+
+    if pending:
+        fresh = pipeline_proxy.transcribe_videos(
+            [video_ids[idx] for idx in pending], on_result=record
+        )
+        for idx, result in zip(pending, fresh):
+            results[idx] = result
+    return results
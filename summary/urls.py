@@ -5,8 +5,17 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('process/<str:video_id>/', views.process_video, name='process_video'),
     path('process-multi/', views.process_multiple, name='process_multiple'),
+    path('jobs/<uuid:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<uuid:job_id>/retry/', views.retry_job, name='retry_job'),
+    path('jobs/<uuid:job_id>/status/', views.job_status, name='job_status'),
+    path('readyz/', views.readyz, name='readyz'),
+    path('metrics', views.metrics, name='metrics'),
+    path('profiles/', views.profile_list, name='profile_list'),
+    path('profiles/<int:pk>.prof', views.profile_download, name='profile_download'),
+    path('audio/<str:artifact_id>.mp3', views.audio_file, name='audio_file'),
     path('step/<str:video_id>/', views.show_process, name='show_process'),
     path('step/<str:video_id>/transcribe/', views.transcribe_step, name='transcribe_step'),
+    path('step/<str:video_id>/transcribe/stream/', views.transcribe_stream, name='transcribe_stream'),
     path('step/<str:video_id>/summarize/', views.summarize_step, name='summarize_step'),
     path('step/<str:video_id>/script/', views.generate_script_step, name='generate_script_step'),
     path('step/<str:video_id>/synthesize/', views.synthesize_step, name='synthesize_step'),
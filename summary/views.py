@@ -1,11 +1,30 @@
+import json
 import os
-import base64
-from django.shortcuts import render, redirect
-from . import pipeline_proxy
+import re
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.handlers.asgi import ASGIRequest
+from django.shortcuts import get_object_or_404, render, redirect
+from django.views.decorators.http import require_POST, require_safe
+from . import artifacts, jobs, pipeline_proxy, stages
+from .models import PipelineJob, ProfileRecord
 
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
 
-def index(request):
-    """Search YouTube videos and display results."""
+
+async def index(request):
+    """Search YouTube videos and display results.
+
+    Several video URLs or IDs may be entered separated by spaces or commas;
+    they are looked up concurrently.
+    """
     keyword = request.GET.get("keyword", "")
     video_url = request.GET.get("video_url", "")
     lang = request.GET.get("lang", "any")
@@ -30,13 +49,16 @@ def index(request):
             error += "YouTube API key (YT_KEY) is not configured."
         else:
             if video_url:
-                vid = pipeline_proxy.extract_video_id(video_url)
-                if vid:
+                vids = [
+                    pipeline_proxy.extract_video_id(item)
+                    for item in re.split(r"[\s,]+", video_url.strip())
+                    if item
+                ]
+                if vids and all(vids):
                     try:
-                        info = pipeline_proxy.get_video_info(yt_key, vid)
-                        if info:
-                            results = [info]
-                        else:
+                        infos = await pipeline_proxy.get_video_infos_async(yt_key, vids)
+                        results = [info for info in infos if info]
+                        if len(results) < len(infos):
                             error += "Video not found."
                     except Exception as e:
                         results = []
@@ -45,7 +67,7 @@ def index(request):
                     error += "Invalid video URL or ID."
             elif keyword:
                 try:
-                    results = pipeline_proxy.search_videos(
+                    results = await pipeline_proxy.search_videos_async(
                         yt_key,
                         keyword,
                         lang,
@@ -89,125 +111,181 @@ def index(request):
 
 
 def process_video(request, video_id):
-    """Run pipeline on selected video."""
-    errors = []
-    steps = []
-    transcript = ""
-    try:
-        transcript = pipeline_proxy.download_and_transcribe(video_id)
-        steps.append("transcribed")
-    except Exception as e:
-        errors.append(str(e))
-    script_lang = request.GET.get("lang", "ja")
-    audio_lang = request.GET.get("audio", "ja-JP")
-    gemini_key = os.environ.get("GEMINI_API_KEY")
-    credentials = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
-    if not gemini_key:
-        errors.append("Gemini API key (GEMINI_API_KEY) is not configured.")
-    if not credentials:
-        errors.append("Google Cloud credentials are not configured.")
+    """Queue the pipeline for the selected video and show its job page."""
+    job = jobs.submit_job(
+        [video_id],
+        script_lang=request.GET.get("lang", "ja"),
+        audio_lang=request.GET.get("audio", "ja-JP"),
+        profile=getattr(request, "profiling", False),
+    )
+    return redirect("job_detail", job_id=job.pk)
 
-    script = transcript
-    if not errors and gemini_key and transcript:
-        try:
-            script = pipeline_proxy.summarize_with_gemini(
-                gemini_key, transcript, lang=script_lang
-            )
-            steps.append("summarized")
-        except Exception as e:
-            errors.append(str(e))
-    if not errors and gemini_key and script:
-        try:
-            script = pipeline_proxy.generate_discussion_script(
-                gemini_key, script, lang=script_lang
-            )
-            steps.append("script generated")
-        except Exception as e:
-            errors.append(str(e))
 
-    audio_b64 = None
-    if not errors and credentials and script:
-        try:
-            audio = pipeline_proxy.synthesize_text_to_mp3(
-                script, language_code=audio_lang
-            )
-            audio_b64 = base64.b64encode(audio).decode("utf-8")
-            steps.append("audio created")
-        except Exception as e:
-            errors.append(str(e))
+def process_multiple(request):
+    """Queue one pipeline run for multiple videos selected from search results."""
+    video_ids = request.POST.getlist("video_ids")
+    if not video_ids:
+        return redirect("index")
+    job = jobs.submit_job(
+        video_ids,
+        script_lang=request.POST.get("script_lang", "ja"),
+        audio_lang=request.POST.get("audio_lang", "ja-JP"),
+        profile=getattr(request, "profiling", False),
+    )
+    return redirect("job_detail", job_id=job.pk)
+
 
+def job_detail(request, job_id):
+    """Display a job page that polls for progress until the job finishes."""
+    job = get_object_or_404(PipelineJob, pk=job_id)
+    jobs.expire_if_stale(job)
     context = {
-        "video_id": video_id,
-        "script": script,
-        "audio_b64": audio_b64,
-        "error": " ".join(errors) if errors else None,
-        "steps": "\n".join(steps) if steps else None,
+        "job": job,
+        "script": job.script if job.finished else None,
+        "audio_id": job.audio_id or None,
+        "error": job.error or None,
+        "steps": "\n".join(job.steps) if job.steps else None,
     }
-    return render(request, "summary/process.html", context)
+    return render(request, "summary/job.html", context)
 
 
-def process_multiple(request):
-    """Process multiple videos selected from search results."""
-    video_ids = request.POST.getlist("video_ids")
-    script_lang = request.POST.get("script_lang", "ja")
-    audio_lang = request.POST.get("audio_lang", "ja-JP")
+@require_POST
+def retry_job(request, job_id):
+    """Queue a failed job again; stages that already succeeded are reused."""
+    job = get_object_or_404(PipelineJob, pk=job_id)
+    retry = jobs.submit_job(
+        job.video_ids,
+        script_lang=job.script_lang,
+        audio_lang=job.audio_lang,
+        profile=getattr(request, "profiling", False),
+    )
+    return redirect("job_detail", job_id=retry.pk)
 
-    transcripts = []
-    errors = []
-    steps = []
-    for vid in video_ids:
-        try:
-            transcripts.append(pipeline_proxy.download_and_transcribe(vid))
-            steps.append("transcribed")
-        except Exception as e:
-            errors.append(str(e))
-            break
-    combined = "\n".join(transcripts)
 
-    gemini_key = os.environ.get("GEMINI_API_KEY")
-    credentials = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
-    if not gemini_key:
-        errors.append("Gemini API key (GEMINI_API_KEY) is not configured.")
-    if not credentials:
-        errors.append("Google Cloud credentials are not configured.")
+def job_status(request, job_id):
+    """Return job status and per-stage progress as JSON."""
+    job = get_object_or_404(PipelineJob, pk=job_id)
+    jobs.expire_if_stale(job)
+    return JsonResponse(
+        {
+            "id": str(job.pk),
+            "video_ids": job.video_ids,
+            "status": job.status,
+            "stage": job.stage,
+            "steps": job.steps,
+            "error": job.error or None,
+            "finished": job.finished,
+            "audio_id": job.audio_id or None,
+        }
+    )
 
-    script = combined
-    if not errors and gemini_key and combined:
-        try:
-            script = pipeline_proxy.summarize_with_gemini(
-                gemini_key, combined, lang=script_lang
-            )
-            steps.append("summarized")
-        except Exception as e:
-            errors.append(str(e))
-    if not errors and gemini_key and script:
-        try:
-            script = pipeline_proxy.generate_discussion_script(
-                gemini_key, script, lang=script_lang
-            )
-            steps.append("script generated")
-        except Exception as e:
-            errors.append(str(e))
 
-    audio_b64 = None
-    if not errors and credentials and script:
-        try:
-            audio = pipeline_proxy.synthesize_text_to_mp3(
-                script, language_code=audio_lang
-            )
-            audio_b64 = base64.b64encode(audio).decode("utf-8")
-            steps.append("audio created")
-        except Exception as e:
-            errors.append(str(e))
+def _read_range(path, start: int, length: int, block_size: int = 64 * 1024):
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while length > 0:
+            data = fh.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
 
-    context = {
-        "video_ids": video_ids,
-        "script": script,
-        "audio_b64": audio_b64,
-        "error": " ".join(errors) if errors else None,
-        "steps": "\n".join(steps) if steps else None,
+
+def readyz(request):
+    """Report readiness once opt-in Whisper preloading has finished.
+
+    A failed preload is reported as ``error`` so it is not mistaken for a
+    slow one.
+    """
+    ready = pipeline_proxy.whisper_ready()
+    data = {"ready": ready}
+    error = None if ready else pipeline_proxy.whisper_preload_error()
+    if error is not None:
+        data["error"] = f"Whisper preload failed: {error!r}"
+    return JsonResponse(data, status=200 if ready else 503)
+
+
+@require_safe
+def metrics(request):
+    """Expose pipeline metrics of this worker in Prometheus text format.
+
+    When ``METRICS_TOKEN`` is set, requests must send it as a bearer token.
+    """
+    token = os.environ.get("METRICS_TOKEN")
+    if token and request.headers.get("Authorization", "") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(
+        pipeline_proxy.render_metrics(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@staff_member_required
+def profile_list(request):
+    """List the slowest stored profiles with their top hotspots."""
+    kind = request.GET.get("kind", "")
+    records = ProfileRecord.objects.defer("stats").order_by("-duration")
+    if kind:
+        records = records.filter(kind=kind)
+    context = {"records": records[:50], "kind": kind, "kinds": ProfileRecord.KIND_CHOICES}
+    return render(request, "summary/profiles.html", context)
+
+
+@staff_member_required
+def profile_download(request, pk):
+    """Return raw stats of a profile, readable with ``pstats`` or snakeviz."""
+    record = get_object_or_404(ProfileRecord, pk=pk)
+    response = HttpResponse(bytes(record.stats), content_type="application/octet-stream")
+    response["Content-Disposition"] = f'attachment; filename="profile-{record.pk}.prof"'
+    return response
+
+
+@require_safe
+def audio_file(request, artifact_id):
+    """Serve generated audio with ETag, Content-Length and Range support."""
+    path = artifacts.audio_path(artifact_id)
+    if path is None:
+        raise Http404("Audio not found.")
+    size = path.stat().st_size
+    etag = f'"{artifact_id}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
     }
-    return render(request, "summary/multi_process.html", context)
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+    # Only a single byte range is served partially; multiple ranges and
+    # headers that do not parse are ignored and the whole file is sent.
+    if_range = request.headers.get("If-Range")
+    match = _RANGE_RE.match(request.headers.get("Range", "").strip())
+    if match and (match.group(1) or match.group(2)) and if_range in (None, etag):
+        if match.group(1):
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else size - 1
+        else:
+            start = max(size - int(match.group(2)), 0)
+            end = size - 1
+        end = min(end, size - 1)
+        if start > end:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            _read_range(path, start, length), status=206, content_type="audio/mpeg"
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        response = FileResponse(open(path, "rb"), content_type="audio/mpeg")
+    for name, value in headers.items():
+        response[name] = value
+    return response
 
 
 # New step-by-step endpoints
@@ -216,103 +294,167 @@ def show_process(request, video_id):
     context = {
         "video_id": video_id,
         "script": request.session.get("script"),
-        "audio_b64": request.session.get("audio_b64"),
+        "audio_id": request.session.get("audio_id"),
         "error": request.session.get("error"),
         "steps": "\n".join(request.session.get("steps", [])) or None,
     }
     return render(request, "summary/process.html", context)
 
 
-def transcribe_step(request, video_id):
+async def transcribe_step(request, video_id):
     """Run transcription step."""
-    steps = request.session.get("steps", [])
+    steps = await request.session.aget("steps", [])
     try:
-        transcript = pipeline_proxy.download_and_transcribe(video_id)
-        request.session["transcript"] = transcript
-        steps.append("transcribed")
-        request.session["error"] = ""
+        transcript, reused = await stages.arun_stage(
+            stages.STAGES["transcribe"], {"video_id": video_id}
+        )
+        await request.session.aset("transcript", transcript)
+        steps.append("transcribed (reused)" if reused else "transcribed")
+        await request.session.aset("error", "")
     except Exception as e:
-        request.session["error"] = str(e)
-    request.session["steps"] = steps
+        await request.session.aset("error", str(e))
+    await request.session.aset("steps", steps)
     return redirect("show_process", video_id=video_id)
 
 
-def summarize_step(request, video_id):
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def transcribe_stream(request, video_id):
+    """Stream transcript segments as server-sent events while Whisper decodes.
+
+    Each ``segment`` event (``start``, ``end`` and ``text``) is sent as soon
+    as it is decoded. Under ASGI transcription runs on the bounded Whisper
+    executor and the response is an async stream; WSGI servers would buffer
+    an async stream until it ends, so there the response iterates the
+    segments synchronously in the worker thread instead. When the transcript
+    is complete it is stored in the session (the pipeline keeps it in the
+    transcript store for the later steps) and a ``done`` event is sent;
+    failures end the stream with ``error``.
+    """
+    # Mark the session as modified so the middleware issues the cookie before
+    # streaming starts; the generator saves the same session at the end.
+    steps = await request.session.aget("steps", [])
+    await request.session.aset("steps", steps)
+    finished = {"steps": steps + ["transcribed"], "error": ""}
+
+    async def aevents():
+        texts = []
+        try:
+            async for seg in pipeline_proxy.iter_transcript_segments_async(video_id):
+                texts.append(seg["text"])
+                yield _sse("segment", seg)
+        except Exception as e:
+            await request.session.aset("error", str(e))
+            await request.session.asave()
+            yield _sse("error", {"error": str(e)})
+            return
+        transcript = pipeline_proxy.join_segments(texts)
+        await stages.astore(stages.STAGES["transcribe"], {"video_id": video_id}, transcript)
+        for key, value in {"transcript": transcript, **finished}.items():
+            await request.session.aset(key, value)
+        await request.session.asave()
+        yield _sse("done", {"characters": sum(len(text) for text in texts)})
+
+    def events():
+        texts = []
+        try:
+            for seg in pipeline_proxy.iter_transcript_segments(video_id):
+                texts.append(seg["text"])
+                yield _sse("segment", seg)
+        except Exception as e:
+            request.session["error"] = str(e)
+            request.session.save()
+            yield _sse("error", {"error": str(e)})
+            return
+        transcript = pipeline_proxy.join_segments(texts)
+        stages.store(stages.STAGES["transcribe"], {"video_id": video_id}, transcript)
+        request.session.update({"transcript": transcript, **finished})
+        request.session.save()
+        yield _sse("done", {"characters": sum(len(text) for text in texts)})
+
+    stream = aevents() if isinstance(request, ASGIRequest) else events()
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def summarize_step(request, video_id):
     """Run summarization step."""
-    steps = request.session.get("steps", [])
-    transcript = request.session.get("transcript")
+    steps = await request.session.aget("steps", [])
+    transcript = await request.session.aget("transcript")
     gemini_key = os.environ.get("GEMINI_API_KEY")
     if not gemini_key:
-        request.session["error"] = "Gemini API key (GEMINI_API_KEY) is not configured."
+        await request.session.aset("error", "Gemini API key (GEMINI_API_KEY) is not configured.")
     elif not transcript:
-        request.session["error"] = "No transcript to summarize."
+        await request.session.aset("error", "No transcript to summarize.")
     else:
         try:
-            summary = pipeline_proxy.summarize_with_gemini(
-                gemini_key,
-                transcript,
-                lang=request.GET.get("lang", "ja"),
+            summary, reused = await stages.arun_stage(
+                stages.STAGES["summarize"],
+                {"transcript": transcript, "script_lang": request.GET.get("lang", "ja")},
             )
-            request.session["summary"] = summary
-            steps.append("summarized")
-            request.session["error"] = ""
+            await request.session.aset("summary", summary)
+            steps.append("summarized (reused)" if reused else "summarized")
+            await request.session.aset("error", "")
         except Exception as e:
-            request.session["error"] = str(e)
-    request.session["steps"] = steps
+            await request.session.aset("error", str(e))
+    await request.session.aset("steps", steps)
     return redirect("show_process", video_id=video_id)
 
 
-def generate_script_step(request, video_id):
+async def generate_script_step(request, video_id):
     """Create discussion script from summary."""
-    steps = request.session.get("steps", [])
-    summary = request.session.get("summary")
+    steps = await request.session.aget("steps", [])
+    summary = await request.session.aget("summary")
     gemini_key = os.environ.get("GEMINI_API_KEY")
     if not gemini_key:
-        request.session["error"] = "Gemini API key (GEMINI_API_KEY) is not configured."
+        await request.session.aset("error", "Gemini API key (GEMINI_API_KEY) is not configured.")
     elif not summary:
-        request.session["error"] = "No summary to convert into script."
+        await request.session.aset("error", "No summary to convert into script.")
     else:
         try:
-            script = pipeline_proxy.generate_discussion_script(
-                gemini_key,
-                summary,
-                lang=request.GET.get("lang", "ja"),
+            script, reused = await stages.arun_stage(
+                stages.STAGES["script"],
+                {"summary": summary, "script_lang": request.GET.get("lang", "ja")},
             )
-            request.session["script"] = script
-            steps.append("script generated")
-            request.session["error"] = ""
+            await request.session.aset("script", script)
+            steps.append("script generated (reused)" if reused else "script generated")
+            await request.session.aset("error", "")
         except Exception as e:
-            request.session["error"] = str(e)
-    request.session["steps"] = steps
+            await request.session.aset("error", str(e))
+    await request.session.aset("steps", steps)
     return redirect("show_process", video_id=video_id)
 
 
-def synthesize_step(request, video_id):
+async def synthesize_step(request, video_id):
     """Generate MP3 audio from script."""
-    steps = request.session.get("steps", [])
-    script = request.session.get("script")
+    steps = await request.session.aget("steps", [])
+    script = await request.session.aget("script")
     credentials = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
     if not credentials:
-        request.session["error"] = "Google Cloud credentials are not configured."
+        await request.session.aset("error", "Google Cloud credentials are not configured.")
     elif not script:
-        request.session["error"] = "No script to synthesize."
+        await request.session.aset("error", "No script to synthesize.")
     else:
         try:
-            audio = pipeline_proxy.synthesize_text_to_mp3(
-                script,
-                language_code=request.GET.get("audio", "ja-JP"),
+            audio_id, reused = await stages.arun_stage(
+                stages.STAGES["synthesize"],
+                {"script": script, "audio_lang": request.GET.get("audio", "ja-JP")},
             )
-            request.session["audio_b64"] = base64.b64encode(audio).decode("utf-8")
-            steps.append("audio created")
-            request.session["error"] = ""
+            await request.session.aset("audio_id", audio_id)
+            steps.append("audio created (reused)" if reused else "audio created")
+            await request.session.aset("error", "")
         except Exception as e:
-            request.session["error"] = str(e)
-    request.session["steps"] = steps
+            await request.session.aset("error", str(e))
+    await request.session.aset("steps", steps)
     return redirect("show_process", video_id=video_id)
 
 
 def clear_process(request, video_id):
     """Clear session data for a video."""
-    for key in ["transcript", "summary", "script", "audio_b64", "steps", "error"]:
+    for key in ["transcript", "summary", "script", "audio_id", "audio_b64", "steps", "error"]:
         request.session.pop(key, None)
     return redirect("show_process", video_id=video_id)
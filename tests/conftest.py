@@ -0,0 +1,81 @@
+import os
+import sys
+import types
+
+import django
+import pytest
+
+root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if root not in sys.path:
+    sys.path.insert(0, root)
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'slower_site.settings')
+django.setup()
+
+
+@pytest.fixture(scope='session')
+def django_test_db():
+    """Create the test database once and migrate it."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    yield
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture
+def db(django_test_db, settings_override):
+    """Give each test empty tables and a private artifact directory."""
+    from django.core.management import call_command
+
+    yield
+    call_command('flush', verbosity=0, interactive=False)
+
+
+@pytest.fixture
+def settings_override(tmp_path):
+    from django.test import override_settings
+
+    with override_settings(ARTIFACT_ROOT=tmp_path / 'artifacts'):
+        yield
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    """Replace the pipeline behind ``summary.pipeline_proxy`` with fakes.
+
+    Tests override attributes of the returned namespace as needed.
+    """
+    from summary import pipeline_proxy
+
+    def transcribe(vid, **kwargs):
+        fake.calls.append(('transcribe', vid))
+        fake.transcripts[vid] = f'transcript of {vid}'
+        return fake.transcripts[vid]
+
+    def transcribe_videos(vids, on_result=None, **kwargs):
+        results = []
+        for vid in vids:
+            result = {'videoId': vid, 'transcript': transcribe(vid), 'error': None}
+            if on_result is not None:
+                on_result(result)
+            results.append(result)
+        return results
+
+    fake = types.SimpleNamespace(
+        calls=[],
+        transcripts={},
+        download_and_transcribe=transcribe,
+        cached_transcript=lambda video_id: fake.transcripts.get(video_id),
+        transcribe_videos=transcribe_videos,
+        summarize_with_gemini=lambda key, text, lang='ja': 'summary: ' + text,
+        generate_discussion_script=lambda key, text, lang='ja': 'A: ' + text,
+        synthesize_text_to_mp3=lambda text, **kwargs: b'ID3' + text.encode('utf-8'),
+    )
+    monkeypatch.setattr(pipeline_proxy, '_get_pipeline', lambda: fake)
+    monkeypatch.setenv('GEMINI_API_KEY', 'key')
+    monkeypatch.setenv('GOOGLE_APPLICATION_CREDENTIALS', 'credentials.json')
+    return fake
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+
+from summary import jobs
+from summary.models import PipelineJob, StageArtifact
+
+pytestmark = pytest.mark.usefixtures('db')
+
+
+class InlineExecutor:
+    def submit(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+@pytest.fixture
+def inline_jobs(monkeypatch):
+    monkeypatch.setattr(jobs, '_get_executor', lambda: InlineExecutor())
+
+
+def test_submit_job_runs_all_stages(fake_pipeline, inline_jobs):
+    job = jobs.submit_job(['abc'], script_lang='en', audio_lang='en-US')
+    job.refresh_from_db()
+    assert job.status == PipelineJob.DONE
+    assert job.steps == ['transcribed', 'summarized', 'script generated', 'audio created']
+    assert job.script == 'A: summary: transcript of abc'
+    assert len(job.audio_id) == 64
+    assert job.pk not in jobs._ACTIVE_JOBS
+
+
+def test_job_status_reports_progress_as_json(fake_pipeline, inline_jobs):
+    job = jobs.submit_job(['a', 'b'])
+    data = Client().get(f'/jobs/{job.pk}/status/').json()
+    assert data['status'] == 'done'
+    assert data['finished'] is True
+    assert data['steps'][:2] == ['transcribed a', 'transcribed b']
+    assert data['audio_id'] == job.__class__.objects.get(pk=job.pk).audio_id
+
+
+def test_failed_job_records_error_and_retry_reuses_finished_stages(
+    fake_pipeline, inline_jobs
+):
+    def broken_tts(text, **kwargs):
+        raise RuntimeError('tts down')
+
+    fake_pipeline.synthesize_text_to_mp3 = broken_tts
+    job = jobs.submit_job(['abc'])
+    job.refresh_from_db()
+    assert job.status == PipelineJob.FAILED
+    assert job.error == 'tts down'
+
+    fake_pipeline.synthesize_text_to_mp3 = lambda text, **kwargs: b'ID3audio'
+    response = Client().post(f'/jobs/{job.pk}/retry/')
+    retry = PipelineJob.objects.exclude(pk=job.pk).get()
+    assert response.status_code == 302
+    assert response['Location'] == f'/jobs/{retry.pk}/'
+    assert retry.status == PipelineJob.DONE
+    assert retry.steps[:3] == [
+        'transcribed (reused)',
+        'summarized (reused)',
+        'script generated (reused)',
+    ]
+    assert fake_pipeline.calls == [('transcribe', 'abc')]
+
+
+def test_finished_jobs_prune_stage_artifacts(fake_pipeline, inline_jobs, monkeypatch):
+    monkeypatch.setenv('STAGE_ARTIFACT_MAX_ROWS', '1')
+    jobs.submit_job(['abc'])
+    assert StageArtifact.objects.count() == 1
+
+
+def test_stale_jobs_are_marked_failed(fake_pipeline):
+    stale = PipelineJob.objects.create(video_ids=['a'], status=PipelineJob.RUNNING)
+    fresh = PipelineJob.objects.create(video_ids=['b'], status=PipelineJob.RUNNING)
+    PipelineJob.objects.filter(pk=stale.pk).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+    client = Client()
+    data = client.get(f'/jobs/{stale.pk}/status/').json()
+    assert data['status'] == 'failed' and data['finished'] is True
+    assert 'stopped' in data['error']
+    assert client.get(f'/jobs/{fresh.pk}/status/').json()['status'] == 'running'
+    assert b'retry' in client.get(f'/jobs/{stale.pk}/').content
+
+
+def test_heartbeat_keeps_tracked_jobs_fresh(monkeypatch):
+    monkeypatch.setattr(jobs, '_HEARTBEAT', None)
+    monkeypatch.setattr(jobs.threading.Thread, 'start', lambda self: None)
+    job = PipelineJob.objects.create(video_ids=['a'], status=PipelineJob.RUNNING)
+    PipelineJob.objects.filter(pk=job.pk).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+    jobs._track(job.pk)
+    try:
+        jobs._beat()
+        assert not jobs.expire_if_stale(job)
+        job.refresh_from_db()
+        assert job.status == PipelineJob.RUNNING
+    finally:
+        jobs._ACTIVE_JOBS.discard(job.pk)
@@ -1,4 +1,5 @@
 import sys
+import time
 import types
 import os
 root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -10,10 +11,14 @@ if root not in sys.path:
 ga = types.ModuleType('googleapiclient')
 discovery = types.ModuleType('googleapiclient.discovery')
 discovery.build = lambda *args, **kwargs: None
+ga_http = types.ModuleType('googleapiclient.http')
+ga_http.build_http = lambda: None
 
 ga.discovery = discovery
+ga.http = ga_http
 sys.modules['googleapiclient'] = ga
 sys.modules['googleapiclient.discovery'] = discovery
+sys.modules['googleapiclient.http'] = ga_http
 
 # google.cloud.texttospeech_v1 stub
 gc = types.ModuleType('google.cloud')
@@ -68,6 +73,22 @@ sys.modules['google'] = google_pkg
 sys.modules['google.generativeai'] = genai
 
 import pipeline
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    """Keep on-disk caches out of the working tree and fresh per test."""
+    monkeypatch.setenv('TRANSCRIPT_CACHE_DIR', str(tmp_path / 'cache' / 'transcripts'))
+    monkeypatch.setenv('GEMINI_CACHE_DIR', str(tmp_path / 'cache' / 'gemini'))
+    monkeypatch.setenv('TTS_CACHE_DIR', str(tmp_path / 'cache' / 'tts'))
+    monkeypatch.setenv('TTS_RATE_LIMIT', '0')
+    pipeline._DISK_CACHES.clear()
+    pipeline.reset_clients()
+    pipeline._SEARCH_CACHE.clear()
+    pipeline._QUOTA_USAGE.clear()
+    pipeline._CHANNEL_STATS.clear()
+    pipeline._CHANNEL_STATS_LOADED_FROM = None
 
 
 def test_extract_video_id_direct():
@@ -120,3 +141,949 @@ def test_whisper_compute_type_env_passed():
     faster_whisper_stub.init_calls.clear()
     pipeline._get_whisper_model('base')
     assert faster_whisper_stub.init_calls == [('base', 'float16')]
+
+
+class FakeYDL:
+    calls = []
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        FakeYDL.calls.append(url)
+        return {"url": url}
+
+    def prepare_filename(self, info):
+        return self.opts["outtmpl"].replace("%(ext)s", "webm")
+
+
+class FakeTranscriber:
+    def transcribe(self, path):
+        return {"text": "hello world"}
+
+
+def test_transcript_cache_hits_skip_download(monkeypatch, tmp_path):
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setattr(pipeline.yt_dlp, 'YoutubeDL', FakeYDL, raising=False)
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: FakeTranscriber())
+    FakeYDL.calls.clear()
+
+    first = pipeline.download_and_transcribe('abc', out_dir=str(tmp_path))
+    second = pipeline.download_and_transcribe('abc', out_dir=str(tmp_path))
+    assert first == second == 'hello world'
+    assert len(FakeYDL.calls) == 1
+    stats = pipeline.transcript_cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+    monkeypatch.setenv('WHISPER_MODEL', 'small')
+    pipeline.download_and_transcribe('abc', out_dir=str(tmp_path))
+    assert len(FakeYDL.calls) == 2
+
+
+def test_disk_cache_lru_eviction(tmp_path):
+    cache = pipeline._DiskCache(str(tmp_path), max_bytes=20)
+    cache.set('a', b'x' * 10)
+    os.utime(cache._path('a'), (1, 1))
+    cache.set('b', b'y' * 10)
+    os.utime(cache._path('b'), (2, 2))
+    assert cache.get('a') == b'x' * 10
+    cache.set('c', b'z' * 10)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_transcribe_videos_keeps_order_and_isolates_failures(monkeypatch, tmp_path):
+    monkeypatch.setenv('TRANSCRIPT_CACHE', '0')
+
+    def fake_download(video_id, *, out_dir):
+        if video_id == 'bad':
+            raise RuntimeError('unavailable')
+        return video_id
+
+    monkeypatch.setattr(pipeline, 'download_audio', fake_download)
+    monkeypatch.setattr(pipeline, 'transcribe_file', lambda path: f'text {path}')
+    finished = []
+    results = pipeline.transcribe_videos(
+        ['a', 'bad', 'c'], transcribe_workers=1, on_result=finished.append
+    )
+    assert [r['transcript'] for r in results] == ['text a', None, 'text c']
+    assert results[1]['error'] == 'unavailable'
+    assert sorted(r['videoId'] for r in finished) == ['a', 'bad', 'c']
+
+
+def test_split_tts_text_respects_byte_limit():
+    script = 'A: こんにちは。今日は天気です。\nB: そうですね。\n' + 'C: ' + 'あ' * 40 + '。'
+    chunks = pipeline._split_tts_text(script, 80)
+    assert all(len(c.encode('utf-8')) <= 80 for c in chunks)
+    assert ''.join(chunks).replace('\n', '') == script.replace('\n', '')
+    assert chunks[0].startswith('A: ') and 'B: そうですね。' in chunks[0]
+
+
+class FakeTTS:
+    class TextToSpeechClient:
+        instances = 0
+
+        def __init__(self):
+            FakeTTS.TextToSpeechClient.instances += 1
+
+        def synthesize_speech(self, request):
+            text = request['input'].text
+            return types.SimpleNamespace(audio_content=b'ID3\x00\x00\x00\x00\x00\x00\x01X' + text.encode())
+
+    SynthesisInput = types.SimpleNamespace
+    VoiceSelectionParams = types.SimpleNamespace
+    AudioConfig = types.SimpleNamespace
+    AudioEncoding = types.SimpleNamespace(MP3=1)
+
+
+def test_synthesize_chunks_concurrently_in_order(monkeypatch):
+    monkeypatch.setattr(pipeline, 'texttospeech', FakeTTS)
+    monkeypatch.setenv('TTS_MAX_BYTES', '10')
+    monkeypatch.setenv('TTS_CONCURRENCY', '3')
+    FakeTTS.TextToSpeechClient.instances = 0
+    audio = pipeline.synthesize_text_to_mp3('A: one.\nB: two.\nA: three.')
+    assert audio == b'ID3\x00\x00\x00\x00\x00\x00\x01XA: one.B: two.A: three.'
+    assert FakeTTS.TextToSpeechClient.instances == 1
+
+
+class FakeGeminiModel:
+    prompts = []
+
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt):
+        FakeGeminiModel.prompts.append(prompt)
+        return types.SimpleNamespace(text=f'summary{len(FakeGeminiModel.prompts)}')
+
+
+def fake_genai():
+    return types.SimpleNamespace(configure=lambda **kw: None, GenerativeModel=FakeGeminiModel)
+
+
+def test_summarize_with_gemini_map_reduce(monkeypatch):
+    monkeypatch.setattr(pipeline, 'genai', fake_genai())
+    monkeypatch.setenv('GEMINI_CHUNK_CHARS', '20')
+    FakeGeminiModel.prompts = []
+    text = '\n'.join(['first segment here.', 'second segment here.', 'third segment.'])
+    result = pipeline.summarize_with_gemini('key', text, lang='en')
+    map_prompts = FakeGeminiModel.prompts[:-1]
+    assert len(map_prompts) == 3
+    assert all('(' in p and '/3)' in p for p in map_prompts)
+    assert result == 'summary4'
+    assert 'summary1' in FakeGeminiModel.prompts[-1]
+
+
+def test_summarize_with_gemini_short_text_single_call(monkeypatch):
+    monkeypatch.setattr(pipeline, 'genai', fake_genai())
+    FakeGeminiModel.prompts = []
+    assert pipeline.summarize_with_gemini('key', 'short', lang='ja') == 'summary1'
+    assert FakeGeminiModel.prompts == ['次の内容をjaでゆっくり解説してください:\nshort']
+
+
+def test_gemini_responses_cached_by_model_prompt_and_lang(monkeypatch):
+    monkeypatch.setattr(pipeline, 'genai', fake_genai())
+    FakeGeminiModel.prompts = []
+    first = pipeline.generate_discussion_script('key', 'summary', lang='ja')
+    second = pipeline.generate_discussion_script('key', 'summary', lang='ja')
+    assert first == second
+    assert len(FakeGeminiModel.prompts) == 1
+    pipeline.generate_discussion_script('key', 'summary', lang='en')
+    monkeypatch.setenv('GEMINI_MODEL', 'models/other')
+    pipeline.generate_discussion_script('key', 'summary', lang='ja')
+    assert len(FakeGeminiModel.prompts) == 3
+    assert pipeline.gemini_cache_stats()['hits'] == 1
+
+
+def test_tts_cache_only_resynthesizes_changed_chunks(monkeypatch):
+    requests = []
+
+    class CountingClient(FakeTTS.TextToSpeechClient):
+        def synthesize_speech(self, request):
+            requests.append(request['input'].text)
+            return super().synthesize_speech(request)
+
+    tts_module = types.SimpleNamespace(**{k: getattr(FakeTTS, k) for k in dir(FakeTTS) if not k.startswith('_')})
+    tts_module.TextToSpeechClient = CountingClient
+    monkeypatch.setattr(pipeline, 'texttospeech', tts_module)
+    monkeypatch.setenv('TTS_MAX_BYTES', '12')
+    script = 'A: one.\nB: two.\nA: three.'
+    first = pipeline.synthesize_text_to_mp3(script)
+    assert pipeline.synthesize_text_to_mp3(script) == first
+    calls = len(requests)
+    pipeline.synthesize_text_to_mp3('A: one.\nB: 2.\nA: three.')
+    assert requests[calls:] == ['B: 2.']
+    pipeline.synthesize_text_to_mp3(script, speaking_rate=1.2)
+    assert len(requests) == 2 * calls + 1
+
+
+def test_clients_are_reused_until_reset(monkeypatch):
+    built = []
+    monkeypatch.setattr(pipeline, 'build', lambda *a, **kw: built.append(kw) or object())
+    monkeypatch.setattr(pipeline, 'texttospeech', FakeTTS)
+    monkeypatch.setattr(pipeline, 'genai', fake_genai())
+    yt = pipeline._get_youtube_client('key')
+    assert pipeline._get_youtube_client('key') is yt
+    assert built[0]['static_discovery'] is True
+    tts_client = pipeline._get_tts_client()
+    assert pipeline._get_tts_client() is tts_client
+    model = pipeline._get_gemini_model('key', 'models/x')
+    assert pipeline._get_gemini_model('key', 'models/x') is model
+
+    pipeline.reset_clients()
+    assert pipeline._get_youtube_client('key') is not yt
+    assert pipeline._get_tts_client() is not tts_client
+    assert len(built) == 2
+
+
+class FakeRequest:
+    def __init__(self, calls, name, response):
+        self.calls = calls
+        self.name = name
+        self.response = response
+
+    def execute(self):
+        self.calls.append(self.name)
+        return self.response
+
+
+class FakeYouTube:
+    """Serves ``videos`` as pages of search results with fixed statistics."""
+
+    def __init__(self, videos, page_size=50):
+        self.items = videos
+        self.page_size = page_size
+        self.calls = []
+        self.channel_requests = []
+
+    def search(self):
+        return self
+
+    def videos(self):
+        return types.SimpleNamespace(list=self._videos_list)
+
+    def channels(self):
+        return types.SimpleNamespace(list=self._channels_list)
+
+    def list(self, **params):
+        start = int(params.get('pageToken') or 0)
+        page = self.items[start : start + self.page_size]
+        response = {'items': [{'id': {'videoId': v['id']}} for v in page]}
+        if start + self.page_size < len(self.items):
+            response['nextPageToken'] = str(start + self.page_size)
+        return FakeRequest(self.calls, 'search', response)
+
+    def _videos_list(self, part, id):
+        wanted = id.split(',')
+        items = [
+            {
+                'id': v['id'],
+                'snippet': {'title': v['id'], 'channelId': v['channel']},
+                'statistics': {'viewCount': str(v['views'])},
+                'contentDetails': {'duration': 'PT5M'},
+            }
+            for v in self.items if v['id'] in wanted
+        ]
+        return FakeRequest(self.calls, 'videos', {'items': items})
+
+    def _channels_list(self, part, id):
+        ids = id.split(',')
+        self.channel_requests.append(ids)
+        items = [{'id': c, 'statistics': {'subscriberCount': '1000'}} for c in ids]
+        return FakeRequest(self.calls, 'channels', {'items': items})
+
+
+def test_search_results_cached_and_quota_counted(monkeypatch):
+    videos = [{'id': f'v{i}', 'channel': f'c{i % 2}', 'views': 10 * i} for i in range(6)]
+    youtube = FakeYouTube(videos)
+    monkeypatch.setattr(pipeline, '_get_youtube_client', lambda key: youtube)
+    first = pipeline.search_videos('key', ' Python  Tips', 'any', max_results=3)
+    first[0]['title'] = 'mutated'
+    second = pipeline.search_videos('key', 'python tips', 'any', max_results=3)
+    assert [r['videoId'] for r in second] == ['v0', 'v1', 'v2']
+    assert second[0]['title'] == 'v0'
+    assert youtube.calls == ['search', 'videos', 'channels']
+    usage = pipeline.youtube_quota_usage()
+    assert usage['search.list'] == {'calls': 1, 'units': 100}
+    assert usage['total_units'] == 102
+    assert pipeline.search_cache_stats()['hits'] == 1
+    pipeline.search_videos('key', 'python tips', 'any', max_results=3, min_view_count=20)
+    assert youtube.calls.count('search') == 2
+
+
+def test_search_follows_pages_until_enough_results(monkeypatch):
+    videos = [{'id': f'v{i}', 'channel': 'c', 'views': 1000 if i % 10 == 9 else 0} for i in range(100)]
+    youtube = FakeYouTube(videos, page_size=20)
+    monkeypatch.setattr(pipeline, '_get_youtube_client', lambda key: youtube)
+    results = pipeline.search_videos('key', 'kw', 'any', max_results=3, min_view_count=500)
+    assert [r['videoId'] for r in results] == ['v9', 'v19', 'v29']
+    assert youtube.calls.count('search') == 2
+
+
+def test_search_stops_at_page_budget(monkeypatch):
+    videos = [{'id': f'v{i}', 'channel': 'c', 'views': 0} for i in range(100)]
+    youtube = FakeYouTube(videos, page_size=10)
+    monkeypatch.setattr(pipeline, '_get_youtube_client', lambda key: youtube)
+    monkeypatch.setenv('YT_SEARCH_MAX_PAGES', '3')
+    assert pipeline.search_videos('key', 'kw', 'any', min_view_count=1) == []
+    assert youtube.calls.count('search') == 3
+    youtube.calls.clear()
+    results = list(pipeline.iter_search_videos('key', 'kw', 'any', quota_budget=250))
+    assert len(results) == 20
+    assert youtube.calls.count('search') == 2
+
+
+def test_channel_stats_cached_and_persisted(monkeypatch, tmp_path):
+    stats_file = tmp_path / 'channels.json'
+    monkeypatch.setenv('YT_CHANNEL_STATS_FILE', str(stats_file))
+    videos = [{'id': f'v{i}', 'channel': f'c{i % 3}', 'views': 1} for i in range(6)]
+    youtube = FakeYouTube(videos)
+    monkeypatch.setattr(pipeline, '_get_youtube_client', lambda key: youtube)
+    pipeline.search_videos('key', 'first', 'any', max_results=6)
+    pipeline.search_videos('key', 'second', 'any', max_results=6)
+    assert len(youtube.channel_requests) == 1
+    assert sorted(youtube.channel_requests[0]) == ['c0', 'c1', 'c2']
+
+    pipeline._CHANNEL_STATS.clear()
+    pipeline._CHANNEL_STATS_LOADED_FROM = None
+    results = pipeline.search_videos('key', 'third', 'any', max_results=6)
+    assert len(youtube.channel_requests) == 1
+    assert results[0]['subscriberCount'] == 1000
+
+    monkeypatch.setenv('YT_CHANNEL_STATS_TTL', '0')
+    pipeline.search_videos('key', 'fourth', 'any', max_results=6)
+    assert len(youtube.channel_requests) == 2
+
+
+def test_preload_whisper_models_warms_up_and_marks_ready(monkeypatch):
+    class WarmModel:
+        def __init__(self):
+            self.inputs = []
+
+        def transcribe(self, audio):
+            self.inputs.append(audio)
+            return {'text': ''}
+
+    models = {}
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: models.setdefault(name, WarmModel()))
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setenv('WHISPER_PRELOAD', '1')
+    monkeypatch.setenv('WHISPER_PRELOAD_MODELS', 'tiny, base')
+    monkeypatch.setattr(pipeline, '_WHISPER_READY', pipeline.threading.Event())
+    assert not pipeline.whisper_ready()
+    assert pipeline.preload_whisper_models() == ['tiny', 'base']
+    assert pipeline.whisper_ready()
+    assert len(models['base'].inputs[0]) == 16000
+
+
+def test_whisper_model_cache_lru_budget(monkeypatch):
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setenv('WHISPER_CACHE_MAX_MB', '500')
+    pipeline._MODEL_CACHE.clear()
+    whisper_stub.load_calls.clear()
+    pipeline._get_whisper_model('tiny')
+    pipeline._get_whisper_model('base')
+    pipeline._get_whisper_model('tiny')
+    assert list(pipeline._MODEL_CACHE) == ['openai:base', 'openai:tiny']
+
+    pipeline._get_whisper_model('small')
+    stats = pipeline.whisper_cache_stats()
+    assert stats['models'] == ['openai:small']
+    assert stats['evictions'] >= 2
+    pipeline._get_whisper_model('tiny')
+    assert list(pipeline._MODEL_CACHE) == ['openai:tiny']
+    assert whisper_stub.load_calls == ['tiny', 'base', 'small', 'tiny']
+
+
+class FakeAudioProcess:
+    def __init__(self, pcm, returncode=0):
+        import io
+        self.stdout = io.BytesIO(pcm)
+        self.stderr = io.BytesIO(b'')
+        self.returncode = returncode
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+    def wait(self):
+        return self.returncode
+
+
+def test_stream_transcribe_windows_audio_incrementally(monkeypatch):
+    class WindowModel:
+        lengths = []
+
+        def transcribe(self, audio):
+            WindowModel.lengths.append(len(audio))
+            return {'segments': [{'start': 0.0, 'end': 1.0, 'text': f'[{len(audio)}]'}]}
+
+    pcm = b'\x00\x01' * (16000 * 5)
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setenv('WHISPER_STREAM', '1')
+    monkeypatch.setenv('WHISPER_STREAM_WINDOW', '2')
+    monkeypatch.setenv('TRANSCRIPT_CACHE', '0')
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: WindowModel())
+    monkeypatch.setattr(pipeline, '_open_audio_stream', lambda vid: FakeAudioProcess(pcm))
+    text = pipeline.download_and_transcribe('abc')
+    assert WindowModel.lengths == [32000, 32000, 16000]
+    assert text == '[32000]\n[32000]\n[16000]'
+
+    monkeypatch.setattr(pipeline, '_open_audio_stream', lambda vid: FakeAudioProcess(b'', returncode=1))
+    with pytest.raises(RuntimeError):
+        pipeline.download_and_transcribe('abc')
+
+
+def test_vad_sends_only_speech_and_restores_timestamps(monkeypatch):
+    import numpy as np
+
+    class SpeechModel:
+        def __init__(self):
+            self.lengths = []
+
+        def transcribe(self, audio):
+            self.lengths.append(len(audio))
+            return {'segments': [{'start': 0.5, 'end': 1.5, 'text': 'hi'}]}
+
+    monkeypatch.setenv('WHISPER_VAD', '1')
+    monkeypatch.setattr(pipeline, '_speech_timestamps', lambda audio: [(0, 16000), (48000, 64000)])
+    monkeypatch.setattr(pipeline, '_VAD_STATS', {'runs': 0, 'audio_seconds': 0.0, 'speech_seconds': 0.0})
+    model = SpeechModel()
+    audio = np.zeros(16000 * 10, dtype=np.float32)
+    segments = pipeline._transcribe_audio(model, audio, 'openai', offset=100.0)
+    assert model.lengths == [32000]
+    assert segments == [{'start': 100.5, 'end': 103.5, 'text': 'hi'}]
+    assert pipeline.vad_stats()['skipped_seconds'] == 8.0
+
+    monkeypatch.setattr(pipeline, '_speech_timestamps', lambda audio: [])
+    assert pipeline._transcribe_audio(model, audio, 'openai') == []
+    assert len(model.lengths) == 1
+
+
+def test_parallel_transcription_splits_at_silence_and_keeps_order(monkeypatch, tmp_path):
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+
+    class ChunkModel:
+        def transcribe(self, audio):
+            return {'segments': [{'start': 0.0, 'end': 1.0, 'text': f'[{len(audio)}]'}]}
+
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, 16000 * 60).astype(np.float32)
+    audio[16000 * 33:16000 * 34] = 0.0
+    points = pipeline._find_split_points(audio, 2)
+    assert 16000 * 33 <= points[0] < 16000 * 34
+
+    path = tmp_path / 'long.webm'
+    path.write_bytes(b'x')
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setenv('WHISPER_PARALLEL', '2')
+    monkeypatch.setenv('WHISPER_PARALLEL_MIN_SECONDS', '30')
+    monkeypatch.setattr(pipeline, '_load_audio', lambda p: audio)
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: ChunkModel())
+    monkeypatch.setattr(pipeline, '_get_transcribe_pool', lambda workers: ThreadPoolExecutor(workers))
+    text = pipeline.transcribe_file(str(path))
+    assert text == f'[{points[0]}]\n[{len(audio) - points[0]}]'
+    assert not path.exists()
+
+    segments = pipeline._transcribe_parallel(audio, 2)
+    assert [seg['start'] for seg in segments] == [0.0, points[0] / 16000]
+
+
+def test_parallel_transcription_decodes_short_files_once(monkeypatch, tmp_path):
+    import numpy as np
+
+    sources = []
+
+    class SourceModel:
+        def transcribe(self, source):
+            sources.append(source)
+            return {'segments': [{'start': 0.0, 'end': 1.0, 'text': ' short'}]}
+
+    loads = []
+    audio = np.zeros(16000 * 5, dtype=np.float32)
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setenv('WHISPER_PARALLEL', '2')
+    monkeypatch.setenv('WHISPER_PARALLEL_MIN_SECONDS', '30')
+    monkeypatch.setattr(pipeline, '_load_audio', lambda p: loads.append(p) or audio)
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: SourceModel())
+
+    path = tmp_path / 'short.webm'
+    path.write_bytes(b'x')
+    monkeypatch.setattr(pipeline, '_audio_duration', lambda p: 5.0)
+    assert pipeline.transcribe_file(str(path)) == 'short'
+    assert loads == []
+    assert sources == [str(path)]
+
+    # Without a duration the file is decoded once and the array is reused.
+    path.write_bytes(b'x')
+    sources.clear()
+    monkeypatch.setattr(pipeline, '_audio_duration', lambda p: None)
+    assert pipeline.transcribe_file(str(path)) == 'short'
+    assert loads == [str(path)]
+    assert sources == [audio]
+
+
+def test_transcribe_files_batches_clips_across_files(monkeypatch, tmp_path):
+    import numpy as np
+
+    class FakeBatched:
+        calls = []
+
+        def __init__(self, model):
+            self.model = model
+
+        def transcribe(self, audio, *, language, clip_timestamps, batch_size):
+            FakeBatched.calls.append((len(audio), language, clip_timestamps, batch_size))
+            segments = [
+                types.SimpleNamespace(start=clip['start'] / 16000, end=clip['end'] / 16000, text=f"<{clip['start']}>")
+                for clip in clip_timestamps
+            ]
+            return iter(segments), None
+
+    class LanguageModel:
+        def detect_language(self, audio):
+            return ('ja' if len(audio) < 16000 * 10 else 'en'), 0.9, []
+
+    rng = np.random.default_rng(0)
+    long_audio = rng.normal(0, 0.1, 16000 * 40).astype(np.float32)
+    long_audio[16000 * 21 + 8000:16000 * 22 + 8000] = 0  # pause at 21.5-22.5 s
+    audios = {'a': long_audio, 'b': np.ones(16000 * 5, dtype=np.float32), 'c': long_audio[:16000 * 8]}
+    paths = []
+    for name in ['a', 'bad', 'b', 'c']:
+        path = tmp_path / name
+        path.write_bytes(b'x')
+        paths.append(str(path))
+
+    def fake_load(path):
+        name = os.path.basename(path)
+        if name == 'bad':
+            raise RuntimeError('ffmpeg failed')
+        return audios[name]
+
+    monkeypatch.setenv('WHISPER_BACKEND', 'faster')
+    monkeypatch.setenv('WHISPER_BATCH_SIZE', '4')
+    monkeypatch.setattr(faster_whisper_stub, 'BatchedInferencePipeline', FakeBatched, raising=False)
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: LanguageModel())
+    monkeypatch.setattr(pipeline, '_load_audio', fake_load)
+    texts = pipeline.transcribe_files(paths, return_exceptions=True)
+    assert texts[0] == '<0>\n<344800>'
+    assert isinstance(texts[1], RuntimeError)
+    assert texts[2] == '<0>'
+    assert texts[3] == '<80000>'
+    assert FakeBatched.calls == [
+        (16000 * 40, 'en', [{'start': 0, 'end': 344800}, {'start': 344800, 'end': 640000}], 4),
+        (16000 * 13, 'ja', [{'start': 0, 'end': 80000}, {'start': 80000, 'end': 208000}], 4),
+    ]
+    assert not any(os.path.exists(p) for p in paths)
+
+
+def test_transcribe_videos_groups_downloads_for_batching(monkeypatch):
+    monkeypatch.setenv('TRANSCRIPT_CACHE', '0')
+    monkeypatch.setenv('WHISPER_BATCH_FILES', '2')
+    groups = []
+
+    def fake_transcribe_files(paths, *, return_exceptions):
+        groups.append(sorted(paths))
+        return [f'text {p}' for p in paths]
+
+    monkeypatch.setattr(pipeline, 'download_audio', lambda vid, *, out_dir: vid)
+    monkeypatch.setattr(pipeline, 'transcribe_files', fake_transcribe_files)
+    results = pipeline.transcribe_videos(['a', 'b', 'c'], transcribe_workers=1)
+    assert [r['transcript'] for r in results] == ['text a', 'text b', 'text c']
+    assert sorted(len(g) for g in groups) == [1, 2]
+
+
+def test_iter_transcript_segments_yields_lazily_and_caches(monkeypatch, tmp_path):
+    decoded = []
+
+    class LazyModel:
+        def transcribe(self, path):
+            def segments():
+                for i in range(3):
+                    decoded.append(i)
+                    yield types.SimpleNamespace(start=float(i), end=i + 1.0, text=f' s{i}')
+            return segments(), None
+
+    path = tmp_path / 'abc.webm'
+    path.write_bytes(b'x')
+    monkeypatch.setenv('WHISPER_BACKEND', 'faster')
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: LazyModel())
+    monkeypatch.setattr(pipeline, 'download_audio', lambda vid, *, out_dir: str(path))
+    segments = pipeline.iter_transcript_segments('abc')
+    assert next(segments) == {'start': 0.0, 'end': 1.0, 'text': ' s0'}
+    assert decoded == [0]
+    assert [seg['text'] for seg in segments] == [' s1', ' s2']
+    assert not path.exists()
+
+    assert list(pipeline.iter_transcript_segments('abc')) == [{'start': 0.0, 'end': 0.0, 'text': 's0\ns1\ns2'}]
+    assert pipeline.download_and_transcribe('abc') == 's0\ns1\ns2'
+
+
+def test_iter_file_segments_cuts_windows_at_quiet_points(monkeypatch, tmp_path):
+    import numpy as np
+
+    # 25 s of tone with short pauses near, but not at, every 5 s boundary.
+    audio = np.full(25 * 16000, 0.5, dtype=np.float32)
+    for pause in [6.2, 11.5, 13.7, 21.9]:
+        audio[int(pause * 16000):int(pause * 16000) + 3200] = 0.0
+    pieces = []
+
+    class OpenAIModel:
+        def transcribe(self, chunk):
+            pieces.append(len(chunk))
+            return {'segments': [{'start': 0.0, 'end': 1.0, 'text': ' x'}]}
+
+    path = tmp_path / 'abc.webm'
+    path.write_bytes(b'x')
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setenv('WHISPER_STREAM_WINDOW', '10')
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: OpenAIModel())
+    monkeypatch.setattr(pipeline, '_load_audio', lambda file_path: audio)
+    segments = list(pipeline.iter_file_segments(str(path)))
+    assert sum(pieces) == len(audio)
+    assert max(pieces) <= 10 * 16000
+    cuts = np.cumsum(pieces)[:-1]
+    assert all(audio[cut] == 0.0 for cut in cuts)
+    assert [seg['start'] for seg in segments] == [0.0, *(cut / 16000 for cut in cuts)]
+    assert not path.exists()
+
+
+def test_parse_dialogue_merges_turns():
+    script = 'はじめに\nA: こんにちは。\n続きです。\n**B**：やあ。\nB: 元気？\nA:\nまたね。'
+    assert pipeline._parse_dialogue(script) == [
+        ('', 'はじめに'),
+        ('A', 'こんにちは。\n続きです。'),
+        ('B', 'やあ。\n元気？'),
+        ('A', 'またね。'),
+    ]
+
+
+def test_parse_dialogue_keeps_times_urls_and_one_off_labels_as_text(monkeypatch):
+    script = (
+        'A: 今日の予定です。\n開始は10:30です。\n12: 数字だけ\n'
+        'https://example.com を参照\nポイント: 一度だけの見出し\nA: 以上です。'
+    )
+    assert pipeline._parse_dialogue(script) == [
+        ('A', '今日の予定です。\n開始は10:30です。\n12: 数字だけ\n'
+              'https://example.com を参照\nポイント: 一度だけの見出し\n以上です。'),
+    ]
+    monkeypatch.setenv('TTS_SPEAKER_VOICES', 'Host=ja-JP-Neural2-D')
+    assert pipeline._parse_dialogue('Host: ようこそ\nGuest: どうも') == [
+        ('Host', 'ようこそ\nGuest: どうも'),
+    ]
+
+
+def test_monologue_with_times_stays_single_voice(monkeypatch):
+    calls = []
+
+    class VoiceTTS(FakeTTS):
+        class TextToSpeechClient(FakeTTS.TextToSpeechClient):
+            def synthesize_speech(self, request):
+                calls.append(request['voice'].name)
+                return super().synthesize_speech(request)
+
+    monkeypatch.setattr(pipeline, 'texttospeech', VoiceTTS)
+    monkeypatch.setenv('TTS_MULTI_VOICE', '1')
+    monkeypatch.setenv('TTS_CACHE', '0')
+    pipeline.synthesize_text_to_mp3('開始は10:30です。\n詳細: https://example.com')
+    assert calls == ['ja-JP-Neural2-B']
+
+
+def test_multi_voice_synthesis_uses_speaker_voices_in_order(monkeypatch):
+    calls = []
+
+    class VoiceTTS(FakeTTS):
+        class TextToSpeechClient(FakeTTS.TextToSpeechClient):
+            def synthesize_speech(self, request):
+                calls.append((request['voice'].name, request['input'].text))
+                return super().synthesize_speech(request)
+
+    monkeypatch.setattr(pipeline, 'texttospeech', VoiceTTS)
+    monkeypatch.setenv('TTS_MULTI_VOICE', '1')
+    monkeypatch.setenv('TTS_SPEAKER_VOICES', 'B=ja-JP-Neural2-D')
+    audio = pipeline.synthesize_text_to_mp3('A: one\nB: two\nA: three')
+    assert audio == b'ID3\x00\x00\x00\x00\x00\x00\x01Xone' + b'two' + b'three'
+    assert sorted(calls) == [
+        ('ja-JP-Neural2-B', 'one'),
+        ('ja-JP-Neural2-B', 'three'),
+        ('ja-JP-Neural2-D', 'two'),
+    ]
+
+    calls.clear()
+    pipeline.synthesize_text_to_mp3('A: one\nB: two\nA: four')
+    assert calls == [('ja-JP-Neural2-B', 'four')]
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = pipeline._RateLimiter(100)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.035
+
+
+def test_async_video_info_lookups_run_concurrently(monkeypatch):
+    import asyncio
+    import threading
+
+    youtube = FakeYouTube([{'id': v, 'channel': 'c', 'views': 1} for v in ['a', 'b', 'c']])
+    barrier = threading.Barrier(3, timeout=5)
+    real_execute = pipeline._execute
+
+    def execute(request, endpoint):
+        barrier.wait()  # fails unless all three lookups are in flight together
+        return real_execute(request, endpoint)
+
+    monkeypatch.setattr(pipeline, '_get_youtube_client', lambda key: youtube)
+    monkeypatch.setattr(pipeline, '_execute', execute)
+    infos = asyncio.run(pipeline.get_video_infos_async('key', ['c', 'missing', 'a']))
+    assert [info and info['videoId'] for info in infos] == ['c', None, 'a']
+
+
+def test_metrics_record_stages_and_render_prometheus_text(monkeypatch):
+    pipeline.reset_metrics()
+    youtube = FakeYouTube([{'id': 'a', 'channel': 'c', 'views': 1}])
+    monkeypatch.setattr(pipeline, '_get_youtube_client', lambda key: youtube)
+    pipeline.get_video_info('key', 'a')
+
+    class FailingRequest:
+        def execute(self):
+            raise RuntimeError('quota')
+
+    with pytest.raises(RuntimeError):
+        pipeline._execute(FailingRequest(), 'videos.list')
+    pipeline._record_transcription(2.0, 10.0, 'openai')
+
+    text = pipeline.render_metrics()
+    assert '# TYPE slower_stage_duration_seconds histogram' in text
+    assert 'slower_stage_duration_seconds_count{endpoint="videos.list",stage="youtube"} 2' in text
+    assert 'slower_stage_errors_total{endpoint="videos.list",stage="youtube"} 1' in text
+    assert 'slower_audio_seconds_total{backend="openai",model="tiny"} 10' in text
+    assert 'slower_whisper_real_time_factor_bucket{backend="openai",model="tiny",le="0.2"} 1' in text
+    assert 'slower_whisper_real_time_factor_bucket{backend="openai",model="tiny",le="0.1"} 0' in text
+    assert 'slower_youtube_quota_units_total{endpoint="videos.list"} 2' in text
+
+
+def test_disk_cache_scans_once_and_keeps_running_total(monkeypatch, tmp_path):
+    first = pipeline._DiskCache(str(tmp_path), max_bytes=100)
+    first.set('old', b'o' * 30)
+    cache = pipeline._DiskCache(str(tmp_path), max_bytes=100)
+    scans = []
+    real_entries = cache._entries
+    monkeypatch.setattr(cache, '_entries', lambda: scans.append(1) or real_entries())
+    for idx in range(5):
+        cache.set(f'k{idx}', b'x' * 20)
+    assert len(scans) == 1
+    assert cache._bytes == 100
+    assert cache.get('old') is None
+    assert cache.evictions == 1
+
+
+def test_transcript_segments_become_lines_for_map_reduce(monkeypatch, tmp_path):
+    class OpenAIModel:
+        def transcribe(self, path):
+            return {
+                'text': ' 一つ目 二つ目',
+                'segments': [{'text': ' 一つ目', 'end': 1.0}, {'text': ' 二つ目', 'end': 2.0}],
+            }
+
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    monkeypatch.setattr(pipeline, '_get_whisper_model', lambda name: OpenAIModel())
+    path = tmp_path / 'a.webm'
+    path.write_bytes(b'x')
+    text = pipeline.transcribe_file(str(path))
+    assert text == '一つ目\n二つ目'
+    assert pipeline._split_text(text, 4) == ['一つ目', '二つ目']
+
+
+def test_disk_cache_ttl_counts_from_write_not_last_read(tmp_path):
+    cache = pipeline._DiskCache(str(tmp_path), max_bytes=100, ttl=2)
+    cache.set('a', b'x')
+    path = cache._path('a')
+    written = time.time() - 1.5
+    os.utime(path, (written, written))
+    assert cache.get('a') == b'x'
+    assert os.path.getmtime(path) == pytest.approx(written)
+    assert os.stat(path).st_atime > written
+    os.utime(path, (time.time(), written - 1))
+    assert cache.get('a') is None
+
+
+def test_start_whisper_preload_runs_once_in_background(monkeypatch):
+    calls = []
+    release = pipeline.threading.Event()
+
+    def slow_preload():
+        calls.append(1)
+        release.wait(5)
+        pipeline._WHISPER_READY.set()
+
+    monkeypatch.setenv('WHISPER_PRELOAD', '1')
+    monkeypatch.setattr(pipeline, 'preload_whisper_models', slow_preload)
+    monkeypatch.setattr(pipeline, '_WHISPER_READY', pipeline.threading.Event())
+    monkeypatch.setattr(pipeline, '_PRELOAD_THREAD', None)
+    thread = pipeline.start_whisper_preload()
+    assert pipeline.start_whisper_preload() is thread
+    assert not pipeline.whisper_ready()
+    release.set()
+    thread.join(5)
+    assert pipeline.whisper_ready()
+    assert calls == [1]
+
+
+def test_failed_whisper_preload_is_reported_and_can_be_restarted(monkeypatch):
+    attempts = []
+
+    def preload():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise MemoryError('out of memory')
+        pipeline._WHISPER_READY.set()
+
+    monkeypatch.setenv('WHISPER_PRELOAD', '1')
+    monkeypatch.setattr(pipeline, 'preload_whisper_models', preload)
+    monkeypatch.setattr(pipeline, '_WHISPER_READY', pipeline.threading.Event())
+    monkeypatch.setattr(pipeline, '_PRELOAD_THREAD', None)
+    monkeypatch.setattr(pipeline, '_PRELOAD_ERROR', None)
+    monkeypatch.setattr(pipeline.threading, 'excepthook', lambda args: None)
+    failed = pipeline.start_whisper_preload()
+    failed.join(5)
+    assert isinstance(pipeline.whisper_preload_error(), MemoryError)
+    assert not pipeline.whisper_ready()
+
+    retry = pipeline.start_whisper_preload()
+    assert retry is not failed
+    retry.join(5)
+    assert pipeline.whisper_preload_error() is None
+    assert pipeline.whisper_ready()
+    assert pipeline.start_whisper_preload() is retry
+    assert len(attempts) == 2
+
+
+def test_transcript_cache_key_includes_vad_settings(monkeypatch):
+    monkeypatch.delenv('WHISPER_VAD', raising=False)
+    plain = pipeline._transcript_cache_key('abc')
+    monkeypatch.setenv('WHISPER_VAD', '1')
+    vad = pipeline._transcript_cache_key('abc')
+    monkeypatch.setenv('WHISPER_VAD_THRESHOLD', '0.7')
+    tuned = pipeline._transcript_cache_key('abc')
+    assert len({plain, vad, tuned}) == 3
+
+
+def test_transcribe_pools_are_kept_per_configuration(monkeypatch):
+    created = []
+
+    class FakePool:
+        def __init__(self, max_workers, **kwargs):
+            created.append((max_workers, kwargs['initargs']))
+
+    monkeypatch.setattr(pipeline, 'ProcessPoolExecutor', FakePool)
+    monkeypatch.setattr(pipeline, '_TRANSCRIBE_POOLS', {})
+    monkeypatch.setenv('WHISPER_THREADS_PER_WORKER', '2')
+    batch = pipeline._get_transcribe_pool(2)
+    parallel = pipeline._get_transcribe_pool(4)
+    assert pipeline._get_transcribe_pool(2) is batch
+    assert pipeline._get_transcribe_pool(4) is parallel
+    assert created == [(2, (2,)), (4, (2,))]
+
+
+def test_iter_transcript_segments_async_streams_and_stops_early(monkeypatch):
+    import asyncio
+
+    closed = []
+
+    def segments(video_id, **kwargs):
+        try:
+            for i in range(100):
+                yield {'start': float(i), 'end': i + 1.0, 'text': f'{video_id}{i}'}
+                time.sleep(0.001)
+        finally:
+            closed.append(video_id)
+
+    def failing(video_id, **kwargs):
+        yield {'start': 0.0, 'end': 1.0, 'text': 'x'}
+        raise RuntimeError('decode failed')
+
+    async def first_two():
+        stream = pipeline.iter_transcript_segments_async('v')
+        texts = [(await stream.__anext__())['text'], (await stream.__anext__())['text']]
+        await stream.aclose()
+        return texts
+
+    async def until_error():
+        texts = []
+        with pytest.raises(RuntimeError, match='decode failed'):
+            async for seg in pipeline.iter_transcript_segments_async('v'):
+                texts.append(seg['text'])
+        return texts
+
+    monkeypatch.setattr(pipeline, 'iter_transcript_segments', segments)
+    assert asyncio.run(first_two()) == ['v0', 'v1']
+    deadline = time.monotonic() + 5
+    while not closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert closed == ['v']
+    monkeypatch.setattr(pipeline, 'iter_transcript_segments', failing)
+    assert asyncio.run(until_error()) == ['x']
+
+
+def test_speaker_voices_match_language_and_avoid_taken_voices():
+    configured = {'A': 'ja-JP-Neural2-B', 'B': 'ja-JP-Neural2-C'}
+    assert pipeline._speaker_voices(['A', 'B'], 'en-US', configured) == {
+        'A': 'en-US-Neural2-F',
+        'B': 'en-US-Neural2-J',
+    }
+    assert pipeline._speaker_voices(['B', 'A'], 'ja-JP', {'A': 'ja-JP-Neural2-B'}) == {
+        'B': 'ja-JP-Neural2-C',
+        'A': 'ja-JP-Neural2-B',
+    }
+    voices = pipeline._speaker_voices(['A', 'B', 'C'], 'ja-JP', {})
+    assert voices == {'A': 'ja-JP-Neural2-B', 'B': 'ja-JP-Neural2-C', 'C': 'ja-JP-Neural2-B'}
+
+
+def test_metrics_do_not_wait_for_model_load_or_scan_disk_caches(monkeypatch, tmp_path):
+    import threading
+
+    monkeypatch.setenv('WHISPER_BACKEND', 'openai')
+    pipeline._MODEL_CACHE.clear()
+    pipeline._get_whisper_model('tiny')
+    cache = pipeline._get_disk_cache('transcripts', str(tmp_path), max_bytes=100)
+    cache.set('a', b'x' * 10)
+    monkeypatch.setattr(cache, '_entries', lambda: pytest.fail('stats rescanned the cache'))
+
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load(name):
+        loading.set()
+        release.wait(5)
+        return DummyModel()
+
+    monkeypatch.setattr(whisper_stub, 'load_model', slow_load)
+    loader = threading.Thread(target=pipeline._get_whisper_model, args=('base',))
+    loader.start()
+    try:
+        assert loading.wait(5)
+        # A cached model and the metrics stay available during the load.
+        start = time.perf_counter()
+        assert pipeline._get_whisper_model('tiny') is not None
+        text = pipeline.render_metrics()
+        assert pipeline.whisper_cache_stats()['models'] == ['openai:tiny']
+        assert time.perf_counter() - start < 1
+    finally:
+        release.set()
+        loader.join(5)
+    assert 'slower_cache_bytes{cache="transcripts"} 10' in text
+    assert 'slower_cache_hits_total{cache="whisper_model"}' in text
+    assert cache.stats()['entries'] == 1
+    assert list(pipeline._MODEL_CACHE) == ['openai:tiny', 'openai:base']
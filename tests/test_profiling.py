@@ -0,0 +1,118 @@
+import marshal
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, override_settings
+
+from summary import profiling
+from summary.models import ProfileRecord
+
+pytestmark = pytest.mark.usefixtures('db')
+
+
+def _work():
+    return sum(i * i for i in range(10000))
+
+
+@override_settings(PROFILING_ENABLED=True)
+def test_profile_stores_hotspots_meta_and_raw_stats():
+    with profiling.profile(ProfileRecord.JOB, 'job-1', video_ids=['a']) as meta:
+        _work()
+        meta['status'] = 'done'
+    record = ProfileRecord.objects.get()
+    assert (record.kind, record.name) == (ProfileRecord.JOB, 'job-1')
+    assert record.meta == {'video_ids': ['a'], 'status': 'done'}
+    assert record.duration > 0
+    assert any(spot['function'] == '<genexpr>' for spot in record.hotspots)
+    assert marshal.loads(bytes(record.stats))
+
+
+def test_nested_profile_folds_into_the_outer_one():
+    with profiling.profile(ProfileRecord.REQUEST, 'outer'):
+        with profiling.profile(ProfileRecord.JOB, 'inner'):
+            _work()
+    assert list(ProfileRecord.objects.values_list('name', flat=True)) == ['outer']
+    assert not profiling._ACTIVE.locked()
+
+
+@override_settings(PROFILING_KEEP=2)
+def test_save_keeps_only_the_newest_records():
+    for idx in range(4):
+        with profiling.profile(ProfileRecord.JOB, f'job-{idx}'):
+            _work()
+    assert list(ProfileRecord.objects.values_list('name', flat=True)) == ['job-3', 'job-2']
+
+
+def test_middleware_is_sync_and_async_capable():
+    def view(request):
+        return HttpResponse()
+
+    async def aview(request):
+        return HttpResponse()
+
+    assert not iscoroutinefunction(profiling.ProfilingMiddleware(view))
+    assert iscoroutinefunction(profiling.ProfilingMiddleware(aview))
+
+
+@override_settings(PROFILING_ENABLED=True)
+def test_middleware_profiles_requested_sync_requests():
+    response = Client().get('/profiles/', {'profile': '1'})
+    assert response.status_code == 302
+    Client().get('/profiles/')
+    record = ProfileRecord.objects.get()
+    assert (record.kind, record.name) == (ProfileRecord.REQUEST, '/profiles/')
+    assert record.meta == {'method': 'GET', 'query': 'profile=1', 'status': 302}
+
+
+@override_settings(PROFILING_ENABLED=True)
+def test_middleware_profiles_async_requests_on_the_event_loop():
+    async def aview(request):
+        assert request.profiling
+        return HttpResponse(status=204)
+
+    middleware = profiling.ProfilingMiddleware(aview)
+    request = RequestFactory().get('/async/', {'profile': '1'})
+    response = async_to_sync(middleware)(request)
+    assert response.status_code == 204
+    record = ProfileRecord.objects.get()
+    assert record.meta == {'method': 'GET', 'query': 'profile=1', 'status': 204}
+
+    async def get():
+        return await AsyncClient().get('/profiles/', {'profile': '1'})
+
+    assert async_to_sync(get)().status_code == 302
+    assert ProfileRecord.objects.filter(name='/profiles/').exists()
+
+
+def test_middleware_skips_requests_when_disabled():
+    Client().get('/profiles/', {'profile': '1'})
+    assert not ProfileRecord.objects.exists()
+
+
+def test_profile_list_shows_slowest_first_and_filters_by_kind():
+    for kind, name, duration in [
+        (ProfileRecord.REQUEST, '/fast/', 0.1),
+        (ProfileRecord.REQUEST, '/slow/', 2.0),
+        (ProfileRecord.JOB, 'job-1', 1.0),
+    ]:
+        ProfileRecord.objects.create(
+            kind=kind,
+            name=name,
+            duration=duration,
+            hotspots=[{'function': f'hot_{name}', 'file': 'x.py', 'line': 1,
+                       'calls': 1, 'tottime': 0.1, 'cumtime': 0.1}],
+            stats=b'',
+        )
+    client = Client()
+    assert client.get('/profiles/').status_code == 302
+
+    User.objects.create_user('admin', password='pw', is_staff=True)
+    client.login(username='admin', password='pw')
+    response = client.get('/profiles/')
+    assert [r.name for r in response.context['records']] == ['/slow/', 'job-1', '/fast/']
+    assert b'hot_/slow/' in response.content
+
+    response = client.get('/profiles/', {'kind': ProfileRecord.JOB})
+    assert [r.name for r in response.context['records']] == ['job-1']
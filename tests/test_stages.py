@@ -0,0 +1,120 @@
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.utils import timezone
+
+from summary import artifacts, stages
+from summary.models import StageArtifact
+
+pytestmark = pytest.mark.usefixtures('db')
+
+
+def test_artifact_key_depends_on_inputs_and_config(monkeypatch):
+    stage = stages.STAGES['summarize']
+    context = {'transcript': 'text', 'script_lang': 'ja'}
+    key = stages.artifact_key(stage, context)
+    assert key == stages.artifact_key(stage, dict(context))
+    assert key != stages.artifact_key(stage, {**context, 'script_lang': 'en'})
+    monkeypatch.setenv('GEMINI_MODEL', 'other-model')
+    assert key != stages.artifact_key(stage, context)
+
+
+def test_run_reports_stages_and_reuses_stored_outputs(fake_pipeline):
+    events = []
+    names = ['transcribe', 'summarize', 'script']
+    context = stages.run(
+        names,
+        {'video_id': 'abc', 'script_lang': 'ja'},
+        on_start=lambda stage: events.append(('start', stage.name)),
+        on_finish=lambda stage, reused: events.append(('finish', stage.name, reused)),
+    )
+    assert context['script'] == 'A: summary: transcript of abc'
+    assert events == [
+        ('start', 'transcribe'), ('finish', 'transcribe', False),
+        ('start', 'summarize'), ('finish', 'summarize', False),
+        ('start', 'script'), ('finish', 'script', False),
+    ]
+
+    finished = []
+    again = stages.run(
+        names,
+        {'video_id': 'abc', 'script_lang': 'ja'},
+        on_finish=lambda stage, reused: finished.append(reused),
+    )
+    assert again['script'] == context['script']
+    assert finished == [True, True, True]
+    assert fake_pipeline.calls == [('transcribe', 'abc')]
+
+
+def test_transcripts_are_not_stored_as_artifacts(fake_pipeline):
+    stages.run(['transcribe'], {'video_id': 'abc'})
+    assert not StageArtifact.objects.exists()
+    assert stages.lookup(stages.STAGES['transcribe'], {'video_id': 'abc'}) == 'transcript of abc'
+
+
+def test_failed_stage_keeps_earlier_outputs_for_retry(fake_pipeline):
+    def broken_script(key, summary, lang='ja'):
+        raise RuntimeError('quota')
+
+    fake_pipeline.generate_discussion_script = broken_script
+    with pytest.raises(RuntimeError):
+        stages.run(['transcribe', 'summarize', 'script'], {'video_id': 'abc', 'script_lang': 'ja'})
+
+    fake_pipeline.generate_discussion_script = lambda key, text, lang='ja': 'B: ' + text
+    finished = []
+    context = stages.run(
+        ['transcribe', 'summarize', 'script'],
+        {'video_id': 'abc', 'script_lang': 'ja'},
+        on_finish=lambda stage, reused: finished.append((stage.name, reused)),
+    )
+    assert context['script'] == 'B: summary: transcript of abc'
+    assert finished == [('transcribe', True), ('summarize', True), ('script', False)]
+
+
+def test_missing_audio_file_is_synthesized_again(fake_pipeline):
+    stage = stages.STAGES['synthesize']
+    context = {'script': 'A: hi', 'audio_lang': 'ja-JP'}
+    audio_id, reused = stages.run_stage(stage, context)
+    assert not reused
+    artifacts.audio_path(audio_id).unlink()
+
+    again, reused = stages.run_stage(stage, context)
+    assert not reused
+    assert artifacts.audio_path(again) is not None
+
+
+def test_arun_stage_stores_and_reuses(fake_pipeline):
+    async def summarize(key, text, lang='ja'):
+        return 'async summary: ' + text
+
+    fake_pipeline.summarize_with_gemini_async = summarize
+    stage = stages.STAGES['summarize']
+    context = {'transcript': 'text', 'script_lang': 'ja'}
+    assert async_to_sync(stages.arun_stage)(stage, context) == ('async summary: text', False)
+    assert async_to_sync(stages.arun_stage)(stage, context) == ('async summary: text', True)
+    assert stages.run_stage(stage, context) == ('async summary: text', True)
+
+
+def _artifact(key, age_days):
+    artifact = StageArtifact.objects.create(key=key, stage='summarize', value=key)
+    StageArtifact.objects.filter(pk=key).update(
+        created_at=timezone.now() - timedelta(days=age_days)
+    )
+    return artifact
+
+
+def test_prune_removes_expired_artifacts(monkeypatch):
+    monkeypatch.setenv('STAGE_ARTIFACT_MAX_AGE_DAYS', '7')
+    _artifact('old', 8)
+    _artifact('new', 1)
+    assert stages.prune() == 1
+    assert list(StageArtifact.objects.values_list('key', flat=True)) == ['new']
+
+
+def test_prune_keeps_newest_rows(monkeypatch):
+    monkeypatch.setenv('STAGE_ARTIFACT_MAX_ROWS', '2')
+    for age in range(4):
+        _artifact(f'age{age}', age)
+    assert stages.prune() == 2
+    assert list(StageArtifact.objects.values_list('key', flat=True)) == ['age0', 'age1']
@@ -0,0 +1,211 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import AsyncClient, Client
+
+from summary import artifacts, stages
+from summary.models import StageArtifact
+
+AUDIO = bytes(range(10))
+
+
+@pytest.fixture
+def audio(settings_override):
+    artifact_id = artifacts.save_audio(AUDIO)
+    return artifact_id, f'/audio/{artifact_id}.mp3'
+
+
+@pytest.mark.usefixtures('settings_override')
+def test_concurrent_saves_of_the_same_audio_do_not_collide(monkeypatch):
+    import os
+    import threading
+
+    both_written = threading.Barrier(2, timeout=5)
+    real_replace = os.replace
+
+    def replace(src, dst):
+        both_written.wait()
+        real_replace(src, dst)
+
+    monkeypatch.setattr(artifacts.os, 'replace', replace)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(artifacts.save_audio(AUDIO)))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(results) == 2 and results[0] == results[1]
+    assert artifacts.audio_path(results[0]).read_bytes() == AUDIO
+    assert list(artifacts.audio_path(results[0]).parent.glob('*.tmp')) == []
+
+
+def test_audio_full_response_has_etag_and_length(audio):
+    artifact_id, url = audio
+    response = Client().get(url)
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == AUDIO
+    assert response['ETag'] == f'"{artifact_id}"'
+    assert response['Content-Length'] == '10'
+    assert response['Accept-Ranges'] == 'bytes'
+
+
+def test_audio_if_none_match_returns_304(audio):
+    artifact_id, url = audio
+    response = Client().get(url, HTTP_IF_NONE_MATCH=f'"{artifact_id}"')
+    assert response.status_code == 304
+    assert response['ETag'] == f'"{artifact_id}"'
+
+
+@pytest.mark.parametrize(
+    'header, content_range, body',
+    [
+        ('bytes=2-4', 'bytes 2-4/10', AUDIO[2:5]),
+        ('bytes=7-', 'bytes 7-9/10', AUDIO[7:]),
+        ('bytes=-3', 'bytes 7-9/10', AUDIO[7:]),
+        ('bytes=8-20', 'bytes 8-9/10', AUDIO[8:]),
+    ],
+)
+def test_audio_single_range_returns_206(audio, header, content_range, body):
+    response = Client().get(audio[1], HTTP_RANGE=header)
+    assert response.status_code == 206
+    assert response['Content-Range'] == content_range
+    assert response['Content-Length'] == str(len(body))
+    assert b''.join(response.streaming_content) == body
+
+
+def test_audio_unsatisfiable_range_returns_416(audio):
+    response = Client().get(audio[1], HTTP_RANGE='bytes=10-')
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */10'
+
+
+@pytest.mark.parametrize('header', ['bytes=0-1,4-5', 'items=0-1', 'bytes=abc'])
+def test_audio_multi_or_invalid_range_sends_whole_file(audio, header):
+    response = Client().get(audio[1], HTTP_RANGE=header)
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == AUDIO
+
+
+def test_audio_if_range_mismatch_sends_whole_file(audio):
+    response = Client().get(audio[1], HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"other"')
+    assert response.status_code == 200
+
+
+def test_audio_unknown_id_is_404(settings_override):
+    assert Client().get(f'/audio/{"0" * 64}.mp3').status_code == 404
+
+
+def _events(chunks):
+    events = []
+    for chunk in chunks:
+        for block in chunk.decode('utf-8').strip().split('\n\n'):
+            name, data = block.split('\n')
+            events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+@pytest.mark.usefixtures('db')
+def test_transcribe_stream_sends_segments_as_they_are_decoded(fake_pipeline):
+    received_first = asyncio.Event()
+
+    async def segments(video_id):
+        yield {'start': 0.0, 'end': 1.0, 'text': ' one'}
+        # Only continue once the client has the first event.
+        await asyncio.wait_for(received_first.wait(), 5)
+        yield {'start': 1.0, 'end': 2.0, 'text': ' two'}
+        fake_pipeline.transcripts[video_id] = 'one\ntwo'
+
+    fake_pipeline.iter_transcript_segments_async = segments
+    fake_pipeline.join_segments = lambda texts: '\n'.join(t.strip() for t in texts)
+
+    async def consume():
+        client = AsyncClient()
+        response = await client.get('/step/abc/transcribe/stream/')
+        assert response['Content-Type'] == 'text/event-stream'
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk)
+            received_first.set()
+        return client, chunks
+
+    client, chunks = async_to_sync(consume)()
+    assert _events(chunks) == [
+        ('segment', {'start': 0.0, 'end': 1.0, 'text': ' one'}),
+        ('segment', {'start': 1.0, 'end': 2.0, 'text': ' two'}),
+        ('done', {'characters': 8}),
+    ]
+    session = SessionStore(client.cookies[settings.SESSION_COOKIE_NAME].value)
+    assert session['transcript'] == 'one\ntwo'
+    assert session['steps'] == ['transcribed']
+    stored = stages.lookup(stages.STAGES['transcribe'], {'video_id': 'abc'})
+    assert stored == 'one\ntwo'
+    # The transcript lives in the pipeline's transcript store only.
+    assert not StageArtifact.objects.exists()
+
+
+@pytest.mark.usefixtures('db')
+def test_transcribe_stream_sends_segments_incrementally_under_wsgi(fake_pipeline):
+    decoded = []
+
+    def segments(video_id):
+        for idx, text in enumerate([' one', ' two']):
+            decoded.append(text)
+            yield {'start': float(idx), 'end': idx + 1.0, 'text': text}
+        fake_pipeline.transcripts[video_id] = 'one\ntwo'
+
+    fake_pipeline.iter_transcript_segments = segments
+    fake_pipeline.join_segments = lambda texts: '\n'.join(t.strip() for t in texts)
+
+    client = Client()
+    response = client.get('/step/abc/transcribe/stream/')
+    assert response['Content-Type'] == 'text/event-stream'
+    stream = iter(response.streaming_content)
+    first = next(stream)
+    # The first event is sent before the second segment is decoded.
+    assert decoded == [' one']
+    assert _events([first, *stream]) == [
+        ('segment', {'start': 0.0, 'end': 1.0, 'text': ' one'}),
+        ('segment', {'start': 1.0, 'end': 2.0, 'text': ' two'}),
+        ('done', {'characters': 8}),
+    ]
+    session = SessionStore(client.cookies[settings.SESSION_COOKIE_NAME].value)
+    assert session['transcript'] == 'one\ntwo'
+    assert session['steps'] == ['transcribed']
+
+
+@pytest.mark.usefixtures('db')
+def test_transcribe_stream_reports_errors(fake_pipeline):
+    async def segments(video_id):
+        yield {'start': 0.0, 'end': 1.0, 'text': ' one'}
+        raise RuntimeError('ffmpeg failed')
+
+    fake_pipeline.iter_transcript_segments_async = segments
+
+    async def consume():
+        response = await AsyncClient().get('/step/abc/transcribe/stream/')
+        return [chunk async for chunk in response.streaming_content]
+
+    events = _events(async_to_sync(consume)())
+    assert events[-1] == ('error', {'error': 'ffmpeg failed'})
+
+
+def test_readyz_reports_a_failed_preload(fake_pipeline):
+    fake_pipeline.whisper_ready = lambda: False
+    fake_pipeline.whisper_preload_error = lambda: None
+    response = Client().get('/readyz/')
+    assert response.status_code == 503
+    assert response.json() == {'ready': False}
+
+    fake_pipeline.whisper_preload_error = lambda: MemoryError('out of memory')
+    data = Client().get('/readyz/').json()
+    assert data['error'] == "Whisper preload failed: MemoryError('out of memory')"
+
+    fake_pipeline.whisper_ready = lambda: True
+    assert Client().get('/readyz/').json() == {'ready': True}